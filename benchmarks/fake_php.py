@@ -0,0 +1,162 @@
+"""Stand-in for `php` and `composer` used by the benchmarks and tests.
+
+Invoked as `fake_php.py php [-d opt]... artisan <command> ...` or
+`fake_php.py composer <command> ...` through the shims that run.py and
+tests/conftest.py put on PATH. Behaviour is configured with environment variables:
+
+    FAKE_LINES         lines written by ordinary commands (default 1000)
+    FAKE_RATE          lines per second, 0 for as fast as possible (default 0)
+    FAKE_LINE_BYTES    length of each line (default 80)
+    FAKE_STDERR_BYTES  size of one stderr burst written halfway through (default 0)
+    FAKE_ROUTES        routes printed by `route:list --json` (default 1000)
+    FAKE_EXIT          exit code of ordinary commands (default 0); with any
+                       other value route:list prints a PHP parse error to
+                       stdout and exits with it
+    FAKE_FAIL          comma-separated artisan commands that print nothing
+                       and exit with 1 (default none)
+
+`artisan serve` prints the Laravel "Server running on [...]" banner, then
+one request log line per 1/FAKE_RATE seconds until it is killed. With
+`--port=N` it instead answers HTTP requests on that port, taking
+FAKE_SERVE_MS milliseconds per request (default 5), and logs each one.
+"""
+
+import http.server
+import json
+import os
+import re
+import sys
+import time
+
+SERVE_URL = 'http://127.0.0.1:8000'
+# Lines are written in groups so high rates are not limited by sleep()
+TICK = 0.01
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def paced(count, rate):
+    """Yield how many lines to write now, sleeping between ticks to hold the rate"""
+    if rate <= 0:
+        for start in range(0, count, 1000):
+            yield min(1000, count - start)
+        return
+    started = time.perf_counter()
+    written = 0
+    while written < count:
+        due = min(count, int((time.perf_counter() - started) * rate) + 1)
+        if due > written:
+            yield due - written
+            written = due
+        time.sleep(TICK)
+
+
+def emit_lines():
+    count = env_int('FAKE_LINES', 1000)
+    width = env_int('FAKE_LINE_BYTES', 80)
+    burst = env_int('FAKE_STDERR_BYTES', 0)
+    written = 0
+    for group in paced(count, env_int('FAKE_RATE', 0)):
+        lines = []
+        for number in range(written, written + group):
+            prefix = f"line {number} "
+            lines.append(prefix + 'x' * max(0, width - len(prefix) - 1) + '\n')
+        sys.stdout.write(''.join(lines))
+        sys.stdout.flush()
+        if burst and written < count // 2 <= written + group:
+            sys.stderr.write(('E' * 79 + '\n') * (burst // 80) + 'E' * (burst % 80))
+            sys.stderr.flush()
+        written += group
+    return env_int('FAKE_EXIT', 0)
+
+
+def route_list():
+    exit_code = env_int('FAKE_EXIT', 0)
+    if exit_code:
+        # What artisan prints, on stdout, for a syntax error in a routes file
+        print("\n   ParseError \n\n  syntax error, unexpected token \"}\"\n\n  at routes/web.php:18")
+        return exit_code
+    count = env_int('FAKE_ROUTES', 1000)
+    methods = ('GET|HEAD', 'POST', 'PUT|PATCH', 'DELETE')
+    out = sys.stdout
+    out.write('[')
+    for number in range(count):
+        resource = f"resource{number // 4}"
+        out.write(json.dumps({
+            'domain': None,
+            'method': methods[number % 4],
+            'uri': f"api/v1/{resource}/{{id}}" if number % 4 else f"api/v1/{resource}",
+            'name': f"{resource}.{('index', 'store', 'update', 'destroy')[number % 4]}",
+            'action': f"App\\Http\\Controllers\\Resource{number // 4}Controller@{('index', 'store', 'update', 'destroy')[number % 4]}",
+            'middleware': ['api'],
+        }))
+        if number < count - 1:
+            out.write(',')
+    out.write(']\n')
+    return 0
+
+
+def serve_http(port):
+    delay = env_int('FAKE_SERVE_MS', 5) / 1000
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            started = time.perf_counter()
+            time.sleep(delay)
+            body = b'ok'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S')
+            ms = (time.perf_counter() - started) * 1000
+            print(f"  {stamp} {self.path} {'.' * 40} ~ {ms:.2f}ms", flush=True)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    print(f"\n   INFO  Server running on [http://127.0.0.1:{port}].\n\n  Press Ctrl+C to stop the server\n",
+          flush=True)
+    server.serve_forever()
+
+
+def serve(args):
+    port = re.search(r'--port[= ](\d+)', ' '.join(args))
+    if port:
+        return serve_http(int(port.group(1)))
+    print(f"\n   INFO  Server running on [{SERVE_URL}].\n\n  Press Ctrl+C to stop the server\n", flush=True)
+    rate = env_int('FAKE_RATE', 10) or 10
+    number = 0
+    while True:
+        time.sleep(1 / rate)
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S')
+        print(f"  {stamp} /api/v1/resource{number % 100} {'.' * 40} ~ 0.{number % 10}ms", flush=True)
+        number += 1
+
+
+def main(argv):
+    program, args = argv[0], argv[1:]
+    if program == 'php':
+        while args[:1] == ['-d']:
+            args = args[2:]
+        if args[:1] != ['artisan']:
+            print(f"fake php: unsupported arguments {args}", file=sys.stderr)
+            return 1
+        command = args[1] if len(args) > 1 else 'list'
+        if command in os.environ.get('FAKE_FAIL', '').split(','):
+            return 1
+        if command == 'route:list':
+            return route_list()
+        if command == 'serve':
+            return serve(args[2:])
+    return emit_lines()
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except (BrokenPipeError, KeyboardInterrupt):
+        sys.exit(1)
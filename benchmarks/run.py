@@ -0,0 +1,341 @@
+"""Throughput and latency benchmarks against a fake `php`/`composer`.
+
+    python benchmarks/run.py                  # run, compare with the baseline
+    python benchmarks/run.py --save-baseline  # run and store a new baseline
+
+fake_php.py is put on PATH as `php` and `composer`, so nothing here needs
+PHP or a Laravel project. Benchmarks that drive Tk widgets (the log view
+and the routes table) are skipped when no display is available; the rest
+use the laravel_toolkit engine directly.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from laravel_toolkit.jobs import JobManager  # noqa: E402
+from laravel_toolkit.routes import RouteCache, RouteIndex, fetch_routes  # noqa: E402
+from laravel_toolkit.parsers import SERVE_URL_PATTERN  # noqa: E402
+from laravel_toolkit.utils import percentile  # noqa: E402
+
+FAKE_PHP = os.path.join(BENCH_DIR, 'fake_php.py')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+# A metric more than this much worse than its baseline counts as a regression
+DEFAULT_TOLERANCE = 0.15
+
+# Typed one character at a time, then deleted again, for the filter benchmark
+FILTER_QUERIES = ('resource1234', 'method:post uri:v1/resource9')
+
+
+def install_fakes(bin_dir):
+    """Write `php` and `composer` shims that run fake_php.py and put them first on PATH"""
+    for program in ('php', 'composer'):
+        path = os.path.join(bin_dir, program)
+        with open(path, 'w') as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_PHP}" {program} "$@"\n')
+        os.chmod(path, 0o755)
+    os.environ['PATH'] = bin_dir + os.pathsep + os.environ.get('PATH', '')
+
+
+def make_project(root):
+    """An empty directory that passes for a Laravel project"""
+    project = os.path.join(root, 'project')
+    os.makedirs(os.path.join(project, 'routes'))
+    for name in ('artisan', 'composer.json', 'composer.lock', os.path.join('routes', 'api.php')):
+        with open(os.path.join(project, name), 'w') as f:
+            f.write('')
+    return project
+
+
+def open_tk():
+    """A Tk root window, or None when there is no display"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None
+    # Widgets are only drawn, and so only cost what they do in the GUI, when mapped
+    root.geometry('800x600')
+    root.update()
+    return root
+
+
+def fake_env(**values):
+    for name in ('FAKE_LINES', 'FAKE_RATE', 'FAKE_LINE_BYTES', 'FAKE_STDERR_BYTES', 'FAKE_ROUTES', 'FAKE_EXIT',
+                 'FAKE_FAIL'):
+        os.environ.pop(name, None)
+    for name, value in values.items():
+        os.environ[f"FAKE_{name.upper()}"] = str(value)
+
+
+def run_job(project, cmd_list, on_output=None):
+    """Run one command through the JobManager and return the finished job"""
+    manager = JobManager(on_output=on_output)
+    job = manager.submit(project, cmd_list)
+    job.wait()
+    return job
+
+
+def bench_engine_output(project, lines):
+    """Lines per second from a subprocess to the on_output callback"""
+    fake_env(lines=lines)
+    counted = [0]
+
+    def on_output(job, stream, text):
+        counted[0] += text.count('\n')
+
+    started = time.perf_counter()
+    run_job(project, ['php', 'artisan', 'bench:output'], on_output)
+    return counted[0] / (time.perf_counter() - started)
+
+
+def bench_stderr_burst(project, burst_bytes):
+    """Wall time of a short command that dumps one large burst on stderr"""
+    fake_env(lines=1000, stderr_bytes=burst_bytes)
+    started = time.perf_counter()
+    job = run_job(project, ['php', 'artisan', 'bench:burst'])
+    elapsed = (time.perf_counter() - started) * 1000
+    if job.output_bytes < burst_bytes:
+        raise RuntimeError(f"stderr burst lost output: {job.output_bytes} of {burst_bytes} bytes")
+    return elapsed
+
+
+def bench_log_view(root, project, lines):
+    """Lines per second from a subprocess into a LogPipeline-driven Text widget"""
+    import tkinter as tk
+    from laravel import LogPipeline
+
+    fake_env(lines=lines)
+    text = tk.Text(root)
+    text.pack(fill='both', expand=True)
+    pipeline = LogPipeline(root, text)
+    pipeline.start()
+    manager = JobManager(on_output=lambda job, stream, output: pipeline.write(output, stream))
+    started = time.perf_counter()
+    job = manager.submit(project, ['php', 'artisan', 'bench:output'])
+    while not job.done.is_set() or pipeline.backlog:
+        root.update()
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    pipeline.stop()
+    text.destroy()
+    return pipeline.total_lines / elapsed
+
+
+def bench_serve_banner(project):
+    """Milliseconds from starting `serve` until its URL has been detected"""
+    fake_env(rate=10)
+    detected = {}
+    manager = JobManager(on_output=lambda job, stream, output: detected.setdefault(
+        'at', time.perf_counter()) if SERVE_URL_PATTERN.search(output) else None)
+    started = time.perf_counter()
+    job = manager.submit(project, ['php', 'artisan', 'serve'])
+    deadline = started + 10
+    while 'at' not in detected and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    manager.stop(job.id)
+    job.wait()
+    if 'at' not in detected:
+        raise RuntimeError("serve banner was never detected")
+    return (detected['at'] - started) * 1000
+
+
+def bench_route_load(project, cache_dir, routes):
+    """Fetch, index and cache-hit timings for a large route:list"""
+    fake_env(routes=routes)
+    started = time.perf_counter()
+    loaded = fetch_routes(project)
+    fetch_ms = (time.perf_counter() - started) * 1000
+    if len(loaded) != routes:
+        raise RuntimeError(f"expected {routes} routes, parsed {len(loaded)}")
+
+    started = time.perf_counter()
+    RouteIndex(loaded)
+    index_ms = (time.perf_counter() - started) * 1000
+
+    # Python heap used while parsing and indexing, measured on a separate
+    # run because tracemalloc slows allocation down
+    del loaded
+    tracemalloc.start()
+    index = RouteIndex(fetch_routes(project))
+    retained_kb = tracemalloc.get_traced_memory()[0] / 1024
+    peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    del index
+
+    cache = RouteCache(cache_dir)
+    cache.get(project, force=True)
+    started = time.perf_counter()
+    entry, hit = cache.get(project)
+    hit_ms = (time.perf_counter() - started) * 1000
+    if not hit:
+        raise RuntimeError("route cache missed on an unchanged project")
+    return {
+        'route_fetch_ms': fetch_ms,
+        'route_index_ms': index_ms,
+        'route_cache_hit_ms': hit_ms,
+        'route_memory_peak_kb': peak_kb,
+        'route_memory_retained_kb': retained_kb,
+    }
+
+
+def bench_filter(project, routes, root=None):
+    """Per-keystroke latency of typing and then deleting each filter query"""
+    fake_env(routes=routes)
+    data = fetch_routes(project)
+    index = RouteIndex(data)
+    table = frame = None
+    if root is not None:
+        import tkinter as tk
+        from laravel import VirtualTable
+        frame = tk.Frame(root)
+        frame.pack(fill='both', expand=True)
+        table = VirtualTable(frame, ('Method', 'URI', 'Name', 'Action'), (100, 200, 150, 300))
+        table.pack()
+        root.update()
+
+    def format_row(i):
+        route = data[i]
+        return (route['method'], route['uri'], route['name'] or '', route['action'])
+
+    latencies = []
+    for query in FILTER_QUERIES:
+        typed = [query[:length] for length in range(1, len(query) + 1)]
+        for text in typed + typed[-2::-1] + ['']:
+            started = time.perf_counter()
+            matches = index.search(text)
+            if table is not None:
+                table.set_rows(list(matches), format_row)
+                root.update_idletasks()
+            else:
+                len(matches)
+            latencies.append((time.perf_counter() - started) * 1000)
+    if frame is not None:
+        frame.destroy()
+    return {
+        'filter_keystroke_p50_ms': percentile(latencies, 50),
+        'filter_keystroke_p95_ms': percentile(latencies, 95),
+        'filter_keystroke_max_ms': max(latencies),
+    }
+
+
+def run_benchmarks(args):
+    """Run every benchmark args.repeat times and return {metric: median value}"""
+    work = tempfile.mkdtemp(prefix='laravel-bench-')
+    try:
+        bin_dir = os.path.join(work, 'bin')
+        os.makedirs(bin_dir)
+        install_fakes(bin_dir)
+        project = make_project(work)
+        root = None if args.no_gui else open_tk()
+
+        samples = {}
+
+        def add(name, value):
+            samples.setdefault(name, []).append(value)
+
+        for attempt in range(args.repeat):
+            print(f"run {attempt + 1}/{args.repeat}", file=sys.stderr)
+            add('engine_lines_per_s', bench_engine_output(project, args.lines))
+            add('stderr_burst_ms', bench_stderr_burst(project, args.stderr_bytes))
+            add('serve_banner_ms', bench_serve_banner(project))
+            for name, value in bench_route_load(project, os.path.join(work, 'route_cache'), args.routes).items():
+                add(name, value)
+            for name, value in bench_filter(project, args.routes, root).items():
+                add(name, value)
+            if root is not None:
+                add('log_view_lines_per_s', bench_log_view(root, project, args.lines))
+
+        if root is None:
+            print("no display: log view benchmark skipped, filter latency excludes table rendering",
+                  file=sys.stderr)
+        else:
+            root.destroy()
+        return {name: statistics.median(values) for name, values in samples.items()}, root is not None
+    finally:
+        fake_env()
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def higher_is_better(metric):
+    return metric.endswith('_per_s')
+
+
+def compare(results, baseline, tolerance):
+    """Print results next to the baseline; return the names of regressed metrics"""
+    regressions = []
+    width = max(len(name) for name in results)
+    print(f"{'metric'.ljust(width)}  {'baseline':>12}  {'current':>12}  change")
+    for name, value in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name.ljust(width)}  {'-':>12}  {value:12.1f}  new")
+            continue
+        change = (value - previous) / previous if previous else 0.0
+        worse = -change if higher_is_better(name) else change
+        flag = '  REGRESSION' if worse > tolerance else ''
+        if flag:
+            regressions.append(name)
+        print(f"{name.ljust(width)}  {previous:12.1f}  {value:12.1f}  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--lines', type=int, default=200000, help='lines written by the output benchmarks')
+    parser.add_argument('--routes', type=int, default=50000, help='routes printed by route:list')
+    parser.add_argument('--stderr-bytes', type=int, default=4 * 1024 * 1024, help='size of the stderr burst')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark; the median is reported')
+    parser.add_argument('--no-gui', action='store_true', help='skip the Tk benchmarks even with a display')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='baseline file to compare with or write')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='fraction a metric may worsen before it is a regression')
+    args = parser.parse_args(argv)
+
+    if os.name == 'nt':
+        print("The fake php/composer shims need a POSIX shell", file=sys.stderr)
+        return 2
+
+    results, gui = run_benchmarks(args)
+    params = {'lines': args.lines, 'routes': args.routes, 'stderr_bytes': args.stderr_bytes, 'gui': gui}
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('params') != params:
+            print(f"warning: baseline was recorded with {baseline.get('params')}, this run used {params}",
+                  file=sys.stderr)
+    regressions = compare(results, baseline['metrics'] if baseline else {}, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'recorded_at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'params': params,
+                'metrics': results,
+            }, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} metrics regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
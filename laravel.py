@@ -1,20 +1,355 @@
+import time
+
+# --profile-startup measures from here, so its report includes module imports
+STARTUP_STARTED = time.perf_counter()
+
 import os
+import sys
 import subprocess
 import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import json
 import datetime
-import re
+import queue
+import atexit
+import shlex
+import shutil
+import sqlite3
+
+from laravel_toolkit import commands
+from laravel_toolkit.commands import build_command, check_project
+from laravel_toolkit.composer import ComposerSkipCache
+from laravel_toolkit.history import HistoryStore
+from laravel_toolkit.jobs import FanOutRun, JobManager
+from laravel_toolkit.logs import LogSink
+from laravel_toolkit.pipelines import PipelineRun, format_steps, load_pipelines, parse_steps, save_pipelines
+from laravel_toolkit.routes import RouteCache, RouteIndex
+from laravel_toolkit.serve import ServeManager
+from laravel_toolkit.telemetry import TELEMETRY_TREND_RUNS
+from laravel_toolkit.utils import format_size, unique_paths
+from laravel_toolkit.warm import WarmWorkerPool
+from laravel_toolkit.watch import (DEFAULT_WATCH_RULES, WATCH_REFRESH_ROUTES, ProjectWatcher, WatchRunner,
+                                   format_rules, load_watch_rules, parse_rules, save_watch_rules)
+from laravel_toolkit.workspace import WorkspaceIndex
+
+# Live log view: how often the UI thread drains queued output and how much
+# of each frame it may spend doing so
+LOG_FLUSH_INTERVAL_MS = 50
+LOG_FRAME_BUDGET_MS = 8
+LOG_STATS_INTERVAL = 1.0
+# Lines kept in each live log view; older lines are trimmed once the view
+# grows LOG_VIEW_TRIM_SLACK past the cap (they remain in the log file)
+LOG_VIEW_MAX_LINES = 5000
+LOG_VIEW_TRIM_SLACK = 500
+
+ROUTE_SEARCH_DEBOUNCE_MS = 150
+
+# Command that opens a file at a line from the error list, e.g. "code -g {file}:{line}";
+# without it VS Code or PhpStorm is used when installed, otherwise the default viewer
+EDITOR_ENV = 'LARAVEL_TOOLKIT_EDITOR'
+
+# Period choices for the history filter, in seconds back from now
+HISTORY_PERIODS = {
+    'any time': None,
+    'last hour': 3600,
+    'today': 'today',
+    'last 7 days': 7 * 86400,
+    'last 30 days': 30 * 86400,
+}
+
+
+class LogPipeline:
+    """Queue command output from worker threads and flush it to a Text widget in batches.
+
+    Worker threads call write() (or post() for arbitrary UI callbacks); the
+    Tk main loop drains the queue every LOG_FLUSH_INTERVAL_MS, spending at
+    most frame_budget_ms per pass so the window stays responsive. The widget
+    is capped at max_lines by deleting the oldest lines, and scrolling to the
+    end is skipped while autoscroll is off.
+    """
+
+    def __init__(self, root, text_widget, interval_ms=LOG_FLUSH_INTERVAL_MS,
+                 frame_budget_ms=LOG_FRAME_BUDGET_MS, on_stats=None,
+                 max_lines=LOG_VIEW_MAX_LINES, autoscroll=True):
+        self.root = root
+        self.text_widget = text_widget
+        self.interval_ms = interval_ms
+        self.frame_budget_ms = frame_budget_ms
+        self.on_stats = on_stats
+        self.max_lines = max_lines
+        self.autoscroll = autoscroll
+        self.queue = queue.SimpleQueue()
+        self.lines_per_second = 0.0
+        self.total_lines = 0
+        self.trimmed_lines = 0
+        self._window_lines = 0
+        self._window_start = time.perf_counter()
+        self._after_id = None
+
+    def write(self, chunk, tag=''):
+        """Queue a chunk of text for display (safe to call from any thread)"""
+        if chunk:
+            self.queue.put((chunk, tag))
+
+    def post(self, callback, *args):
+        """Run callback(*args) on the UI thread, in order with queued output"""
+        self.queue.put((callback, args))
+
+    @property
+    def backlog(self):
+        """Number of chunks waiting to be flushed"""
+        return self.queue.qsize()
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._flush)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _insert(self, parts):
+        if parts:
+            # Merge consecutive chunks with the same tag and hand everything
+            # to Tk in a single insert call
+            args = []
+            lines = 0
+            for chunk, tag in parts:
+                lines += chunk.count('\n')
+                if args and args[-1] == tag:
+                    args[-2] += chunk
+                else:
+                    args.extend((chunk, tag))
+            self.text_widget.insert(tk.END, *args)
+            self._trim()
+            if self.autoscroll:
+                self.text_widget.see(tk.END)
+            self.total_lines += lines
+            self._window_lines += lines
+
+    def _trim(self):
+        """Drop the oldest lines once the view is LOG_VIEW_TRIM_SLACK past max_lines"""
+        if not self.max_lines:
+            return
+        line_count = int(self.text_widget.index('end-1c').split('.')[0])
+        if line_count > self.max_lines + LOG_VIEW_TRIM_SLACK:
+            excess = line_count - self.max_lines
+            self.text_widget.delete('1.0', f'{excess + 1}.0')
+            self.trimmed_lines += excess
+
+    def _flush(self):
+        """Drain the queue until it is empty or the frame budget is spent"""
+        deadline = time.perf_counter() + self.frame_budget_ms / 1000
+        parts = []
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if callable(item[0]):
+                    # Keep ordering: flush pending text before running the callback
+                    self._insert(parts)
+                    parts = []
+                    callback, args = item
+                    callback(*args)
+                else:
+                    parts.append(item)
+            self._insert(parts)
+        finally:
+            self._update_stats()
+            self._after_id = self.root.after(self.interval_ms, self._flush)
+
+    def _update_stats(self):
+        now = time.perf_counter()
+        elapsed = now - self._window_start
+        if elapsed >= LOG_STATS_INTERVAL:
+            self.lines_per_second = self._window_lines / elapsed
+            self._window_lines = 0
+            self._window_start = now
+            if self.on_stats:
+                self.on_stats(self.lines_per_second, self.backlog)
+
+class VirtualTable:
+    """A Treeview that only materializes the rows currently in view.
+
+    The data stays in Python: set_rows() takes a sequence of row keys and a
+    function turning a key into column values. The Treeview holds just
+    enough items to fill its height, and scrolling reassigns their values
+    instead of inserting or deleting items.
+    """
+
+    DEFAULT_ROW_HEIGHT = 20
+
+    def __init__(self, parent, columns, widths, on_heading_click=None):
+        self.columns = columns
+        self.rows = []
+        self.format_row = lambda key: ()
+        self.offset = 0
+        self.items = []
+        self.selected_key = None
+        self._rendering = False
+
+        self.tree = ttk.Treeview(parent, columns=columns, show='headings', selectmode='browse')
+        for column, width in zip(columns, widths):
+            self.tree.heading(column, text=column,
+                              command=(lambda c=column: on_heading_click(c)) if on_heading_click else '')
+            self.tree.column(column, width=width)
+        self.scrollbar = ttk.Scrollbar(parent, orient='vertical', command=self.yview)
+
+        self.tree.bind('<Configure>', lambda event: self.render())
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll(-1 if event.delta > 0 else 1, 'units', 3))
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-1, 'units', 3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(1, 'units', 3))
+        for key, step, what in (('<Up>', -1, 'cursor'), ('<Down>', 1, 'cursor'),
+                                ('<Prior>', -1, 'pages'), ('<Next>', 1, 'pages')):
+            self.tree.bind(key, lambda event, s=step, w=what: self._on_key(s, w))
+        self.tree.bind('<Home>', lambda event: self.yview('moveto', 0) or 'break')
+        self.tree.bind('<End>', lambda event: self.yview('moveto', 1) or 'break')
+
+    def pack(self, **kwargs):
+        self.tree.pack(side='left', fill='both', expand=True, **kwargs)
+        self.scrollbar.pack(side='right', fill='y', pady=kwargs.get('pady', 0))
+
+    def set_rows(self, rows, format_row, keep_position=False):
+        self.rows = rows
+        self.format_row = format_row
+        if not keep_position:
+            self.offset = 0
+        self.render()
+
+    def set_heading(self, column, text):
+        self.tree.heading(column, text=text)
+
+    def _row_height(self):
+        if self.items:
+            bbox = self.tree.bbox(self.items[0])
+            if bbox:
+                return bbox[1], bbox[3]
+        rowheight = ttk.Style(self.tree).lookup('Treeview', 'rowheight')
+        return self.DEFAULT_ROW_HEIGHT, int(rowheight or self.DEFAULT_ROW_HEIGHT)
+
+    def visible_rows(self):
+        header, rowheight = self._row_height()
+        return max(1, (self.tree.winfo_height() - header) // rowheight)
+
+    def _max_offset(self):
+        return max(0, len(self.rows) - self.visible_rows())
+
+    def render(self):
+        """Fill the pooled items with the rows starting at offset"""
+        visible = self.visible_rows()
+        # Grow or shrink the item pool to exactly the visible height
+        while len(self.items) < visible:
+            self.items.append(self.tree.insert('', 'end'))
+        if len(self.items) > visible:
+            self.tree.delete(*self.items[visible:])
+            del self.items[visible:]
+
+        self.offset = max(0, min(self.offset, self._max_offset()))
+        self._rendering = True
+        try:
+            selected = ()
+            for position, item in enumerate(self.items):
+                index = self.offset + position
+                if index < len(self.rows):
+                    key = self.rows[index]
+                    self.tree.item(item, values=self.format_row(key))
+                    if key == self.selected_key:
+                        selected = (item,)
+                else:
+                    self.tree.item(item, values=())
+            self.tree.selection_set(selected)
+        finally:
+            self._rendering = False
+
+        total = len(self.rows)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + visible) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units'|'pages')"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * len(self.rows))
+            self.render()
+        elif args[0] == 'scroll':
+            self.scroll(int(args[1]), args[2])
+
+    def scroll(self, count, what, multiplier=1):
+        step = self.visible_rows() if what == 'pages' else multiplier
+        self.offset += count * step
+        self.render()
+        return 'break'
+
+    def _on_select(self, event=None):
+        if self._rendering:
+            return
+        selection = self.tree.selection()
+        if selection and selection[0] in self.items:
+            index = self.offset + self.items.index(selection[0])
+            if index < len(self.rows):
+                self.selected_key = self.rows[index]
+
+    def _on_key(self, step, what):
+        """Move the selection, scrolling the window when it reaches an edge"""
+        if not self.rows:
+            return 'break'
+        if self.selected_key in self.rows:
+            index = self.rows.index(self.selected_key)
+        else:
+            index = self.offset - step
+        index += step * (self.visible_rows() if what == 'pages' else 1)
+        index = max(0, min(index, len(self.rows) - 1))
+        self.selected_key = self.rows[index]
+        visible = self.visible_rows()
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + visible:
+            self.offset = index - visible + 1
+        self.render()
+        position = index - self.offset
+        if position < len(self.items):
+            self.tree.focus(self.items[position])
+        return 'break'
+
+
+class StartupProfile:
+    """Wall time of each named start-up phase, for --profile-startup"""
+
+    def __init__(self, started=None, verbose=False):
+        self.started = self.last = started if started is not None else time.perf_counter()
+        self.verbose = verbose
+        self.phases = []
+
+    def mark(self, name):
+        """Close the phase that began at the previous mark"""
+        now = time.perf_counter()
+        self.phases.append((name, (now - self.last) * 1000))
+        self.last = now
+
+    def deferred(self, name, started):
+        """Report work that was moved out of start-up when it finally runs"""
+        if self.verbose:
+            print(f"deferred: {name} built in {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+
+    def report(self):
+        width = max([len(name) for name, _ in self.phases] + [5])
+        lines = [f"{name.ljust(width)}  {ms:8.1f} ms" for name, ms in self.phases]
+        lines.append(f"{'total'.ljust(width)}  {(self.last - self.started) * 1000:8.1f} ms")
+        return '\n'.join(lines)
 
-# Define a filename to store project paths and logs
-CONFIG_FILE = 'laravel_projects.json'
-LOG_FILE = 'command_log.txt'
 
 class LaravelGUI:
-    def __init__(self, root):
+    def __init__(self, root, profile=None):
         self.root = root
         self.root.title('Laravel Command Runner')
+        self.profile = profile or StartupProfile()
         
         # Create notebook for tabs
         self.notebook = ttk.Notebook(root)
@@ -24,19 +359,60 @@ class LaravelGUI:
         self.main_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.main_frame, text='Commands')
         
-        # Routes tab
+        # Secondary tabs start empty and are filled in when first shown
         self.routes_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.routes_frame, text='Routes')
+        self.history_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.history_frame, text='History')
+        self.stats_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.stats_frame, text='Stats')
+        self.pipelines_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.pipelines_frame, text='Pipelines')
+        self.tab_builders = {
+            str(self.routes_frame): self.create_routes_tab,
+            str(self.history_frame): self.create_history_tab,
+            str(self.stats_frame): self.create_stats_tab,
+            str(self.pipelines_frame): self.create_pipelines_tab,
+        }
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        self.profile.mark('window and notebook')
         
         self.project_paths = self.load_paths()
-        self.process = None
-        self.server_url = None
+        self.project_problems = {}
+        self.profile.mark('saved projects')
+        self.log_sink = LogSink()
+        atexit.register(self.log_sink.close)
+        self.history = HistoryStore()
+        self.profile.mark('log file and history db')
+        self.warm_pool = WarmWorkerPool()
+        self.root.protocol('WM_DELETE_WINDOW', self.on_close)
+        self.skip_cache = ComposerSkipCache()
+        self.job_manager = JobManager(on_output=self.on_job_output, on_status=self.on_job_status,
+                                      skip_cache=self.skip_cache, on_event=self.on_job_event)
+        self.job_panes = {}
+        self.progress_posted = set()
+        self.serve_manager = ServeManager(self.job_manager, on_job=self.create_job_pane,
+                                          on_update=lambda: self.log_pipeline.post(self.refresh_servers))
+        self.route_cache = RouteCache()
+        self.routes_data = []
+        self.route_index = RouteIndex([])
+        self.route_filter_after_id = None
+        self.routes_sort_column = None
+        self.routes_sort_reverse = False
+        self.routes_project = None
+        self.routes_generation = 0
+        self.workspace_index = None
+        self.workspace_lock = threading.Lock()
+        self.watch_rules = load_watch_rules()
+        self.watcher = None
+        self.watch_runner = WatchRunner(self.job_manager)
+        self.profile.mark('engine state')
         
         # Create main tab elements
         self.create_main_tab()
-        
-        # Create routes tab elements
-        self.create_routes_tab()
+        self.profile.mark('commands tab')
+        self.load_logs()
+        self.profile.mark('log tail')
         
         # Server URL Frame
         self.create_server_url_frame()
@@ -50,24 +426,121 @@ class LaravelGUI:
         style.map('Danger.TButton',
                  background=[('active', '#ff6666')],
                  foreground=[('active', 'white')])
+        self.profile.mark('server frame and styles')
+
+        self.validate_projects(self.project_paths)
 
     def create_server_url_frame(self):
-        """Create a frame to display the server URL when 'serve' command is running"""
-        self.url_frame = ttk.LabelFrame(self.main_frame, text="Server URL")
+        """Create the panel listing the running 'serve' instances"""
+        self.url_frame = ttk.LabelFrame(self.main_frame, text="Servers")
         self.url_frame.pack(fill='x', padx=10, pady=5)
-        
-        self.url_label = ttk.Label(self.url_frame, text="Not running", font=('Arial', 10))
-        self.url_label.pack(pady=5)
-        
-        self.copy_url_button = ttk.Button(self.url_frame, text="Copy URL", command=self.copy_url_to_clipboard)
-        self.copy_url_button.pack(pady=5)
-        self.copy_url_button.config(state='disabled')
+
+        columns = ('URL', 'State', 'Probe p50/p95', 'Requests', 'p50', 'p95', 'p99', 'Slowest')
+        self.servers_tree = ttk.Treeview(self.url_frame, columns=columns, show='tree headings', height=3)
+        self.servers_tree.heading('#0', text='Project')
+        self.servers_tree.column('#0', width=150)
+        for column, width in zip(columns, (150, 60, 100, 70, 60, 60, 60, 150)):
+            self.servers_tree.heading(column, text=column)
+            self.servers_tree.column(column, width=width, anchor='w')
+        self.servers_tree.pack(fill='x', padx=5, pady=2)
+        self.servers_tree.bind('<<TreeviewSelect>>', self.update_server_buttons)
+        self.servers_tree.bind('<Double-1>', self.show_slow_endpoints)
+
+        buttons = ttk.Frame(self.url_frame)
+        buttons.pack(pady=5)
+        self.copy_url_button = ttk.Button(buttons, text="Copy URL", command=self.copy_url_to_clipboard)
+        self.copy_url_button.pack(side='left', padx=5)
+        self.slow_endpoints_button = ttk.Button(buttons, text="Slow Endpoints", command=self.show_slow_endpoints)
+        self.slow_endpoints_button.pack(side='left', padx=5)
+        self.stop_server_button = ttk.Button(buttons, text="Stop Server", command=self.stop_server)
+        self.stop_server_button.pack(side='left', padx=5)
+        self.update_server_buttons()
+
+    def selected_server(self):
+        """The server selected in the panel, or the only one running"""
+        selection = self.servers_tree.selection()
+        if selection:
+            return self.serve_manager.servers.get(int(selection[0]))
+        active = self.serve_manager.active()
+        return active[0] if len(active) == 1 else None
+
+    def update_server_buttons(self, event=None):
+        server = self.selected_server()
+        self.copy_url_button.config(state='normal' if server and server.url else 'disabled')
+        self.slow_endpoints_button.config(state='normal' if server else 'disabled')
+        self.stop_server_button.config(state='normal' if server and server.state != 'stopped' else 'disabled')
+
+    def refresh_servers(self):
+        """Show every server's state and latency percentiles (UI thread only)"""
+        def ms(value):
+            return '-' if value is None else f"{value:.1f}"
+
+        servers = self.serve_manager.servers
+        for iid in self.servers_tree.get_children():
+            if int(iid) not in servers:
+                self.servers_tree.delete(iid)
+        for server in list(servers.values()):
+            row = server.summary()
+            if row['probe_failures'] and row['state'] == 'down':
+                probe = f"failing ({row['probe_failures']})"
+            else:
+                probe = f"{ms(row['probe_p50'])}/{ms(row['probe_p95'])}"
+            values = (row['url'] or f"port {server.port}", row['state'], probe, row['requests'],
+                      ms(row['p50']), ms(row['p95']), ms(row['p99']), row['slowest'] or '')
+            iid = str(server.id)
+            if self.servers_tree.exists(iid):
+                self.servers_tree.item(iid, values=values)
+            else:
+                self.servers_tree.insert('', 'end', iid=iid, text=os.path.basename(os.path.normpath(server.project_path)),
+                                         values=values)
+        self.update_server_buttons()
+
+    def start_server(self, project_path, params=''):
+        try:
+            self.serve_manager.start(project_path, params)
+        except RuntimeError as e:
+            messagebox.showerror("Error", str(e))
+        self.refresh_servers()
+
+    def stop_server(self):
+        server = self.selected_server()
+        if server:
+            self.stop_job(server.id)
+
+    def show_slow_endpoints(self, event=None):
+        """List a server's paths by 95th percentile latency"""
+        server = self.selected_server()
+        if server is None:
+            return
+        window = tk.Toplevel(self.root)
+        window.title(f"Slow Endpoints - {server.url or server.project_path}")
+        columns = ('Requests', 'p50 ms', 'p95 ms', 'Max ms')
+        tree = ttk.Treeview(window, columns=columns, show='tree headings', height=15)
+        tree.heading('#0', text='Path')
+        tree.column('#0', width=300)
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=80, anchor='e')
+        tree.pack(fill='both', expand=True, padx=10, pady=5)
+
+        def refresh():
+            if not tree.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for row in server.slowest_paths(limit=50):
+                tree.insert('', 'end', text=row['path'], values=(
+                    row['count'], f"{row['p50']:.1f}", f"{row['p95']:.1f}", f"{row['max']:.1f}"))
+            if server.state != 'stopped':
+                window.after(2000, refresh)
+
+        refresh()
 
     def copy_url_to_clipboard(self):
         """Copy the server URL to clipboard"""
-        if self.server_url:
+        server = self.selected_server()
+        if server and server.url:
             self.root.clipboard_clear()
-            self.root.clipboard_append(self.server_url)
+            self.root.clipboard_append(server.url)
             messagebox.showinfo("Success", "URL copied to clipboard!")
 
     def create_main_tab(self):
@@ -84,30 +557,12 @@ class LaravelGUI:
         self.save_button = ttk.Button(self.main_frame, text="Save Project Path", command=self.save_project_path)
         self.save_button.pack(pady=5)
 
+        ttk.Button(self.main_frame, text="Scan Workspace...", command=self.scan_workspace).pack(pady=5)
+
         self.command_label = ttk.Label(self.main_frame, text="Choose Laravel or Composer Command:")
         self.command_label.pack(pady=10)
 
-        self.commands = [
-        "serve",
-        "migrate",
-        "migrate:rollback",
-        "make:controller",
-        "make:model",
-        "make:migration",
-        "make:seeder",
-        "make:request",
-        "make:middleware",
-        "make:event",
-        "route:list",
-        "cache:clear",
-        "config:clear",
-        "view:clear",
-        "optimize",
-        "composer install",
-        "composer update",
-        "composer require",
-        "composer dump-autoload"
-    ]
+        self.commands = list(commands.COMMANDS)
 
         self.command_var = tk.StringVar()
         self.command_menu = ttk.Combobox(self.main_frame, textvariable=self.command_var, values=self.commands, width=47)
@@ -125,11 +580,43 @@ class LaravelGUI:
         self.stop_button = ttk.Button(self.main_frame, text="Stop Command", command=self.stop_command, state=tk.DISABLED)
         self.stop_button.pack(pady=5)
 
+        limit_frame = ttk.Frame(self.main_frame)
+        limit_frame.pack(pady=5)
+        ttk.Label(limit_frame, text="Max parallel commands:").pack(side='left', padx=5)
+        self.job_limit_var = tk.IntVar(value=self.job_manager.max_concurrent)
+        ttk.Spinbox(limit_frame, from_=1, to=32, width=4, textvariable=self.job_limit_var,
+                    command=self.update_job_limit).pack(side='left')
+
+        warm_frame = ttk.Frame(self.main_frame)
+        warm_frame.pack(pady=5)
+        self.warm_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(warm_frame, text="Warm PHP worker (make:*, route:list)", variable=self.warm_var,
+                        command=self.toggle_warm_worker).pack(side='left', padx=5)
+        self.warm_stats_label = ttk.Label(warm_frame, text="", foreground='gray')
+        self.warm_stats_label.pack(side='left', padx=5)
+
+        skip_frame = ttk.Frame(self.main_frame)
+        skip_frame.pack(pady=5)
+        self.skip_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(skip_frame, text="Skip composer install/dump-autoload when vendor/ is up to date",
+                        variable=self.skip_var, command=self.toggle_skip_cache).pack(side='left', padx=5)
+
+        watch_frame = ttk.Frame(self.main_frame)
+        watch_frame.pack(pady=5)
+        self.watch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(watch_frame, text="Watch project files", variable=self.watch_var,
+                        command=self.toggle_watcher).pack(side='left', padx=5)
+        ttk.Button(watch_frame, text="Watch Rules...", command=self.edit_watch_rules).pack(side='left', padx=5)
+        self.watch_status_label = ttk.Label(watch_frame, text="", foreground='gray')
+        self.watch_status_label.pack(side='left', padx=5)
+
         self.saved_paths_label = ttk.Label(self.main_frame, text="Saved Projects:")
         self.saved_paths_label.pack(pady=10)
 
-        self.paths_listbox = tk.Listbox(self.main_frame, height=6, width=50)
+        self.paths_listbox = tk.Listbox(self.main_frame, height=6, width=50, selectmode=tk.EXTENDED, exportselection=False)
         self.paths_listbox.pack(padx=10, pady=5)
+        self.paths_status_label = ttk.Label(self.main_frame, text="", foreground='gray')
+        self.paths_status_label.pack()
         self.update_paths_listbox()
 
         self.paths_listbox.bind('<<ListboxSelect>>', self.on_path_selected)
@@ -137,12 +624,22 @@ class LaravelGUI:
         self.delete_button = ttk.Button(self.main_frame, text="Delete Selected Path", command=self.delete_selected_path)
         self.delete_button.pack(pady=5)
 
+        fanout_frame = ttk.Frame(self.main_frame)
+        fanout_frame.pack(pady=5)
+        ttk.Button(fanout_frame, text="Run on Selected Projects", command=self.run_on_selected_projects).pack(side='left', padx=5)
+        ttk.Button(fanout_frame, text="Run on All Projects", command=self.run_on_all_projects).pack(side='left', padx=5)
+
         self.log_label = ttk.Label(self.main_frame, text="Command Logs:")
         self.log_label.pack(pady=10)
 
+    # Output notebook: the command log plus one tab per job
+        self.output_notebook = ttk.Notebook(self.main_frame)
+        self.output_notebook.pack(fill='both', expand=True, padx=10)
+        self.output_notebook.bind('<<NotebookTabChanged>>', self.update_stop_button)
+
     # Create frame for log area and clear button
-        log_frame = ttk.Frame(self.main_frame)
-        log_frame.pack(fill='both', expand=True, padx=10)
+        log_frame = ttk.Frame(self.output_notebook)
+        self.output_notebook.add(log_frame, text='Log')
 
     # Add Text widget for logs with scrollbar
         log_scroll = ttk.Scrollbar(log_frame)
@@ -151,12 +648,56 @@ class LaravelGUI:
         self.log_text = tk.Text(log_frame, height=10, width=50, yscrollcommand=log_scroll.set)
         self.log_text.pack(side='left', fill='both', expand=True)
         log_scroll.config(command=self.log_text.yview)
+        self.log_text.tag_configure('stderr', foreground='#c0392b')
+
+        self.log_stats_label = ttk.Label(self.main_frame, text="0 lines/s | backlog 0", font=('Arial', 8))
+        self.log_stats_label.pack(anchor='e', padx=10)
+
+        self.log_pipeline = LogPipeline(self.root, self.log_text, on_stats=self.update_log_stats)
+        self.log_pipeline.start()
 
     # Add "Clear Logs" button below the log section
-        self.clear_logs_button = ttk.Button(self.main_frame, text="Clear Logs", command=self.clear_logs)
-        self.clear_logs_button.pack(pady=5)
+        log_buttons = ttk.Frame(self.main_frame)
+        log_buttons.pack(pady=5)
+        self.clear_logs_button = ttk.Button(log_buttons, text="Clear Logs", command=self.clear_logs)
+        self.clear_logs_button.pack(side='left', padx=5)
+        ttk.Button(log_buttons, text="Open Log File", command=self.open_log_file).pack(side='left', padx=5)
+        self.autoscroll_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(log_buttons, text="Autoscroll", variable=self.autoscroll_var,
+                        command=self.toggle_autoscroll).pack(side='left', padx=5)
+
+    def log_pipelines(self):
+        return [self.log_pipeline] + [pane['pipeline'] for pane in self.job_panes.values()]
+
+    def toggle_autoscroll(self):
+        """Pause or resume scrolling every log view to its newest output"""
+        autoscroll = self.autoscroll_var.get()
+        for pipeline in self.log_pipelines():
+            pipeline.autoscroll = autoscroll
+            if autoscroll:
+                pipeline.text_widget.see(tk.END)
+
+    def open_log_file(self):
+        """Open the full command log (including lines trimmed from the views) in the default viewer"""
+        self.log_sink.flush()
+        path = os.path.abspath(self.log_sink.path)
+        if not os.path.exists(path):
+            messagebox.showinfo("Info", "The log file is empty.")
+            return
+        try:
+            if os.name == 'nt':
+                os.startfile(path)
+            elif sys.platform == 'darwin':
+                subprocess.Popen(['open', path])
+            else:
+                subprocess.Popen(['xdg-open', path])
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open log file: {e}")
+
+    def update_log_stats(self, lines_per_second, backlog):
+        """Show log pipeline throughput and backlog depth"""
+        self.log_stats_label.config(text=f"{lines_per_second:.0f} lines/s | backlog {backlog}")
 
-       
     def clear_logs(self):
         """Clear the log file and text box."""
         try:
@@ -167,10 +708,6 @@ class LaravelGUI:
             )
             
             if result:
-                # Clear log file
-                with open(LOG_FILE, 'w', encoding='utf-8') as log_file:
-                    log_file.write('')
-                
                 # Clear log display
                 self.log_text.delete(1.0, tk.END)
                 
@@ -178,15 +715,417 @@ class LaravelGUI:
                 clear_message = f"[{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Logs cleared.\n"
                 self.log_text.insert(tk.END, clear_message)
                 
-                # Also write this message to log file
-                with open(LOG_FILE, 'w', encoding='utf-8') as log_file:
-                    log_file.write(clear_message)
+                # Replace the log file contents with this message
+                self.log_sink.clear(clear_message)
                 
                 messagebox.showinfo("Success", "Logs cleared successfully.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to clear logs: {e}")
         
 
+    def create_history_tab(self):
+        """Create elements for the run history tab"""
+        filters = ttk.Frame(self.history_frame)
+        filters.pack(fill='x', padx=10, pady=5)
+
+        ttk.Label(filters, text="Project:").grid(row=0, column=0, sticky='w', padx=5)
+        self.history_project_var = tk.StringVar()
+        self.history_project_menu = ttk.Combobox(filters, textvariable=self.history_project_var, width=40,
+                                                 postcommand=self.update_history_projects)
+        self.history_project_menu.grid(row=0, column=1, columnspan=3, sticky='we', padx=5)
+
+        ttk.Label(filters, text="Command:").grid(row=1, column=0, sticky='w', padx=5)
+        self.history_command_var = tk.StringVar()
+        ttk.Combobox(filters, textvariable=self.history_command_var, values=[''] + self.commands,
+                     width=20).grid(row=1, column=1, sticky='w', padx=5)
+
+        ttk.Label(filters, text="Status:").grid(row=1, column=2, sticky='w', padx=5)
+        self.history_status_var = tk.StringVar(value='any')
+        ttk.Combobox(filters, textvariable=self.history_status_var, values=['any', 'failed', 'succeeded'],
+                     state='readonly', width=10).grid(row=1, column=3, sticky='w', padx=5)
+
+        ttk.Label(filters, text="Period:").grid(row=2, column=0, sticky='w', padx=5)
+        self.history_period_var = tk.StringVar(value='any time')
+        ttk.Combobox(filters, textvariable=self.history_period_var, values=list(HISTORY_PERIODS),
+                     state='readonly', width=20).grid(row=2, column=1, sticky='w', padx=5)
+
+        ttk.Label(filters, text="Output contains:").grid(row=2, column=2, sticky='w', padx=5)
+        self.history_text_var = tk.StringVar()
+        text_entry = ttk.Entry(filters, textvariable=self.history_text_var, width=20)
+        text_entry.grid(row=2, column=3, sticky='w', padx=5)
+        text_entry.bind('<Return>', lambda event: self.search_history())
+
+        ttk.Button(filters, text="Search", command=self.search_history).grid(row=0, column=4, rowspan=3, padx=10)
+
+        self.history_summary_label = ttk.Label(self.history_frame, text="", foreground='gray')
+        self.history_summary_label.pack(anchor='w', padx=10)
+
+        panes = ttk.PanedWindow(self.history_frame, orient='vertical')
+        panes.pack(fill='both', expand=True, padx=10, pady=5)
+
+        columns = ('Started', 'Project', 'Command', 'Params', 'Exit', 'Duration')
+        tree_frame = ttk.Frame(panes)
+        self.history_tree = ttk.Treeview(tree_frame, columns=columns, show='headings', selectmode='browse')
+        for column, width in zip(columns, (140, 200, 130, 120, 50, 70)):
+            self.history_tree.heading(column, text=column)
+            self.history_tree.column(column, width=width)
+        history_scroll = ttk.Scrollbar(tree_frame, orient='vertical', command=self.history_tree.yview)
+        self.history_tree.configure(yscrollcommand=history_scroll.set)
+        self.history_tree.pack(side='left', fill='both', expand=True)
+        history_scroll.pack(side='right', fill='y')
+        self.history_tree.tag_configure('failed', foreground='#c0392b')
+        self.history_tree.bind('<<TreeviewSelect>>', self.show_history_output)
+        panes.add(tree_frame, weight=1)
+
+        output_frame = ttk.Frame(panes)
+        output_scroll = ttk.Scrollbar(output_frame)
+        output_scroll.pack(side='right', fill='y')
+        self.history_output = tk.Text(output_frame, height=10, yscrollcommand=output_scroll.set)
+        self.history_output.pack(side='left', fill='both', expand=True)
+        output_scroll.config(command=self.history_output.yview)
+        panes.add(output_frame, weight=1)
+
+    def update_history_projects(self):
+        self.history_project_menu.config(values=[''] + self.project_paths)
+
+    def record_history(self, job):
+        try:
+            self.history.record(job)
+        except sqlite3.Error as e:
+            self.log_command(f"Error: failed to record history: {e}")
+
+    def search_history(self):
+        """Run the history query described by the filter fields"""
+        period = HISTORY_PERIODS.get(self.history_period_var.get())
+        if period == 'today':
+            since = datetime.datetime.combine(datetime.date.today(), datetime.time()).timestamp()
+        else:
+            since = time.time() - period if period else None
+        status = self.history_status_var.get()
+        started = time.perf_counter()
+        try:
+            runs = self.history.search(
+                project=self.history_project_var.get() or None,
+                command=self.history_command_var.get() or None,
+                status=None if status == 'any' else status,
+                since=since,
+                text=self.history_text_var.get() or None,
+            )
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"History search failed: {e}")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+
+        self.history_tree.delete(*self.history_tree.get_children())
+        for run in runs:
+            started_at = datetime.datetime.fromtimestamp(run['started_at']).strftime('%Y-%m-%d %H:%M:%S')
+            duration = f"{run['finished_at'] - run['started_at']:.1f}s" if run['finished_at'] else ''
+            failed = run['exit_code'] != 0
+            self.history_tree.insert('', 'end', iid=str(run['id']), values=(
+                started_at, run['project'], run['command'], run['params'],
+                run['error'] or run['exit_code'], duration,
+            ), tags=('failed',) if failed else ())
+        self.history_summary_label.config(text=f"{len(runs)} runs ({elapsed:.1f} ms)")
+        self.history_output.delete(1.0, tk.END)
+
+    def show_history_output(self, event=None):
+        selection = self.history_tree.selection()
+        if selection:
+            self.history_output.delete(1.0, tk.END)
+            self.history_output.insert(tk.END, self.history.output(int(selection[0])))
+
+    def create_stats_tab(self):
+        """Create elements for the per-command performance stats tab"""
+        buttons = ttk.Frame(self.stats_frame)
+        buttons.pack(fill='x', padx=10, pady=5)
+        ttk.Button(buttons, text="Refresh", command=self.refresh_stats).pack(side='left', padx=5)
+        ttk.Button(buttons, text="Export CSV/JSON...", command=self.export_stats).pack(side='left', padx=5)
+        ttk.Label(buttons, text=f"Trend: median wall time of the last {TELEMETRY_TREND_RUNS} runs vs. earlier runs",
+                  foreground='gray').pack(side='left', padx=10)
+
+        columns = ('Project', 'Command', 'Runs', 'Wall p50', 'Wall p90', 'Wall p99',
+                   'TTFB p50', 'Spawn p50', 'CPU p50', 'Peak RSS p50', 'Trend')
+        widths = (180, 120, 45, 70, 70, 70, 70, 70, 70, 90, 60)
+        tree_frame = ttk.Frame(self.stats_frame)
+        tree_frame.pack(fill='both', expand=True, padx=10, pady=5)
+        self.stats_tree = ttk.Treeview(tree_frame, columns=columns, show='headings')
+        for column, width in zip(columns, widths):
+            self.stats_tree.heading(column, text=column)
+            self.stats_tree.column(column, width=width, anchor='w')
+        stats_scroll = ttk.Scrollbar(tree_frame, orient='vertical', command=self.stats_tree.yview)
+        self.stats_tree.configure(yscrollcommand=stats_scroll.set)
+        self.stats_tree.pack(side='left', fill='both', expand=True)
+        stats_scroll.pack(side='right', fill='y')
+        self.stats_tree.tag_configure('slower', foreground='#c0392b')
+
+    def refresh_stats(self):
+        """Recompute telemetry percentiles from the history store"""
+        def ms(value):
+            return '' if value is None else f"{value:.0f} ms" if value < 10000 else f"{value / 1000:.1f} s"
+
+        try:
+            stats = self.history.stats()
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to load stats: {e}")
+            return
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for entry in stats:
+            trend = entry['trend_pct']
+            rss = entry['peak_rss_kb_p50']
+            self.stats_tree.insert('', 'end', values=(
+                entry['project'], entry['command'], entry['runs'],
+                ms(entry['wall_ms_p50']), ms(entry['wall_ms_p90']), ms(entry['wall_ms_p99']),
+                ms(entry['ttfb_ms_p50']), ms(entry['spawn_ms_p50']), ms(entry['cpu_ms_p50']),
+                format_size(rss * 1024) if rss else '',
+                '' if trend is None else f"{trend:+.0f}%",
+            ), tags=('slower',) if trend is not None and trend > 10 else ())
+
+    def export_stats(self):
+        """Export raw per-run telemetry for automated regression checks"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        if file_path:
+            try:
+                count = self.history.export_telemetry(file_path)
+                messagebox.showinfo("Success", f"Exported {count} runs.")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to export stats: {e}")
+
+    def create_pipelines_tab(self):
+        """Create elements for editing and running command pipelines"""
+        try:
+            self.pipelines = load_pipelines()
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to load pipelines: {e}")
+            self.pipelines = {}
+
+        list_frame = ttk.Frame(self.pipelines_frame)
+        list_frame.pack(side='left', fill='y', padx=10, pady=5)
+        ttk.Label(list_frame, text="Pipelines:").pack(anchor='w')
+        self.pipelines_listbox = tk.Listbox(list_frame, width=25, exportselection=False)
+        self.pipelines_listbox.pack(fill='y', expand=True, pady=5)
+        self.pipelines_listbox.bind('<<ListboxSelect>>', self.on_pipeline_selected)
+        ttk.Button(list_frame, text="New", command=self.new_pipeline).pack(fill='x', pady=2)
+        ttk.Button(list_frame, text="Delete", command=self.delete_pipeline).pack(fill='x', pady=2)
+
+        editor = ttk.Frame(self.pipelines_frame)
+        editor.pack(side='left', fill='both', expand=True, padx=10, pady=5)
+        name_frame = ttk.Frame(editor)
+        name_frame.pack(fill='x')
+        ttk.Label(name_frame, text="Name:").pack(side='left', padx=5)
+        self.pipeline_name_var = tk.StringVar()
+        ttk.Entry(name_frame, textvariable=self.pipeline_name_var, width=30).pack(side='left', padx=5)
+        ttk.Button(name_frame, text="Save Pipeline", command=self.save_pipeline).pack(side='left', padx=5)
+
+        ttk.Label(editor, text="Steps, one per line: [name =] command [params] [after step, step...]\n"
+                               "Steps without 'after' run in parallel; a failed step skips only the steps after it.",
+                  foreground='gray').pack(anchor='w', pady=5)
+        self.pipeline_steps_text = tk.Text(editor, height=12, width=60)
+        self.pipeline_steps_text.pack(fill='both', expand=True)
+
+        run_frame = ttk.Frame(editor)
+        run_frame.pack(pady=5)
+        ttk.Button(run_frame, text="Run on Current Project",
+                   command=lambda: self.run_pipeline([self.path_entry.get()])).pack(side='left', padx=5)
+        ttk.Button(run_frame, text="Run on Selected Projects",
+                   command=lambda: self.run_pipeline(
+                       [self.paths_listbox.get(index) for index in self.paths_listbox.curselection()])
+                   ).pack(side='left', padx=5)
+        ttk.Button(run_frame, text="Run on All Projects",
+                   command=lambda: self.run_pipeline(list(self.project_paths))).pack(side='left', padx=5)
+
+        self.update_pipelines_listbox()
+        if self.pipelines:
+            self.pipelines_listbox.selection_set(0)
+            self.on_pipeline_selected()
+
+    def update_pipelines_listbox(self):
+        self.pipelines_listbox.delete(0, tk.END)
+        for name in self.pipelines:
+            self.pipelines_listbox.insert(tk.END, name)
+
+    def on_pipeline_selected(self, event=None):
+        selection = self.pipelines_listbox.curselection()
+        if selection:
+            name = self.pipelines_listbox.get(selection[0])
+            self.pipeline_name_var.set(name)
+            self.pipeline_steps_text.delete(1.0, tk.END)
+            self.pipeline_steps_text.insert(tk.END, format_steps(self.pipelines[name]))
+
+    def new_pipeline(self):
+        self.pipelines_listbox.selection_clear(0, tk.END)
+        self.pipeline_name_var.set('')
+        self.pipeline_steps_text.delete(1.0, tk.END)
+
+    def editor_steps(self):
+        """Steps in the editor, or None after reporting why they are invalid"""
+        try:
+            steps = parse_steps(self.pipeline_steps_text.get(1.0, tk.END))
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid pipeline: {e}")
+            return None
+        if not steps:
+            messagebox.showerror("Error", "The pipeline has no steps.")
+            return None
+        return steps
+
+    def save_pipeline(self):
+        name = self.pipeline_name_var.get().strip()
+        if not name:
+            messagebox.showerror("Error", "Enter a pipeline name.")
+            return
+        steps = self.editor_steps()
+        if steps is None:
+            return
+        self.pipelines[name] = steps
+        try:
+            save_pipelines(self.pipelines)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save pipelines: {e}")
+            return
+        self.update_pipelines_listbox()
+        self.pipelines_listbox.selection_set(list(self.pipelines).index(name))
+
+    def delete_pipeline(self):
+        selection = self.pipelines_listbox.curselection()
+        if selection and messagebox.askyesno("Confirm", "Delete this pipeline?"):
+            del self.pipelines[self.pipelines_listbox.get(selection[0])]
+            try:
+                save_pipelines(self.pipelines)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save pipelines: {e}")
+            self.update_pipelines_listbox()
+            self.new_pipeline()
+
+    def run_pipeline(self, projects):
+        """Run the pipeline in the editor on projects, with per-step status and output"""
+        steps = self.editor_steps()
+        if steps is None:
+            return
+        projects = unique_paths(project for project in projects if project)
+        invalid = [project for project in projects if not os.path.isdir(project)]
+        if not projects or invalid:
+            messagebox.showerror("Error", f"Invalid project path: {invalid[0]}" if invalid else "No projects selected.")
+            return
+        name = self.pipeline_name_var.get().strip() or 'Pipeline'
+
+        window = tk.Toplevel(self.root)
+        window.title(f"{name} on {len(projects)} projects")
+        window.geometry('900x600')
+
+        bottom = ttk.Frame(window)
+        bottom.pack(side='bottom', fill='x', pady=5)
+        summary_label = ttk.Label(bottom, text=f"Running {len(steps)} steps on {len(projects)} projects...")
+        summary_label.pack(side='left', padx=10)
+        stop_button = ttk.Button(bottom, text="Stop")
+        stop_button.pack(side='right', padx=10)
+
+        panes = ttk.PanedWindow(window, orient='vertical')
+        panes.pack(fill='both', expand=True, padx=10, pady=5)
+        columns = ('State', 'Exit', 'Duration', 'Output')
+        tree_frame = ttk.Frame(panes)
+        tree = ttk.Treeview(tree_frame, columns=columns, show='tree headings', selectmode='browse')
+        tree.heading('#0', text='Project / step')
+        tree.column('#0', width=400)
+        for column, width in zip(columns, (90, 50, 80, 80)):
+            tree.heading(column, text=column)
+            tree.column(column, width=width, anchor='w')
+        scroll = ttk.Scrollbar(tree_frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scroll.set)
+        tree.pack(side='left', fill='both', expand=True)
+        scroll.pack(side='right', fill='y')
+        tree.tag_configure('failed', foreground='#c0392b')
+        tree.tag_configure('skipped', foreground='gray')
+        panes.add(tree_frame, weight=2)
+
+        output_frame = ttk.Frame(panes)
+        output_scroll = ttk.Scrollbar(output_frame)
+        output_scroll.pack(side='right', fill='y')
+        output_text = tk.Text(output_frame, height=10, yscrollcommand=output_scroll.set)
+        output_text.pack(side='left', fill='both', expand=True)
+        output_scroll.config(command=output_text.yview)
+        panes.add(output_frame, weight=1)
+
+        # Tree item ids are "<project index>" and "<project index>:<step index>"
+        step_index = {step['name']: index for index, step in enumerate(steps)}
+        for p, project in enumerate(projects):
+            tree.insert('', 'end', iid=str(p), text=project, open=True, values=('pending', '', '', ''))
+            for s, step in enumerate(steps):
+                label = step['name'] + (f"  (after {', '.join(step['needs'])})" if step.get('needs') else '')
+                tree.insert(str(p), 'end', iid=f"{p}:{s}", text=label, values=('pending', '', '', ''))
+
+        dirty = set()
+
+        def refresh_rows():
+            if not tree.winfo_exists():
+                dirty.clear()
+                return
+            projects_touched = set()
+            while dirty:
+                project, step_name = dirty.pop()
+                p = projects.index(project)
+                projects_touched.add(p)
+                job = run.jobs.get((project, step_name))
+                state = run.state(project, step_name)
+                duration = f"{job.duration:.1f}s" if job and job.duration is not None else ''
+                exit_code = '' if not job or job.returncode is None else job.returncode
+                tree.item(f"{p}:{step_index[step_name]}", values=(
+                    state, job.error or exit_code if job else '', duration,
+                    format_size(job.output_bytes) if job else '',
+                ), tags=(state,) if state in ('failed', 'skipped') else ())
+            for p in projects_touched:
+                states = [run.state(projects[p], step['name']) for step in steps]
+                overall = ('failed' if 'failed' in states else 'running' if 'running' in states
+                           else 'pending' if any(state in ('pending', 'queued') for state in states)
+                           else 'succeeded' if all(state == 'succeeded' for state in states) else 'stopped')
+                tree.item(str(p), values=(overall, '', '', ''), tags=('failed',) if overall == 'failed' else ())
+            show_output()
+
+        def show_output(event=None):
+            selection = tree.selection()
+            if not selection or ':' not in selection[0]:
+                return
+            p, s = map(int, selection[0].split(':'))
+            job = run.jobs.get((projects[p], steps[s]['name']))
+            output = ''.join(job.output) if job else ''
+            if output_text.get(1.0, 'end-1c') != output:
+                output_text.delete(1.0, tk.END)
+                output_text.insert(tk.END, output)
+                output_text.see(tk.END)
+
+        tree.bind('<<TreeviewSelect>>', show_output)
+
+        def on_update(project, step_name):
+            if (project, step_name) not in dirty:
+                dirty.add((project, step_name))
+                self.log_pipeline.post(refresh_rows)
+
+        def on_done(run):
+            for job in run.jobs.values():
+                if job.status == 'exited':
+                    self.record_history(job)
+            self.log_pipeline.post(show_summary)
+
+        def show_summary():
+            rows = run.summary()
+            succeeded = sum(1 for row in rows if row['state'] == 'succeeded')
+            skipped = sum(1 for row in rows if row['state'] == 'skipped')
+            text = (f"{succeeded} of {len(rows)} steps succeeded, {skipped} skipped, "
+                    f"in {run.wall_time:.1f}s")
+            self.log_command(f"Pipeline finished: {name}: {text}")
+            if window.winfo_exists():
+                summary_label.config(text=text)
+                stop_button.config(state=tk.DISABLED)
+
+        self.log_command(f"Pipeline started: {name} on {len(projects)} projects")
+        run = PipelineRun(steps, projects, on_update=on_update, on_done=on_done,
+                          skip_cache=self.job_manager.skip_cache)
+        stop_button.config(command=run.stop)
+        window.protocol('WM_DELETE_WINDOW', lambda: (run.stop(), window.destroy()))
+        run.start()
+
     def create_routes_tab(self):
         """Create elements for the routes tab"""
         # Search frame
@@ -195,135 +1134,164 @@ class LaravelGUI:
         
         ttk.Label(search_frame, text="Search Routes:").pack(side='left', padx=5)
         self.route_search_var = tk.StringVar()
-        self.route_search_var.trace('w', self.filter_routes)
+        self.route_search_var.trace('w', self.schedule_route_filter)
         self.route_search_entry = ttk.Entry(search_frame, textvariable=self.route_search_var, width=40)
         self.route_search_entry.pack(side='left', padx=5)
         
         ttk.Button(search_frame, text="Refresh Routes", command=self.refresh_routes).pack(side='left', padx=5)
+        ttk.Button(search_frame, text="Force Refresh", command=lambda: self.refresh_routes(force=True)).pack(side='left', padx=5)
+
+        self.route_cache_label = ttk.Label(search_frame, text="", foreground='gray')
+        self.route_cache_label.pack(side='left', padx=5)
         
-        # Create Treeview for routes
-        self.routes_tree = ttk.Treeview(self.routes_frame, columns=('Method', 'URI', 'Name', 'Action'), show='headings')
-        
-        # Configure columns
-        self.routes_tree.heading('Method', text='Method')
-        self.routes_tree.heading('URI', text='URI')
-        self.routes_tree.heading('Name', text='Name')
-        self.routes_tree.heading('Action', text='Action')
-        
-        self.routes_tree.column('Method', width=100)
-        self.routes_tree.column('URI', width=200)
-        self.routes_tree.column('Name', width=150)
-        self.routes_tree.column('Action', width=300)
-        
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(self.routes_frame, orient='vertical', command=self.routes_tree.yview)
-        self.routes_tree.configure(yscrollcommand=scrollbar.set)
-        
-        # Pack elements
-        self.routes_tree.pack(side='left', fill='both', expand=True, padx=10, pady=5)
-        scrollbar.pack(side='right', fill='y', pady=5)
+        # Virtual table for routes: only the visible rows exist as Treeview items
+        self.routes_table = VirtualTable(
+            self.routes_frame,
+            ('Method', 'URI', 'Name', 'Action'),
+            (100, 200, 150, 300),
+            on_heading_click=self.sort_routes,
+        )
+        self.routes_table.pack(padx=10, pady=5)
+
+    def schedule_route_filter(self, *args):
+        """Debounce keystrokes so a burst of typing filters only once"""
+        if self.route_filter_after_id is not None:
+            self.root.after_cancel(self.route_filter_after_id)
+        self.route_filter_after_id = self.root.after(ROUTE_SEARCH_DEBOUNCE_MS, self.filter_routes)
 
     def filter_routes(self, *args):
         """Filter routes based on search text"""
-        search_text = self.route_search_var.get().lower()
-        
-        # Clear current items
-        for item in self.routes_tree.get_children():
-            self.routes_tree.delete(item)
-        
-        # Add filtered items
-        for route in self.routes_data:
-            if (search_text in route['uri'].lower() or 
-                search_text in route['method'].lower() or 
-                search_text in (route['name'] or '').lower() or 
-                search_text in route['action'].lower()):
-                self.routes_tree.insert('', 'end', values=(
-                    route['method'],
-                    route['uri'],
-                    route['name'] or '',
-                    route['action']
-                ))
+        self.route_filter_after_id = None
+        self.render_routes(self.route_index.search(self.route_search_var.get()))
 
-    def refresh_routes(self):
-        """Refresh the routes list"""
-        project_path = self.path_entry.get()
+    def render_routes(self, indexes, keep_position=False):
+        """Show the routes at the given indexes of routes_data, in the current sort order"""
+        if self.routes_sort_column:
+            field = self.routes_sort_column.lower()
+            indexes = sorted(indexes, key=self.route_index.fields[field].__getitem__,
+                             reverse=self.routes_sort_reverse)
+        elif not isinstance(indexes, list):
+            indexes = list(indexes)
+        self.routes_table.set_rows(indexes, self.format_route_row, keep_position=keep_position)
+
+    def format_route_row(self, index):
+        route = self.routes_data[index]
+        return (route['method'], route['uri'], route['name'] or '', route['action'])
+
+    def sort_routes(self, column):
+        """Sort by a column; clicking the same heading again reverses the order"""
+        if self.routes_sort_column == column:
+            self.routes_sort_reverse = not self.routes_sort_reverse
+        else:
+            if self.routes_sort_column:
+                self.routes_table.set_heading(self.routes_sort_column, self.routes_sort_column)
+            self.routes_sort_column = column
+            self.routes_sort_reverse = False
+        self.routes_table.set_heading(column, f"{column} {'▼' if self.routes_sort_reverse else '▲'}")
+        self.render_routes(self.routes_table.rows)
+
+    def build_tab(self, frame):
+        """Create a secondary tab's widgets the first time it is needed"""
+        builder = self.tab_builders.pop(str(frame), None)
+        if builder:
+            started = time.perf_counter()
+            builder()
+            self.profile.deferred(f"{self.notebook.tab(frame, 'text')} tab", started)
+
+    def on_tab_changed(self, event=None):
+        """Build tabs on first view; show cached routes as soon as the Routes tab is opened"""
+        self.build_tab(self.notebook.select())
+        if self.notebook.select() == str(self.stats_frame):
+            self.refresh_stats()
+        elif self.notebook.select() == str(self.routes_frame):
+            project_path = self.path_entry.get()
+            if os.path.isdir(project_path) and project_path != self.routes_project:
+                self.refresh_routes()
+
+    def refresh_routes(self, force=False, project_path=None):
+        """Refresh the routes list, serving the on-disk cache first"""
+        self.build_tab(self.routes_frame)
+        project_path = project_path or self.path_entry.get()
         if not os.path.isdir(project_path):
             messagebox.showerror("Error", "Please select a valid Laravel project path first.")
             return
-            
-        try:
-            # اجرای دستور با پارامترهای اضافی برای جلوگیری از نوشتن در فایل لاگ
-            process = subprocess.Popen(
-                ['php', '-d', 'xdebug.mode=off', 'artisan', 'route:list', '--json', '--no-ansi'],
-                cwd=project_path,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            output, error = process.communicate()
-            
-            if error and not output:
-                messagebox.showerror("Error", f"Failed to get routes: {error}")
-                return
-                
+
+        # Serve whatever is cached immediately, then validate it in the background
+        self.routes_project = project_path
+        self.routes_generation += 1
+        generation = self.routes_generation
+        cached = None if force else self.route_cache.load(project_path)
+        if cached:
+            self.show_routes(cached['routes'])
+            self.route_cache_label.config(text="Cached routes, checking for changes...")
+        else:
+            self.route_cache_label.config(text="Loading routes...")
+
+        # With nothing cached to show, fill the table while route:list is still running
+        def on_batch(batch):
+            self.log_pipeline.post(self.on_routes_batch, generation, batch)
+
+        if not cached:
+            self.show_routes([])
+
+        def target():
             try:
-                # Parse JSON output
-                self.routes_data = json.loads(output)
-                
-                # Clear current items
-                for item in self.routes_tree.get_children():
-                    self.routes_tree.delete(item)
-                
-                # Add routes to treeview
-                for route in self.routes_data:
-                    self.routes_tree.insert('', 'end', values=(
-                        route['method'],
-                        route['uri'],
-                        route['name'] or '',
-                        route['action']
-                    ))
-                    
-            except json.JSONDecodeError:
-                # اگر خروجی JSON نبود، سعی می‌کنیم خروجی معمولی را پردازش کنیم
-                # Clear current items
-                for item in self.routes_tree.get_children():
-                    self.routes_tree.delete(item)
-                
-                # Split output into lines and parse
-                lines = output.strip().split('\n')
-                if len(lines) > 1:  # Skip header row
-                    for line in lines[1:]:
-                        # Split line and clean up values
-                        parts = line.strip().split()
-                        if len(parts) >= 3:
-                            method = parts[0]
-                            uri = parts[1]
-                            # Join remaining parts as action
-                            action = ' '.join(parts[2:])
-                            name = ''  # Default empty name
-                            
-                            self.routes_tree.insert('', 'end', values=(
-                                method,
-                                uri,
-                                name,
-                                action
-                            ))
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to refresh routes: {str(e)}")
-            print(f"Error details: {str(e)}")  # برای دیباگ
+                entry, hit = self.route_cache.get(project_path, force=force, cached=cached,
+                                                  on_batch=None if cached else on_batch)
+            except Exception as e:
+                self.log_pipeline.post(self.on_routes_failed, generation, e, not cached)
+                return
+            self.log_pipeline.post(self.on_routes_loaded, generation, entry, hit)
+
+        threading.Thread(target=target, daemon=True).start()
+
+    def on_routes_batch(self, generation, batch):
+        """Append routes parsed so far while route:list is still running"""
+        if generation != self.routes_generation:
+            return
+        self.routes_data.extend(batch)
+        self.route_index.extend(batch)
+        self.render_routes(self.route_index.search(self.route_search_var.get()), keep_position=True)
+        self.route_cache_label.config(text=f"Loading routes... {len(self.routes_data)} so far")
+
+    def on_routes_loaded(self, generation, entry, hit):
+        if generation != self.routes_generation:
+            return  # A newer refresh (or another project) superseded this one
+        if not hit:
+            self.show_routes(entry['routes'], keep_position=True)
+        self.update_warm_stats()
+        fetched = datetime.datetime.fromtimestamp(entry['fetched_at']).strftime('%Y-%m-%d %H:%M:%S')
+        self.route_cache_label.config(
+            text=f"Cache {'hit' if hit else 'miss'} ({len(entry['routes'])} routes, fetched {fetched}) | "
+                 f"hits {self.route_cache.hits} / misses {self.route_cache.misses}")
+
+    def on_routes_failed(self, generation, error, streamed=False):
+        if generation != self.routes_generation:
+            return
+        if streamed:
+            self.show_routes([])  # Whatever was parsed before the failure can't be trusted
+        self.route_cache_label.config(text="Failed to load routes")
+        self.log_command(f"route:list failed in {self.routes_project}: {error}")
+        messagebox.showerror("Error", f"Failed to refresh routes: {str(error)}")
+
+    def show_routes(self, routes, keep_position=False):
+        """Replace the routes table contents"""
+        self.routes_data = list(routes)
+        self.route_index = RouteIndex(self.routes_data)
+        self.render_routes(self.route_index.search(self.route_search_var.get()), keep_position=keep_position)
 
     def run_laravel_command(self):
         project_path = self.path_entry.get()
         command = self.command_var.get()
         params = self.param_entry.get()
 
-        if os.path.isdir(project_path):
+        if os.path.isdir(project_path) and command == 'serve':
+            self.start_server(project_path, params)
+        elif os.path.isdir(project_path):
             try:
                 # Split command and parameters into a list for subprocess
-                full_command = ['php', 'artisan', command] + params.split() if 'composer' not in command else ['composer'] + command.split() + params.split()
+                full_command = build_command(command, params)
 
-                self.stop_button.config(state=tk.NORMAL)
                 self.run_in_thread(project_path, full_command)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to run command: {e}")
@@ -331,51 +1299,319 @@ class LaravelGUI:
             messagebox.showerror("Error", "Invalid project path.")
 
     def run_in_thread(self, project_path, cmd_list):
-        def target():
+        """Queue a command on the job manager with its own output tab"""
+        job = self.job_manager.create(project_path, cmd_list)
+        self.create_job_pane(job)
+        self.job_manager.start(job)
+        return job
+
+    def create_job_pane(self, job):
+        """Add an output tab with status and stop controls for a job"""
+        frame = ttk.Frame(self.output_notebook)
+
+        bar = ttk.Frame(frame)
+        bar.pack(fill='x', pady=2)
+        status_label = ttk.Label(bar, text=job.describe_status())
+        status_label.pack(side='left', padx=5)
+        ttk.Label(bar, text=job.project_path, foreground='gray').pack(side='left', padx=5)
+        ttk.Button(bar, text="Close", command=lambda: self.close_job_pane(job.id)).pack(side='right', padx=2)
+        stop_button = ttk.Button(bar, text="Stop", command=lambda: self.stop_job(job.id))
+        stop_button.pack(side='right', padx=2)
+        # Shown once the output parsers report progress or errors
+        progress_bar = ttk.Progressbar(bar, length=150)
+        progress_label = ttk.Label(bar, text="", foreground='gray')
+        errors_list = tk.Listbox(frame, height=4, foreground='#c0392b')
+        errors_list.bind('<Double-Button-1>', lambda event: self.open_job_error(job))
+        errors_list.bind('<Return>', lambda event: self.open_job_error(job))
+
+        scroll = ttk.Scrollbar(frame)
+        scroll.pack(side='right', fill='y')
+        text = tk.Text(frame, height=10, width=50, yscrollcommand=scroll.set)
+        text.pack(side='left', fill='both', expand=True)
+        scroll.config(command=text.yview)
+        text.tag_configure('stderr', foreground='#c0392b')
+
+        pipeline = LogPipeline(self.root, text, autoscroll=self.autoscroll_var.get())
+        pipeline.start()
+        self.job_panes[job.id] = {
+            'frame': frame,
+            'text': text,
+            'pipeline': pipeline,
+            'status_label': status_label,
+            'stop_button': stop_button,
+            'scroll': scroll,
+            'progress_bar': progress_bar,
+            'progress_label': progress_label,
+            'errors_list': errors_list,
+            'errors': [],
+        }
+        self.output_notebook.add(frame, text=f"#{job.id} {job.title}")
+        self.output_notebook.select(frame)
+
+    def on_job_output(self, job, stream, output):
+        """Route a job's output to its tab (called from the job's reader thread)"""
+        pane = self.job_panes.get(job.id)
+        if pane:
+            pane['pipeline'].write(output, stream)
+
+        # The view only keeps recent lines; the log file keeps everything
+        self.log_sink.write(''.join(f"[#{job.id}] {line}" for line in output.splitlines(True)))
+
+    def on_job_event(self, job, event):
+        """Act on what the output parsers found (called from the job's reader thread)"""
+        if event['kind'] in ('url', 'request'):
+            self.serve_manager.handle_event(job, event)
+        elif event['kind'] == 'progress':
+            # job.progress always holds the latest, so one queued update per job is enough
+            if job.id not in self.progress_posted:
+                self.progress_posted.add(job.id)
+                self.log_pipeline.post(self.update_job_progress, job)
+        elif event['kind'] == 'error':
+            self.log_pipeline.post(self.add_job_error, job, event)
+
+    def update_job_progress(self, job):
+        self.progress_posted.discard(job.id)
+        pane = self.job_panes.get(job.id)
+        progress = job.progress
+        if pane is None or progress is None:
+            return
+        bar = pane['progress_bar']
+        if not bar.winfo_manager():
+            pane['progress_label'].pack(side='left', padx=5)
+            bar.pack(side='left', padx=5)
+        if progress['total']:
+            bar.stop()
+            bar.config(mode='determinate', maximum=progress['total'], value=min(progress['current'], progress['total']))
+            counts = f"{progress['current']}/{progress['total']}"
+        elif progress['total'] == 0:
+            bar.stop()
+            bar.config(mode='determinate', maximum=1, value=1)
+            counts = ''
+        else:
+            # Laravel doesn't say how many migrations are pending: count them as they finish
+            if str(bar.cget('mode')) != 'indeterminate':
+                bar.config(mode='indeterminate')
+                bar.start(50)
+            counts = f"{progress['current']} done"
+        pane['progress_label'].config(text=' '.join(filter(None, (counts, progress['message'])))[:80])
+
+    def add_job_error(self, job, event):
+        pane = self.job_panes.get(job.id)
+        if pane is None:
+            return
+        errors_list = pane['errors_list']
+        if not pane['errors']:
+            errors_list.pack(side='bottom', fill='x', before=pane['scroll'])
+        location = f"{event['file']}:{event['line']}" if event['line'] else event['file']
+        errors_list.insert(tk.END, f"[{event['severity']}] {event['message']}" + (f"  ({location})" if location else ''))
+        pane['errors'].append(event)
+
+    def open_job_error(self, job):
+        """Open the file and line of the error selected in a job's error list"""
+        pane = self.job_panes.get(job.id)
+        selection = pane['errors_list'].curselection() if pane else ()
+        if not selection:
+            return
+        event = pane['errors'][selection[0]]
+        if not event['file']:
+            return
+        path = event['file'] if os.path.isabs(event['file']) else os.path.join(job.project_path, event['file'])
+        if not os.path.exists(path):
+            messagebox.showerror("Error", f"File not found: {path}")
+            return
+        self.open_in_editor(path, event['line'] or 1)
+
+    def open_in_editor(self, path, line):
+        try:
+            template = os.environ.get(EDITOR_ENV)
+            if template:
+                subprocess.Popen([part.format(file=path, line=line) for part in shlex.split(template)])
+            elif shutil.which('code'):
+                subprocess.Popen(['code', '-g', f"{path}:{line}"])
+            elif shutil.which('phpstorm'):
+                subprocess.Popen(['phpstorm', '--line', str(line), path])
+            elif os.name == 'nt':
+                os.startfile(path)
+            elif sys.platform == 'darwin':
+                subprocess.Popen(['open', path])
+            else:
+                subprocess.Popen(['xdg-open', path])
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open {path}: {e}")
+
+    def on_job_status(self, job):
+        """Log job state changes and refresh its tab (called from any thread)"""
+        if job.status == 'running' and job.warm:
+            self.log_command(f"Started: [#{job.id}] {job.command} (warm worker)")
+        elif job.status == 'running' and job.process is not None:
+            self.log_command(f"Started: [#{job.id}] {job.command}")
+        elif job.status == 'exited':
+            self.record_history(job)
+            if job.error:
+                self.log_command(f"Error: [#{job.id}] {job.error}")
+            elif job.skipped:
+                self.log_command(f"Skipped: [#{job.id}] {job.command} ({job.skipped})")
+            else:
+                self.log_command(f"Finished: [#{job.id}] {job.command} (exit code {job.returncode})")
+        if job.id in self.serve_manager.servers:
+            self.log_pipeline.post(self.refresh_servers)
+        self.log_pipeline.post(self.update_job_pane, job)
+
+    def update_job_pane(self, job):
+        pane = self.job_panes.get(job.id)
+        if pane is None:
+            return
+        pane['status_label'].config(text=job.describe_status())
+        if job.status == 'exited':
+            self.update_warm_stats()
+        done = job.status in ('exited', 'cancelled')
+        pane['stop_button'].config(state=tk.DISABLED if done else tk.NORMAL)
+        if done and str(pane['progress_bar'].cget('mode')) == 'indeterminate':
+            pane['progress_bar'].stop()
+            pane['progress_bar'].config(mode='determinate', maximum=1, value=1 if job.returncode == 0 else 0)
+        marker = {'queued': '…', 'running': '▶'}.get(job.status, '✓' if job.returncode == 0 else '✗')
+        self.output_notebook.tab(pane['frame'], text=f"{marker} #{job.id} {job.title}")
+        self.update_stop_button()
+
+    def selected_job_id(self):
+        """ID of the job whose tab is selected, if any"""
+        selected = self.output_notebook.select()
+        for job_id, pane in self.job_panes.items():
+            if str(pane['frame']) == selected:
+                return job_id
+        return None
+
+    def update_stop_button(self, event=None):
+        job_id = self.selected_job_id()
+        job = self.job_manager.jobs.get(job_id) if job_id else None
+        if job is None:
+            active = bool(self.job_manager.running())
+        else:
+            active = job.status in ('queued', 'running')
+        self.stop_button.config(state=tk.NORMAL if active else tk.DISABLED)
+
+    def toggle_warm_worker(self):
+        """Route eligible commands through persistent PHP workers, or stop them"""
+        enabled = self.warm_var.get()
+        self.job_manager.warm_pool = self.warm_pool if enabled else None
+        self.route_cache.warm_pool = self.warm_pool if enabled else None
+        if not enabled:
+            threading.Thread(target=self.warm_pool.stop_all, daemon=True).start()
+        self.update_warm_stats()
+
+    def toggle_skip_cache(self):
+        self.skip_cache.skip = self.skip_var.get()
+
+    def toggle_watcher(self):
+        """Start or stop running watch rules when project files change"""
+        if self.watch_var.get():
+            self.watcher = ProjectWatcher(on_trigger=self.on_watch_trigger).start()
+            for project, rules in self.watch_rules.items():
+                self.watcher.set_rules(project, rules)
+        elif self.watcher:
+            threading.Thread(target=self.watcher.stop, daemon=True).start()
+            self.watcher = None
+        self.update_watch_status()
+
+    def update_watch_status(self):
+        if self.watcher:
+            self.watch_status_label.config(
+                text=f"{len(self.watch_rules)} projects ({self.watcher.backend_name})")
+        else:
+            self.watch_status_label.config(text="")
+
+    def edit_watch_rules(self):
+        """Edit the watch rules of the project in the path field"""
+        project_path = self.path_entry.get()
+        if not os.path.isdir(project_path):
+            messagebox.showerror("Error", "Please select a valid Laravel project path first.")
+            return
+        project = os.path.abspath(project_path)
+
+        window = tk.Toplevel(self.root)
+        window.title(f"Watch Rules - {os.path.basename(project)}")
+        ttk.Label(window, text=f"One rule per line: pattern -> command, or -> {WATCH_REFRESH_ROUTES} "
+                               f"to refresh the Routes tab ('**' matches any directories)").pack(padx=10, pady=5)
+        editor = tk.Text(window, height=10, width=70)
+        editor.pack(fill='both', expand=True, padx=10)
+        editor.insert('1.0', format_rules(self.watch_rules.get(project, DEFAULT_WATCH_RULES)))
+
+        def save():
             try:
-                with subprocess.Popen(cmd_list, cwd=project_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, shell=False) as process:
-                    self.process = process
-                    self.log_command(f"Started: {' '.join(cmd_list)}")
-                    
-                    # Reset server URL if this is not a serve command
-                    if 'serve' not in cmd_list:
-                        self.server_url = None
-                        self.url_label.config(text="Not running")
-                        self.copy_url_button.config(state='disabled')
-                    
-                    while True:
-                        output = process.stdout.readline()
-                        if output:
-                            self.log_text.insert(tk.END, output)
-                            self.log_text.see(tk.END)
-                            
-                            # Check for server URL in output
-                            if 'serve' in cmd_list:
-                                url_match = re.search(r'Server running on \[([^\]]+)\]', output)
-                                if url_match:
-                                    self.server_url = url_match.group(1)
-                                    self.url_label.config(text=self.server_url)
-                                    self.copy_url_button.config(state='normal')
-                            
-                        if process.poll() is not None:
-                            break
-                    
-                    self.process = None
-                    self.stop_button.config(state=tk.DISABLED)
-                    self.log_command(f"Finished: {' '.join(cmd_list)}")
-                    
-                    # Reset server URL if serve command ended
-                    if 'serve' in cmd_list:
-                        self.server_url = None
-                        self.url_label.config(text="Not running")
-                        self.copy_url_button.config(state='disabled')
-                        
-            except Exception as e:
-                self.log_command(f"Error: {e}")
-                messagebox.showerror("Error", f"Failed to execute command: {e}")
+                rules = parse_rules(editor.get('1.0', tk.END))
+            except ValueError as e:
+                messagebox.showerror("Error", str(e), parent=window)
+                return
+            self.set_watch_rules(project, rules)
+            window.destroy()
+
+        buttons = ttk.Frame(window)
+        buttons.pack(pady=5)
+        ttk.Button(buttons, text="Save", command=save).pack(side='left', padx=5)
+        ttk.Button(buttons, text="Stop Watching This Project",
+                   command=lambda: (self.set_watch_rules(project, []), window.destroy())).pack(side='left', padx=5)
+
+    def set_watch_rules(self, project, rules):
+        if rules:
+            self.watch_rules[project] = rules
+        else:
+            self.watch_rules.pop(project, None)
+        save_watch_rules(self.watch_rules)
+        if self.watcher:
+            self.watcher.set_rules(project, rules)
+        self.update_watch_status()
+
+    def on_watch_trigger(self, project, rule, paths):
+        """Log a fired watch rule and act on it (called from the watcher thread)"""
+        shown = ', '.join(paths[:3]) + (f" and {len(paths) - 3} more" if len(paths) > 3 else '')
+        self.log_command(f"Watch: {rule['pattern']} changed in {os.path.basename(project)} ({shown})")
+        if rule['run'] == WATCH_REFRESH_ROUTES:
+            self.log_pipeline.post(self.refresh_watched_routes, project)
+        else:
+            self.watch_runner.run(project, rule['run'])
+
+    def refresh_watched_routes(self, project):
+        # Other projects' cached routes are revalidated when they are next shown
+        if self.routes_project and os.path.abspath(self.routes_project) == project:
+            self.refresh_routes(project_path=self.routes_project)
+
+    def update_warm_stats(self):
+        """Show median cold vs warm latency for worker-eligible commands"""
+        parts = []
+        for kind in ('cold', 'warm'):
+            median = self.warm_pool.median(kind)
+            if median is not None:
+                parts.append(f"{kind} {median * 1000:.0f} ms")
+        self.warm_stats_label.config(text=' | '.join(parts))
 
-        thread = threading.Thread(target=target)
-        thread.start()
+    def update_job_limit(self):
+        try:
+            self.job_manager.set_limit(self.job_limit_var.get())
+        except (tk.TclError, ValueError):
+            pass
+
+    def stop_job(self, job_id):
+        job = self.job_manager.jobs.get(job_id)
+        if job and job.status in ('queued', 'running'):
+            self.job_manager.stop(job_id)
+            self.log_command(f"Command stopped by user: [#{job.id}] {job.command}")
+
+    def close_job_pane(self, job_id):
+        """Close a job's tab, stopping the job first if it is still active"""
+        job = self.job_manager.jobs.get(job_id)
+        if job and job.status in ('queued', 'running'):
+            if not messagebox.askyesno("Confirm", "This command is still running. Stop it and close the tab?"):
+                return
+            self.stop_job(job_id)
+        pane = self.job_panes.pop(job_id, None)
+        if pane:
+            pane['pipeline'].stop()
+            self.output_notebook.forget(pane['frame'])
+            pane['frame'].destroy()
+        self.job_manager.remove(job_id)
+        self.serve_manager.remove(job_id)
+        self.refresh_servers()
+        self.update_stop_button()
 
     def browse_project(self):
         path = filedialog.askdirectory()
@@ -387,96 +1623,295 @@ class LaravelGUI:
         path = self.path_entry.get()
         if os.path.isdir(path):
             if path not in self.project_paths:
-                self.project_paths.append(path)
-                self.save_paths()
-                self.update_paths_listbox()
+                self.add_project_paths([path])
                 messagebox.showinfo("Success", "Project path saved successfully.")
             else:
                 messagebox.showinfo("Info", "Project path already exists.")
         else:
             messagebox.showerror("Error", "Invalid project path.")
 
+    def add_project_paths(self, paths):
+        """Save the given paths that aren't saved yet; returns how many were added"""
+        added = [path for path in paths if path not in self.project_paths]
+        if added:
+            self.project_paths.extend(added)
+            self.save_paths()
+            self.update_paths_listbox()
+            self.validate_projects(added)
+        return len(added)
+
+    def scan_workspace(self):
+        """Find Laravel projects under a directory and offer to save them"""
+        workspace = filedialog.askdirectory(title="Choose a workspace directory to scan")
+        if not workspace:
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title(f"Laravel projects under {workspace}")
+        window.geometry('800x400')
+
+        columns = ('Laravel', 'Constraint', 'PHP', 'Saved')
+        tree = ttk.Treeview(window, columns=columns, show='tree headings', selectmode='extended')
+        tree.heading('#0', text='Project')
+        tree.column('#0', width=380)
+        for column, width in zip(columns, (90, 90, 90, 60)):
+            tree.heading(column, text=column)
+            tree.column(column, width=width, anchor='w')
+        scroll = ttk.Scrollbar(window, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scroll.set)
+
+        bottom = ttk.Frame(window)
+        bottom.pack(side='bottom', fill='x', pady=5)
+        status_label = ttk.Label(bottom, text="Scanning...")
+        status_label.pack(side='left', padx=10)
+
+        def add(paths):
+            added = self.add_project_paths(paths)
+            for path in paths:
+                tree.set(path, 'Saved', 'yes')
+            status_label.config(text=f"Saved {added} new projects")
+
+        ttk.Button(bottom, text="Add All New", command=lambda: add(tree.get_children())).pack(side='right', padx=5)
+        ttk.Button(bottom, text="Add Selected", command=lambda: add(tree.selection())).pack(side='right', padx=5)
+
+        tree.pack(side='left', fill='both', expand=True, padx=(10, 0), pady=5)
+        scroll.pack(side='right', fill='y', pady=5)
+
+        def show_project(project):
+            if window.winfo_exists() and not tree.exists(project['path']):
+                tree.insert('', 'end', iid=project['path'], text=project['path'], values=(
+                    project['laravel_version'] or '', project['laravel_constraint'] or '',
+                    project['php_constraint'] or '', 'yes' if project['path'] in self.project_paths else '',
+                ))
+
+        def show_summary(projects, scan):
+            if not window.winfo_exists():
+                return
+            for project in projects:
+                show_project(project)
+            status_label.config(
+                text=f"{len(projects)} projects in {scan['dirs']} directories, {scan['reused']} unchanged "
+                     f"since the last scan ({scan['seconds'] * 1000:.0f} ms)")
+
+        def target():
+            try:
+                # One scan at a time: scans update the shared index
+                with self.workspace_lock:
+                    if self.workspace_index is None:
+                        self.workspace_index = WorkspaceIndex()
+                    projects = self.workspace_index.scan(
+                        [workspace], on_project=lambda project: self.log_pipeline.post(show_project, project))
+                    scan = self.workspace_index.last_scan
+            except Exception as e:
+                self.log_pipeline.post(status_label.config, {'text': f"Scan failed: {e}"})
+                return
+            self.log_pipeline.post(show_summary, projects, scan)
+
+        threading.Thread(target=target, daemon=True).start()
+
     def stop_command(self):
-        if self.process:
-            self.process.terminate()
-            self.process = None
-            self.stop_button.config(state=tk.DISABLED)
-            self.log_command("Command stopped by user.")
+        """Stop the job in the selected tab, or the most recent running job"""
+        job_id = self.selected_job_id()
+        if job_id is None:
+            running = self.job_manager.running()
+            job_id = running[-1].id if running else None
+        job = self.job_manager.jobs.get(job_id) if job_id else None
+        if job and job.status in ('queued', 'running'):
+            self.stop_job(job_id)
             messagebox.showinfo("Stopped", "The command has been stopped.")
-            
-            # Reset server URL if it was running
-            if self.server_url:
-                self.server_url = None
-                self.url_label.config(text="Not running")
-                self.copy_url_button.config(state='disabled')
 
     def load_paths(self):
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r') as f:
-                return json.load(f)
-        return []
+        return commands.load_paths()
 
     def save_paths(self):
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(self.project_paths, f)
+        commands.save_paths(self.project_paths)
 
     def update_paths_listbox(self):
         self.paths_listbox.delete(0, tk.END)
         for path in self.project_paths:
             self.paths_listbox.insert(tk.END, path)
+            if self.project_problems.get(path):
+                self.paths_listbox.itemconfig(tk.END, foreground='#c0392b')
+        self.update_paths_status()
+
+    def validate_projects(self, paths):
+        """Check saved projects off the UI thread; results are filled in as they arrive"""
+        paths = list(paths)
+        for path in paths:
+            self.project_problems[path] = None
+
+        def target():
+            for path in paths:
+                self.log_pipeline.post(self.on_project_checked, path, check_project(path))
+
+        self.update_paths_status()
+        threading.Thread(target=target, daemon=True).start()
+
+    def on_project_checked(self, path, problem):
+        if path not in self.project_paths:
+            return  # Deleted while it was being checked
+        self.project_problems[path] = problem or ''
+        index = self.project_paths.index(path)
+        self.paths_listbox.itemconfig(index, foreground='#c0392b' if problem else '')
+        self.update_paths_status()
+
+    def update_paths_status(self):
+        """Summarise saved projects that are missing or not Laravel projects"""
+        pending = sum(1 for path in self.project_paths if self.project_problems.get(path) is None)
+        invalid = [f"{os.path.basename(os.path.normpath(path))} ({self.project_problems[path]})"
+                   for path in self.project_paths if self.project_problems.get(path)]
+        parts = []
+        if pending:
+            parts.append(f"checking {pending} projects...")
+        if invalid:
+            parts.append(f"{len(invalid)} invalid: {', '.join(invalid)}")
+        self.paths_status_label.config(text=' | '.join(parts))
 
     def on_path_selected(self, event):
         selected_index = self.paths_listbox.curselection()
         if selected_index:
-            selected_path = self.paths_listbox.get(selected_index)
+            selected_path = self.paths_listbox.get(selected_index[0])
             self.path_entry.delete(0, tk.END)
             self.path_entry.insert(0, selected_path)
 
     def delete_selected_path(self):
         selected_index = self.paths_listbox.curselection()
         if selected_index:
-            selected_path = self.paths_listbox.get(selected_index)
-            self.project_paths.remove(selected_path)
+            for index in selected_index:
+                self.project_paths.remove(self.paths_listbox.get(index))
             self.save_paths()
             self.update_paths_listbox()
             messagebox.showinfo("Success", "Project path deleted successfully.")
 
+    def run_on_selected_projects(self):
+        projects = [self.paths_listbox.get(index) for index in self.paths_listbox.curselection()]
+        if not projects:
+            messagebox.showerror("Error", "Select one or more saved projects first.")
+            return
+        self.run_fanout(projects)
+
+    def run_on_all_projects(self):
+        if not self.project_paths:
+            messagebox.showerror("Error", "No saved projects.")
+            return
+        self.run_fanout(list(self.project_paths))
+
+    def run_fanout(self, projects):
+        """Run the chosen command on several projects and show per-project progress"""
+        command = self.command_var.get()
+        if not command:
+            messagebox.showerror("Error", "Choose a command first.")
+            return
+        projects = unique_paths(projects)
+        if command == 'serve':
+            # Servers never finish, so they get the Servers panel instead of a progress window
+            for project in projects:
+                self.start_server(project, self.param_entry.get())
+            return
+        cmd_list = build_command(command, self.param_entry.get())
+
+        window = tk.Toplevel(self.root)
+        window.title(f"{' '.join(cmd_list)} on {len(projects)} projects")
+        window.geometry('900x400')
+
+        columns = ('Status', 'Exit', 'Duration', 'Output', 'Last line')
+        tree = ttk.Treeview(window, columns=columns, show='tree headings')
+        tree.heading('#0', text='Project')
+        tree.column('#0', width=250)
+        for column, width in zip(columns, (80, 50, 80, 80, 300)):
+            tree.heading(column, text=column)
+            tree.column(column, width=width, anchor='w')
+        scroll = ttk.Scrollbar(window, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scroll.set)
+
+        bottom = ttk.Frame(window)
+        bottom.pack(side='bottom', fill='x', pady=5)
+        summary_label = ttk.Label(bottom, text=f"Running on {len(projects)} projects...")
+        summary_label.pack(side='left', padx=10)
+        stop_button = ttk.Button(bottom, text="Stop All")
+        stop_button.pack(side='right', padx=10)
+
+        tree.pack(side='left', fill='both', expand=True, padx=(10, 0), pady=5)
+        scroll.pack(side='right', fill='y', pady=5)
+        tree.tag_configure('failed', foreground='#c0392b')
+
+        for project in projects:
+            tree.insert('', 'end', iid=project, text=project, values=('queued', '', '', '', ''))
+
+        # Worker threads may report many updates per second; only redraw a
+        # project's row once per flush
+        dirty = set()
+
+        def refresh_rows():
+            while dirty:
+                job = dirty.pop()
+                if not tree.winfo_exists():
+                    return
+                duration = f"{job.duration:.1f}s" if job.duration is not None else ''
+                exit_code = '' if job.returncode is None else job.returncode
+                tree.item(job.project_path, values=(
+                    'skipped' if job.skipped else job.status, exit_code, duration, format_size(job.output_bytes),
+                    run.last_line.get(job.project_path, job.error or ''),
+                ), tags=('failed',) if job.error or job.returncode not in (None, 0) else ())
+
+        def on_update(job):
+            if job not in dirty:
+                dirty.add(job)
+                self.log_pipeline.post(refresh_rows)
+
+        def on_done(run):
+            for job in run.jobs.values():
+                if job.status == 'exited':
+                    self.record_history(job)
+            self.log_pipeline.post(refresh_rows)
+            self.log_pipeline.post(show_summary)
+
+        def show_summary():
+            rows = run.summary()
+            failed = [row for row in rows if row['error'] or row['returncode'] != 0]
+            busy = sum(row['duration'] or 0 for row in rows)
+            text = (f"{len(rows) - len(failed)} succeeded, {len(failed)} failed in {run.wall_time:.1f}s "
+                    f"({busy:.1f}s of work)")
+            self.log_command(f"Fan-out finished: {' '.join(cmd_list)}: {text}")
+            if window.winfo_exists():
+                summary_label.config(text=text)
+                stop_button.config(state=tk.DISABLED)
+
+        self.log_command(f"Fan-out started: {' '.join(cmd_list)} on {len(projects)} projects")
+        run = FanOutRun(projects, cmd_list, on_update=on_update, on_done=on_done,
+                        skip_cache=self.job_manager.skip_cache)
+        stop_button.config(command=run.stop)
+        window.protocol('WM_DELETE_WINDOW', lambda: (run.stop(), window.destroy()))
+        run.start()
+
     def log_command(self, command):
-        """Log the executed command with timestamp."""
+        """Log the executed command with timestamp (safe to call from any thread)."""
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"[{timestamp}] {command}\n"
         
         # Write to log file
-        with open(LOG_FILE, 'a', encoding='utf-8') as log_file:
-            log_file.write(log_entry)
+        self.log_sink.write(log_entry)
         
         # Update log display
-        self.log_text.insert(tk.END, log_entry)
-        self.log_text.see(tk.END)
+        self.log_pipeline.write(log_entry)
 
     def load_logs(self):
-        """Load the log file content into the text box."""
-        if os.path.exists(LOG_FILE):
-            try:
-                with open(LOG_FILE, 'r', encoding='utf-8') as log_file:
-                    self.log_text.delete(1.0, tk.END)
-                    self.log_text.insert(tk.END, log_file.read())
-                self.log_text.see(tk.END)
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load logs: {e}")
-
-    def clear_logs(self):
-        """Clear the log file and text box."""
+        """Load the end of the log file into the text box."""
         try:
-            # Clear log file
-            with open(LOG_FILE, 'w', encoding='utf-8') as log_file:
-                log_file.write('')
-            
-            # Clear log display
             self.log_text.delete(1.0, tk.END)
-            messagebox.showinfo("Success", "Logs cleared successfully.")
+            self.log_text.insert(tk.END, self.log_sink.tail())
+            self.log_text.see(tk.END)
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to clear logs: {e}")
+            messagebox.showerror("Error", f"Failed to load logs: {e}")
+
+    def on_close(self):
+        """Flush buffered log entries before the window goes away"""
+        self.log_sink.close()
+        self.warm_pool.stop_all()
+        if self.watcher:
+            self.watcher.stop()
+        self.serve_manager.close()
+        self.root.destroy()
 
 def create_menu(self):
     """Create menu bar with additional options"""
@@ -542,6 +1977,8 @@ def export_routes(self):
         messagebox.showerror("Error", f"Failed to export routes: {e}")
 
 if __name__ == "__main__":
+    profile = StartupProfile(STARTUP_STARTED, verbose='--profile-startup' in sys.argv[1:])
+    profile.mark('imports')
     root = tk.Tk()
     
     # Set window size and position
@@ -560,6 +1997,16 @@ if __name__ == "__main__":
     available_themes = style.theme_names()
     if 'clam' in available_themes:
         style.theme_use('clam')
+    profile.mark('Tk root and theme')
     
-    app = LaravelGUI(root)
+    app = LaravelGUI(root, profile)
+    if profile.verbose:
+        def report_startup():
+            profile.mark('first frame')
+            print(profile.report(), file=sys.stderr)
+
+        root.update_idletasks()
+        profile.mark('first layout')
+        # Idle callbacks run in order, so this one comes after the first redraw
+        root.after_idle(report_startup)
     root.mainloop()
\ No newline at end of file
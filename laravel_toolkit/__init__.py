@@ -0,0 +1,22 @@
+"""GUI-free engine behind LaravelToolkit.
+
+The Tk front end (laravel.py) and the command-line interface
+(``python -m laravel_toolkit``) both build on these modules:
+
+- commands: command lines and saved project paths
+- jobs: running commands concurrently and across many projects
+- pipelines: saved command pipelines with step dependencies
+- streams: reading process output
+- parsers: progress and error events parsed from command output
+- serve: several dev servers with health probes and request timings
+- routes: fetching, parsing, caching and searching route:list
+- history: the SQLite run history
+- logs: the rotating command log file
+- telemetry: CPU and memory measurements of runs
+- warm: persistent PHP workers
+- workspace: discovering projects under workspace directories
+- composer: skipping Composer runs that would change nothing
+- watch: running commands when project files change
+
+Nothing is imported here so that ``python -m laravel_toolkit`` stays fast.
+"""
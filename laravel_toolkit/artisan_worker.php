@@ -0,0 +1,48 @@
+<?php
+
+// Long-lived artisan worker used by LaravelToolkit's "warm worker" mode.
+//
+// Run from a Laravel project root. Boots the application once, prints a
+// {"ready": true} line, then reads one JSON request per line on stdin:
+//     {"id": 1, "args": ["make:model", "Post", "-m"]}
+// and answers each with one JSON line on stdout:
+//     {"id": 1, "exit_code": 0, "output": "..."}
+
+use Illuminate\Contracts\Console\Kernel;
+use Symfony\Component\Console\Input\ArgvInput;
+use Symfony\Component\Console\Output\BufferedOutput;
+
+$base = getcwd();
+require $base.'/vendor/autoload.php';
+$app = require_once $base.'/bootstrap/app.php';
+
+$kernel = $app->make(Kernel::class);
+$kernel->bootstrap();
+
+function respond(array $payload)
+{
+    fwrite(STDOUT, json_encode($payload, JSON_INVALID_UTF8_SUBSTITUTE)."\n");
+    fflush(STDOUT);
+}
+
+respond(['ready' => true, 'laravel' => $app->version(), 'php' => PHP_VERSION]);
+
+while (($line = fgets(STDIN)) !== false) {
+    $request = json_decode($line, true);
+    if (! is_array($request) || ! isset($request['args'])) {
+        continue;
+    }
+
+    $output = new BufferedOutput();
+    // Anything a command echoes directly must not corrupt the protocol
+    ob_start();
+    try {
+        $code = $kernel->handle(new ArgvInput(array_merge(['artisan'], $request['args'])), $output);
+    } catch (Throwable $e) {
+        $output->writeln(get_class($e).': '.$e->getMessage());
+        $code = 1;
+    }
+    $stray = ob_get_clean();
+
+    respond(['id' => $request['id'] ?? null, 'exit_code' => $code, 'output' => $stray.$output->fetch()]);
+}
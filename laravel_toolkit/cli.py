@@ -0,0 +1,485 @@
+"""Command-line front end: ``python -m laravel_toolkit <command> ...``
+
+Engine modules are imported inside each subcommand, so starting the CLI
+only pays for what the chosen subcommand actually uses.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+def print_table(rows, columns):
+    """Print rows (dicts) as left-aligned columns"""
+    widths = {column: len(column) for column in columns}
+    cells = []
+    for row in rows:
+        line = {column: '' if row.get(column) is None else str(row.get(column)) for column in columns}
+        for column in columns:
+            widths[column] = max(widths[column], len(line[column]))
+        cells.append(line)
+    print('  '.join(column.ljust(widths[column]) for column in columns).rstrip())
+    for line in cells:
+        print('  '.join(line[column].ljust(widths[column]) for column in columns).rstrip())
+
+
+def open_history(args):
+    if args.no_history:
+        return None
+    from .history import HISTORY_DB, HistoryStore
+    return HistoryStore(args.history_db or HISTORY_DB)
+
+
+def open_skip_cache(args):
+    from .composer import ComposerSkipCache
+    return ComposerSkipCache(cache_dir=args.composer_cache_dir, skip=not args.no_skip)
+
+
+def cmd_run(args):
+    from .commands import build_command
+    from .jobs import JobManager
+
+    if not os.path.isdir(args.project):
+        print(f"Invalid project path: {args.project}", file=sys.stderr)
+        return 2
+
+    def on_output(job, stream, text):
+        target = sys.stderr if stream == 'stderr' else sys.stdout
+        target.write(text)
+        target.flush()
+
+    manager = JobManager(on_output=on_output, skip_cache=open_skip_cache(args))
+    if args.warm:
+        from .warm import WarmWorkerPool
+        manager.warm_pool = WarmWorkerPool()
+    job = manager.submit(args.project, build_command(args.command, ' '.join(args.params)))
+    try:
+        job.wait()
+    except KeyboardInterrupt:
+        manager.stop(job.id)
+        job.wait()
+    finally:
+        if manager.warm_pool:
+            manager.warm_pool.stop_all()
+
+    history = open_history(args)
+    if history:
+        history.record(job)
+    if job.errors:
+        print(f"\n{len(job.errors)} errors:", file=sys.stderr)
+        for error in job.errors:
+            location = f"{error['file']}:{error['line']}" if error['line'] else error['file']
+            print(f"  [{error['severity']}] {error['message']}" + (f" ({location})" if location else ''), file=sys.stderr)
+    if job.stop_requested:
+        return 130  # What a shell reports for Ctrl+C
+    if job.error:
+        print(f"Failed to execute command: {job.error}", file=sys.stderr)
+        return 1
+    return job.returncode
+
+
+def cmd_fanout(args):
+    from .commands import CONFIG_FILE, build_command, load_paths
+    from .jobs import FanOutRun
+    from .utils import format_size
+
+    projects = args.project or (load_paths(args.config or CONFIG_FILE) if args.all else [])
+    if not projects:
+        print("No projects: pass --project PATH (repeatable) or --all", file=sys.stderr)
+        return 2
+    cmd_list = build_command(args.command, ' '.join(args.params))
+
+    def on_update(job):
+        if job.status in ('exited', 'cancelled') and not args.json:
+            code = job.error or job.returncode
+            duration = f"{job.duration:.1f}s" if job.duration is not None else '-'
+            print(f"[{'skipped' if job.skipped else job.status}] {job.project_path}  exit={code}  {duration}  {format_size(job.output_bytes)}",
+                  file=sys.stderr, flush=True)
+
+    options = {'max_workers': args.workers} if args.workers else {}
+    run = FanOutRun(projects, cmd_list, on_update=on_update, skip_cache=open_skip_cache(args), **options).start()
+    try:
+        run.wait()
+    except KeyboardInterrupt:
+        run.stop()
+        run.wait()
+
+    history = open_history(args)
+    if history:
+        for job in run.jobs.values():
+            if job.status == 'exited':
+                history.record(job)
+
+    rows = run.summary()
+    failed = [row for row in rows if row['error'] or row['returncode'] != 0]
+    if args.json:
+        json.dump({'command': cmd_list, 'wall_time': run.wall_time, 'projects': rows}, sys.stdout, indent=2)
+        print()
+    else:
+        for row in rows:
+            row['exit'] = row['error'] or row['returncode']
+            row['duration'] = f"{row['duration']:.1f}s" if row['duration'] is not None else ''
+            row['output'] = format_size(row['output_bytes'])
+        print()
+        print_table(rows, ['project', 'status', 'exit', 'duration', 'output'])
+        print(f"\n{len(rows) - len(failed)} succeeded, {len(failed)} failed in {run.wall_time:.1f}s")
+    return 1 if failed else 0
+
+
+def cmd_routes(args):
+    from .routes import ROUTE_CACHE_DIR, RouteCache, RouteIndex
+
+    if not os.path.isdir(args.project):
+        print(f"Invalid project path: {args.project}", file=sys.stderr)
+        return 2
+    cache = RouteCache(args.cache_dir or ROUTE_CACHE_DIR)
+    if args.warm:
+        from .warm import WarmWorkerPool
+        cache.warm_pool = WarmWorkerPool()
+    try:
+        entry, hit = cache.get(args.project, force=args.force)
+    except Exception as e:
+        print(f"Failed to refresh routes: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if cache.warm_pool:
+            cache.warm_pool.stop_all()
+
+    routes = entry['routes']
+    if args.search:
+        index = RouteIndex(routes)
+        routes = [routes[i] for i in index.search(args.search)]
+    print(f"Cache {'hit' if hit else 'miss'}: {len(routes)} routes", file=sys.stderr)
+    if args.json:
+        json.dump(routes, sys.stdout, indent=2)
+        print()
+    else:
+        print_table(routes, ['method', 'uri', 'name', 'action'])
+    return 0
+
+
+def cmd_history(args):
+    import datetime
+    import time
+    from .history import HISTORY_DB, HistoryStore
+
+    history = HistoryStore(args.history_db or HISTORY_DB)
+    if args.output is not None:
+        print(history.output(args.output), end='')
+        return 0
+    runs = history.search(
+        project=args.project,
+        command=args.command,
+        status=args.status,
+        since=time.time() - args.days * 86400 if args.days else None,
+        text=args.text,
+        limit=args.limit,
+    )
+    if args.json:
+        json.dump(runs, sys.stdout, indent=2)
+        print()
+        return 0
+    for run in runs:
+        run['started'] = datetime.datetime.fromtimestamp(run['started_at']).strftime('%Y-%m-%d %H:%M:%S')
+        run['exit'] = run['error'] or run['exit_code']
+        run['duration'] = f"{run['finished_at'] - run['started_at']:.1f}s" if run['finished_at'] else ''
+    print_table(runs, ['id', 'started', 'project', 'command', 'params', 'exit', 'duration'])
+    return 0
+
+
+def cmd_scan(args):
+    from .commands import CONFIG_FILE, load_paths, save_paths
+    from .workspace import WORKSPACE_INDEX, WorkspaceIndex
+
+    index = WorkspaceIndex(args.index or WORKSPACE_INDEX)
+    roots = args.root or index.roots
+    if not roots:
+        print("No workspace roots: pass one or more directories", file=sys.stderr)
+        return 2
+    projects = index.scan(roots)
+    scan = index.last_scan
+    print(f"{len(projects)} projects in {scan['dirs']} directories ({scan['listed']} listed, "
+          f"{scan['reused']} unchanged) in {scan['seconds'] * 1000:.0f} ms", file=sys.stderr)
+
+    if args.save:
+        config_file = args.config or CONFIG_FILE
+        saved = load_paths(config_file)
+        added = [project['path'] for project in projects if project['path'] not in saved]
+        save_paths(saved + added, config_file)
+        print(f"Saved {len(added)} new projects", file=sys.stderr)
+
+    if args.json:
+        json.dump(projects, sys.stdout, indent=2)
+        print()
+    else:
+        print_table(projects, ['path', 'laravel_version', 'laravel_constraint', 'php_constraint'])
+    return 0
+
+
+def cmd_pipeline(args):
+    from .commands import CONFIG_FILE, load_paths
+    from .pipelines import PIPELINES_FILE, PipelineRun, format_steps, load_pipelines
+    from .utils import format_size
+
+    pipelines = load_pipelines(args.file or PIPELINES_FILE)
+    if args.list or not args.name:
+        for name, steps in pipelines.items():
+            print(f"{name}:")
+            for line in format_steps(steps).splitlines():
+                print(f"  {line}")
+        return 0
+    if args.name not in pipelines:
+        print(f"Unknown pipeline: {args.name} (known: {', '.join(pipelines)})", file=sys.stderr)
+        return 2
+    projects = args.project or (load_paths(args.config or CONFIG_FILE) if args.all else [])
+    if not projects:
+        print("No projects: pass --project PATH (repeatable) or --all", file=sys.stderr)
+        return 2
+
+    def on_update(project, name):
+        state = run.state(project, name)
+        if state in ('succeeded', 'failed', 'stopped', 'skipped', 'cancelled') and not args.json:
+            job = run.jobs.get((project, name))
+            duration = f"{job.duration:.1f}s" if job and job.duration is not None else '-'
+            print(f"[{state}] {project}  {name}  {duration}", file=sys.stderr, flush=True)
+
+    options = {'max_workers': args.workers} if args.workers else {}
+    run = PipelineRun(pipelines[args.name], projects, on_update=on_update, skip_cache=open_skip_cache(args), **options)
+    run.start()
+    try:
+        run.wait()
+    except KeyboardInterrupt:
+        run.stop()
+        run.wait()
+
+    history = open_history(args)
+    if history:
+        for job in run.jobs.values():
+            if job.status == 'exited':
+                history.record(job)
+
+    rows = run.summary()
+    failed = [row for row in rows if row['state'] != 'succeeded']
+    if args.json:
+        json.dump({'pipeline': args.name, 'wall_time': run.wall_time, 'steps': rows}, sys.stdout, indent=2)
+        print()
+    else:
+        for row in rows:
+            row['exit'] = row['error'] or row['returncode']
+            row['duration'] = f"{row['duration']:.1f}s" if row['duration'] is not None else ''
+            row['output'] = format_size(row['output_bytes'])
+        print()
+        print_table(rows, ['project', 'step', 'state', 'exit', 'duration', 'output'])
+        print(f"\n{len(rows) - len(failed)} of {len(rows)} steps succeeded in {run.wall_time:.1f}s")
+    return 1 if failed else 0
+
+
+def cmd_watch(args):
+    import threading
+    from .jobs import JobManager
+    from .routes import RouteCache
+    from .watch import (DEFAULT_WATCH_RULES, WATCH_REFRESH_ROUTES, WATCH_RULES_FILE, ProjectWatcher, WatchRunner,
+                        format_rules, load_watch_rules)
+
+    saved = load_watch_rules(args.rules or WATCH_RULES_FILE)
+    projects = [os.path.abspath(project) for project in args.project] or list(saved)
+    if not projects:
+        print("No projects: pass one or more project paths or save watch rules in the GUI", file=sys.stderr)
+        return 2
+    invalid = [project for project in projects if not os.path.isdir(project)]
+    if invalid:
+        print(f"Invalid project path: {invalid[0]}", file=sys.stderr)
+        return 2
+
+    def on_output(job, stream, text):
+        target = sys.stderr if stream == 'stderr' else sys.stdout
+        target.write(''.join(f"[#{job.id}] {line}" for line in text.splitlines(True)))
+        target.flush()
+
+    history = open_history(args)
+
+    def on_status(job):
+        if job.status == 'exited':
+            if history:
+                history.record(job)
+            result = job.error or job.skipped or f"exit code {job.returncode}"
+            print(f"Finished: [#{job.id}] {job.command} in {job.project_path} ({result})", file=sys.stderr, flush=True)
+
+    manager = JobManager(on_output=on_output, on_status=on_status, skip_cache=open_skip_cache(args))
+    runner = WatchRunner(manager)
+    route_cache = RouteCache()
+
+    def refresh_routes(project):
+        try:
+            entry, hit = route_cache.get(project)
+        except Exception as e:
+            print(f"Failed to refresh routes: {e}", file=sys.stderr, flush=True)
+            return
+        print(f"Routes of {project}: {len(entry['routes'])} ({'unchanged' if hit else 'refreshed'})",
+              file=sys.stderr, flush=True)
+
+    def on_trigger(project, rule, paths):
+        print(f"Watch: {rule['pattern']} changed in {project} ({', '.join(paths)})", file=sys.stderr, flush=True)
+        if rule['run'] == WATCH_REFRESH_ROUTES:
+            threading.Thread(target=refresh_routes, args=(project,), daemon=True).start()
+        else:
+            runner.run(project, rule['run'])
+
+    watcher = ProjectWatcher(on_trigger)
+    for project in projects:
+        rules = saved.get(project) or DEFAULT_WATCH_RULES
+        watcher.set_rules(project, rules)
+        print(f"Watching {project}:", file=sys.stderr)
+        for line in format_rules(rules).splitlines():
+            print(f"  {line}", file=sys.stderr)
+    print(f"Using {watcher.backend_name}; press Ctrl+C to stop", file=sys.stderr, flush=True)
+    watcher.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+    return 0
+
+
+def cmd_serve(args):
+    import time
+    from .jobs import JobManager
+    from .serve import SERVE_BASE_PORT, ServeManager
+
+    invalid = [project for project in args.project if not os.path.isdir(project)]
+    if invalid:
+        print(f"Invalid project path: {invalid[0]}", file=sys.stderr)
+        return 2
+
+    def on_output(job, stream, text):
+        if args.verbose:
+            target = sys.stderr if stream == 'stderr' else sys.stdout
+            target.write(''.join(f"[#{job.id}] {line}" for line in text.splitlines(True)))
+            target.flush()
+
+    def ms(value):
+        return '' if value is None else f"{value:.1f}"
+
+    jobs = JobManager(on_output=on_output, on_event=lambda job, event: servers.handle_event(job, event))
+    servers = ServeManager(jobs, base_port=args.port or SERVE_BASE_PORT,
+                           **({'probe_interval': args.probe_interval} if args.probe_interval else {}))
+    try:
+        for project in args.project:
+            servers.start(project, ' '.join(args.params or []))
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        for server in servers.active():
+            servers.stop(server.id)
+        return 1
+    print("Press Ctrl+C to stop the servers", file=sys.stderr, flush=True)
+    try:
+        while servers.active():
+            time.sleep(args.report_every)
+            rows = [server.summary() for server in servers.servers.values()]
+            for row in rows:
+                row['probe'] = f"{ms(row['probe_p50'])}/{ms(row['probe_p95'])}"
+                row['p50'], row['p95'], row['p99'] = ms(row['p50']), ms(row['p95']), ms(row['p99'])
+            print()
+            print_table(rows, ['project', 'url', 'state', 'probe', 'requests', 'p50', 'p95', 'p99', 'slowest'])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servers.close()
+        for server in servers.active():
+            servers.stop(server.id)
+            server.job.wait(5)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='laravel_toolkit', description='Run Laravel artisan and Composer commands.')
+    subparsers = parser.add_subparsers(dest='subcommand', required=True)
+
+    run_args = argparse.ArgumentParser(add_help=False)
+    run_args.add_argument('--history-db', help='history database (default: command_history.db)')
+    run_args.add_argument('--no-history', action='store_true', help='do not record this run in the history')
+    run_args.add_argument('--no-skip', action='store_true',
+                          help='run composer install/dump-autoload even when vendor/ is up to date')
+    run_args.add_argument('--composer-cache-dir',
+                          help="cache directory for every Composer run (default: Composer's own)")
+
+    run = subparsers.add_parser('run', parents=[run_args], help='run one command in a project')
+    run.add_argument('project', help='Laravel project path')
+    run.add_argument('command', help="artisan command (e.g. migrate) or 'composer <command>'")
+    run.add_argument('params', nargs=argparse.REMAINDER, help='parameters passed to the command')
+    run.add_argument('--warm', action='store_true', help='use a warm PHP worker for make:* commands')
+    run.set_defaults(handler=cmd_run)
+
+    fanout = subparsers.add_parser('fanout', parents=[run_args], help='run one command across many projects')
+    fanout.add_argument('command', help="artisan command (e.g. cache:clear) or 'composer <command>'")
+    fanout.add_argument('params', nargs=argparse.REMAINDER, help='parameters passed to the command')
+    fanout.add_argument('--project', action='append', help='project path (repeatable)')
+    fanout.add_argument('--all', action='store_true', help='every saved project')
+    fanout.add_argument('--config', help='saved projects file (default: laravel_projects.json)')
+    fanout.add_argument('--workers', type=int, default=None, help='maximum projects running at once')
+    fanout.add_argument('--json', action='store_true', help='print the summary as JSON')
+    fanout.set_defaults(handler=cmd_fanout)
+
+    routes = subparsers.add_parser('routes', help="list a project's routes (cached)")
+    routes.add_argument('project', help='Laravel project path')
+    routes.add_argument('--search', help='filter, e.g. "method:POST uri:/api"')
+    routes.add_argument('--force', action='store_true', help='ignore the cache')
+    routes.add_argument('--cache-dir', help='route cache directory (default: route_cache)')
+    routes.add_argument('--warm', action='store_true', help='use a warm PHP worker')
+    routes.add_argument('--json', action='store_true', help='print routes as JSON')
+    routes.set_defaults(handler=cmd_routes)
+
+    history = subparsers.add_parser('history', help='search past runs')
+    history.add_argument('--project', help='project path')
+    history.add_argument('--command', help='command prefix, e.g. composer')
+    history.add_argument('--status', choices=['failed', 'succeeded'])
+    history.add_argument('--days', type=float, help='only runs from the last N days')
+    history.add_argument('--text', help='full-text search over output')
+    history.add_argument('--limit', type=int, default=50)
+    history.add_argument('--output', type=int, metavar='ID', help='print the output of run ID')
+    history.add_argument('--history-db', help='history database (default: command_history.db)')
+    history.add_argument('--json', action='store_true', help='print runs as JSON')
+    history.set_defaults(handler=cmd_history)
+
+    pipeline = subparsers.add_parser('pipeline', parents=[run_args], help='run a saved pipeline')
+    pipeline.add_argument('name', nargs='?', help='pipeline name (omit to list pipelines)')
+    pipeline.add_argument('--list', action='store_true', help='list pipelines and their steps')
+    pipeline.add_argument('--project', action='append', help='project path (repeatable)')
+    pipeline.add_argument('--all', action='store_true', help='every saved project')
+    pipeline.add_argument('--config', help='saved projects file (default: laravel_projects.json)')
+    pipeline.add_argument('--file', help='pipelines file (default: laravel_pipelines.json)')
+    pipeline.add_argument('--workers', type=int, default=None, help='maximum steps running at once')
+    pipeline.add_argument('--json', action='store_true', help='print the summary as JSON')
+    pipeline.set_defaults(handler=cmd_pipeline)
+
+    scan = subparsers.add_parser('scan', help='find Laravel projects under workspace directories')
+    scan.add_argument('root', nargs='*', help='directories to scan (default: the previously scanned ones)')
+    scan.add_argument('--index', help='workspace index file (default: workspace_index.json)')
+    scan.add_argument('--save', action='store_true', help='add the projects found to the saved projects')
+    scan.add_argument('--config', help='saved projects file (default: laravel_projects.json)')
+    scan.add_argument('--json', action='store_true', help='print projects as JSON')
+    scan.set_defaults(handler=cmd_scan)
+
+    watch = subparsers.add_parser('watch', parents=[run_args], help='run watch rules when project files change')
+    watch.add_argument('project', nargs='*', help='project paths (default: every project with saved watch rules)')
+    watch.add_argument('--rules', help='watch rules file (default: laravel_watch.json)')
+    watch.set_defaults(handler=cmd_watch)
+
+    serve = subparsers.add_parser('serve', help='serve several projects on free ports and report their latency')
+    serve.add_argument('project', nargs='+', help='Laravel project paths')
+    serve.add_argument('--port', type=int, help='first port to try (default: 8000)')
+    serve.add_argument('--params', nargs=argparse.REMAINDER, help='parameters passed to every `artisan serve`')
+    serve.add_argument('--probe-interval', type=float, help='seconds between health probes (default: 2)')
+    serve.add_argument('--report-every', type=float, default=10, help='seconds between status tables (default: 10)')
+    serve.add_argument('--verbose', action='store_true', help='print the servers\' output')
+    serve.set_defaults(handler=cmd_serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
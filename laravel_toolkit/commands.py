@@ -0,0 +1,68 @@
+"""Building artisan/Composer command lines and persisting saved project paths"""
+
+import json
+import os
+
+# Define a filename to store project paths
+CONFIG_FILE = 'laravel_projects.json'
+
+# Commands offered in the GUI and accepted by the CLI
+COMMANDS = [
+    "serve",
+    "migrate",
+    "migrate:rollback",
+    "make:controller",
+    "make:model",
+    "make:migration",
+    "make:seeder",
+    "make:request",
+    "make:middleware",
+    "make:event",
+    "route:list",
+    "route:cache",
+    "route:clear",
+    "cache:clear",
+    "config:cache",
+    "config:clear",
+    "view:clear",
+    "optimize",
+    "composer install",
+    "composer update",
+    "composer require",
+    "composer dump-autoload"
+]
+
+
+def build_command(command, params=''):
+    """Turn a command from the command list and its parameters into an argument list"""
+    if 'composer' in command:
+        return ['composer'] + command.split()[1:] + params.split()
+    return ['php', 'artisan', command] + params.split()
+
+
+def split_command(cmd_list):
+    """Inverse of build_command: (command, params) for an argument list"""
+    if cmd_list[:2] == ['php', 'artisan']:
+        return ' '.join(cmd_list[2:3]), ' '.join(cmd_list[3:])
+    return ' '.join(cmd_list[:2]), ' '.join(cmd_list[2:])
+
+
+def load_paths(config_file=CONFIG_FILE):
+    if os.path.exists(config_file):
+        with open(config_file, 'r') as f:
+            return json.load(f)
+    return []
+
+
+def save_paths(project_paths, config_file=CONFIG_FILE):
+    with open(config_file, 'w') as f:
+        json.dump(project_paths, f)
+
+
+def check_project(project_path):
+    """Why a project path cannot be used, or None if it looks like a Laravel project"""
+    if not os.path.isdir(project_path):
+        return 'missing'
+    if not os.path.isfile(os.path.join(project_path, 'artisan')):
+        return 'no artisan file'
+    return None
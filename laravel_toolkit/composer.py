@@ -0,0 +1,228 @@
+"""Skipping Composer installs and autoload dumps that would change nothing"""
+
+import hashlib
+import json
+import os
+import threading
+
+from .utils import fingerprint_paths
+
+COMPOSER_STATE_DIR = 'composer_state'
+# Files whose size and mtime must be unchanged since the last successful run
+COMPOSER_STATE_FILES = (
+    'composer.json',
+    'composer.lock',
+    os.path.join('vendor', 'autoload.php'),
+    os.path.join('vendor', 'composer', 'installed.json'),
+    os.path.join('vendor', 'composer', 'autoload_real.php'),
+    os.path.join('vendor', 'composer', 'autoload_static.php'),
+    os.path.join('vendor', 'composer', 'autoload_classmap.php'),
+    os.path.join('vendor', 'composer', 'autoload_psr4.php'),
+    os.path.join('vendor', 'composer', 'autoload_files.php'),
+)
+INSTALL_COMMANDS = ('install', 'i')
+DUMP_AUTOLOAD_COMMANDS = ('dump-autoload', 'dumpautoload')
+# dump-autoload options that scan source files into a classmap
+CLASSMAP_OPTIONS = ('-o', '--optimize', '-a', '--classmap-authoritative')
+
+
+def _stat_files(project_path, relative_paths):
+    stats = {}
+    for relative in relative_paths:
+        try:
+            stat = os.stat(os.path.join(project_path, relative))
+        except OSError:
+            continue
+        stats[relative] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+def _read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _package_ids(packages):
+    ids = set()
+    for package in packages:
+        reference = (package.get('dist') or {}).get('reference') or (package.get('source') or {}).get('reference')
+        ids.add((package.get('name'), package.get('version'), reference))
+    return ids
+
+
+def vendor_matches_lock(project_path, dev=True):
+    """True if vendor/ holds exactly the packages composer.lock pins"""
+    try:
+        lock = _read_json(os.path.join(project_path, 'composer.lock'))
+        installed = _read_json(os.path.join(project_path, 'vendor', 'composer', 'installed.json'))
+    except (OSError, ValueError):
+        return False
+    if not os.path.isfile(os.path.join(project_path, 'vendor', 'autoload.php')):
+        return False
+    # Composer 2 wraps the list and records whether dev packages were installed
+    if isinstance(installed, dict):
+        if installed.get('dev', True) != dev:
+            return False
+        installed = installed.get('packages', [])
+    expected = list(lock.get('packages') or []) + (list(lock.get('packages-dev') or []) if dev else [])
+    return _package_ids(expected) == _package_ids(installed)
+
+
+class ComposerSkipCache:
+    """Decide whether `composer install` / `dump-autoload` can be skipped.
+
+    After a successful run the sizes and mtimes of composer.json,
+    composer.lock, vendor/composer/installed.json, the generated autoload
+    files and the files autoloaded as a classmap are recorded (one JSON file
+    per project). A later run with the same options is skipped while none
+    of them changed. Without a record,
+    an install is still skipped if installed.json lists exactly the
+    packages pinned in composer.lock.
+
+    Installs of an identical composer.lock wait for the first one, then run
+    side by side and unpack from the Composer cache it filled instead of
+    downloading the same archives again. That happens with skip off too;
+    skip only decides whether redundant runs are skipped.
+    """
+
+    def __init__(self, state_dir=COMPOSER_STATE_DIR, cache_dir=None, skip=True):
+        self.state_dir = state_dir
+        # COMPOSER_CACHE_DIR for every Composer run; None keeps Composer's own, which projects already share
+        self.cache_dir = cache_dir
+        self.skip = skip
+        self._installing = {}  # lock hash -> project running its first install
+        self._primed = set()  # lock hashes whose packages are in the cache
+        self._waiters = {}  # lock hash -> on_ready callbacks
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def action(cmd_list):
+        """'install', 'dump-autoload', or None for commands this cache doesn't handle"""
+        if cmd_list[:1] != ['composer'] or len(cmd_list) < 2:
+            return None
+        if cmd_list[1] in INSTALL_COMMANDS:
+            return 'install'
+        if cmd_list[1] in DUMP_AUTOLOAD_COMMANDS:
+            return 'dump-autoload'
+        return None
+
+    def env(self):
+        """Environment for Composer processes, or None to inherit ours"""
+        if not self.cache_dir:
+            return None
+        return dict(os.environ, COMPOSER_CACHE_DIR=self.cache_dir)
+
+    def _state_file(self, project_path):
+        key = hashlib.sha1(os.path.abspath(project_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.state_dir, f"{key}.json")
+
+    def _load(self, project_path):
+        try:
+            return _read_json(self._state_file(project_path))
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def _record_key(cls, cmd_list):
+        """Runs are only comparable with the same action and options"""
+        return ' '.join([cls.action(cmd_list)] + sorted(cmd_list[2:]))
+
+    def _fingerprint(self, project_path, cmd_list):
+        """What a run with these options depends on"""
+        fingerprint = {'files': _stat_files(project_path, COMPOSER_STATE_FILES)}
+        # Every autoload dump scans the classmap entries; optimized ones scan the PSR directories too
+        optimized = self.action(cmd_list) == 'dump-autoload' and any(
+            option in CLASSMAP_OPTIONS for option in cmd_list[2:])
+        sources = self._autoload_paths(project_path, psr=optimized)
+        if sources:
+            fingerprint['sources'] = fingerprint_paths(project_path, sources)
+        return fingerprint
+
+    @staticmethod
+    def _autoload_paths(project_path, psr=False):
+        """Paths composer.json autoloads as a classmap, plus its PSR-4/PSR-0 directories if psr"""
+        try:
+            autoload = _read_json(os.path.join(project_path, 'composer.json')).get('autoload') or {}
+        except (OSError, ValueError, AttributeError):
+            return []
+        paths = set(autoload.get('classmap') or [])
+        if psr:
+            for kind in ('psr-4', 'psr-0'):
+                for dirs in (autoload.get(kind) or {}).values():
+                    paths.update([dirs] if isinstance(dirs, str) else dirs)
+        return sorted(path.rstrip('/') for path in paths if path)
+
+    def check(self, project_path, cmd_list):
+        """Why running cmd_list in project_path would be redundant, or None if it must run"""
+        action = self.action(cmd_list)
+        if not self.skip or action is None or not os.path.isfile(os.path.join(project_path, 'composer.lock')):
+            return None
+        record = self._load(project_path).get(self._record_key(cmd_list))
+        if record and record == self._fingerprint(project_path, cmd_list):
+            if action == 'install':
+                return "vendor/ is unchanged since the last install from this composer.lock"
+            return "composer.json, composer.lock, vendor/ and the autoload files are unchanged since the last dump"
+        if action == 'install' and vendor_matches_lock(project_path, dev='--no-dev' not in cmd_list):
+            self.record(project_path, cmd_list)
+            return "vendor/composer/installed.json already matches composer.lock"
+        return None
+
+    def record(self, project_path, cmd_list):
+        """Remember the state left by a successful run"""
+        if self.action(cmd_list) is None:
+            return
+        state = self._load(project_path)
+        state[self._record_key(cmd_list)] = self._fingerprint(project_path, cmd_list)
+        os.makedirs(self.state_dir, exist_ok=True)
+        state_file = self._state_file(project_path)
+        # Write to a temporary file first so a crash never leaves half a record
+        with open(f"{state_file}.{threading.get_ident()}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(f"{state_file}.{threading.get_ident()}.tmp", state_file)
+
+    def lock_hash(self, project_path, cmd_list):
+        """Hash of the composer.lock an install would use, for acquire(); None for other commands"""
+        if self.action(cmd_list) != 'install':
+            return None
+        try:
+            with open(os.path.join(project_path, 'composer.lock'), 'rb') as f:
+                return hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def acquire(self, key, project_path, on_ready=None):
+        """Decide whether an install may start now, without blocking.
+
+        key is the install's lock_hash(), taken beforehand so that callers
+        don't read files while holding their own locks. The first install of
+        a composer.lock runs alone and fills the shared cache; installs of
+        the same lock that come later wait for it and then all run side by
+        side. Returns (token, None) when the install may start, token being
+        for release(), or (None, project) while it has to wait for the first
+        install, which is running in project. on_ready() is then called
+        once that install has finished.
+        """
+        if key is None:
+            return None, None
+        with self._lock:
+            if key in self._primed:
+                return None, None
+            current = self._installing.get(key)
+            if current is None:
+                self._installing[key] = project_path
+                return key, None
+            if on_ready:
+                self._waiters.setdefault(key, set()).add(on_ready)
+            return None, current
+
+    def release(self, token, primed=True):
+        """End the first install of a lock; primed is False if it left the cache unfilled"""
+        if token is None:
+            return
+        with self._lock:
+            del self._installing[token]
+            if primed:
+                self._primed.add(token)
+            waiters = self._waiters.pop(token, ())
+        for on_ready in waiters:
+            on_ready()
@@ -0,0 +1,196 @@
+"""Structured run history: an SQLite database with full-text search over output"""
+
+import collections
+import csv
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from .commands import split_command
+from .telemetry import TELEMETRY_FIELDS, TELEMETRY_TREND_RUNS
+from .utils import percentile
+
+HISTORY_DB = 'command_history.db'
+HISTORY_MAX_RUNS = 5000
+HISTORY_MAX_AGE_DAYS = 90
+HISTORY_MAX_OUTPUT_CHARS = 256 * 1024
+HISTORY_PRUNE_EVERY = 50
+
+
+class HistoryStore:
+    """Run history in SQLite: one row per finished job, with FTS5 over its output.
+
+    Output is capped at HISTORY_MAX_OUTPUT_CHARS per run (the tail is kept),
+    and runs beyond HISTORY_MAX_RUNS or older than HISTORY_MAX_AGE_DAYS are
+    pruned as new ones are recorded. If the SQLite build lacks FTS5, text
+    search falls back to LIKE.
+    """
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self._lock, self.conn:
+            self.conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            self.conn.execute('PRAGMA journal_mode = WAL')
+            self.conn.executescript('''
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY,
+                    project TEXT NOT NULL,
+                    command TEXT NOT NULL,
+                    params TEXT NOT NULL DEFAULT '',
+                    started_at REAL,
+                    finished_at REAL,
+                    exit_code INTEGER,
+                    error TEXT,
+                    output_bytes INTEGER NOT NULL DEFAULT 0,
+                    output TEXT NOT NULL DEFAULT '',
+                    spawn_ms REAL,
+                    ttfb_ms REAL,
+                    wall_ms REAL,
+                    cpu_ms REAL,
+                    peak_rss_kb INTEGER,
+                    warm INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS runs_project_started ON runs (project, started_at);
+                CREATE INDEX IF NOT EXISTS runs_command_started ON runs (command, started_at);
+                CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+            ''')
+            # Databases created before telemetry was recorded lack these columns
+            columns = {row['name'] for row in self.conn.execute('PRAGMA table_info(runs)')}
+            for column, kind in zip(TELEMETRY_FIELDS + ('warm',), ('REAL', 'REAL', 'REAL', 'REAL', 'INTEGER', 'INTEGER')):
+                if column not in columns:
+                    self.conn.execute(f'ALTER TABLE runs ADD COLUMN {column} {kind}')
+            try:
+                self.conn.executescript('''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS runs_fts USING fts5(output, content='runs', content_rowid='id');
+                    CREATE TRIGGER IF NOT EXISTS runs_ai AFTER INSERT ON runs BEGIN
+                        INSERT INTO runs_fts (rowid, output) VALUES (new.id, new.output);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS runs_ad AFTER DELETE ON runs BEGIN
+                        INSERT INTO runs_fts (runs_fts, rowid, output) VALUES ('delete', old.id, old.output);
+                    END;
+                ''')
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                self.has_fts = False
+
+    def record(self, job):
+        """Store a finished job (safe to call from any thread)"""
+        command, params = split_command(job.cmd_list)
+        output = ''.join(job.output)[-HISTORY_MAX_OUTPUT_CHARS:]
+        metrics = [job.metrics.get(field) for field in TELEMETRY_FIELDS]
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT INTO runs (project, command, params, started_at, finished_at, exit_code, error, output_bytes, output, '
+                f"{', '.join(TELEMETRY_FIELDS)}, warm) VALUES ({', '.join('?' * (10 + len(TELEMETRY_FIELDS)))})",
+                (job.project_path, command, params, job.started_at or job.queued_at, job.finished_at,
+                 job.returncode, job.error, job.output_bytes, output, *metrics, job.warm))
+            self._inserts += 1
+            if self._inserts % HISTORY_PRUNE_EVERY == 1:
+                self._prune()
+
+    def _prune(self):
+        cutoff = time.time() - HISTORY_MAX_AGE_DAYS * 86400
+        self.conn.execute('DELETE FROM runs WHERE started_at < ?', (cutoff,))
+        self.conn.execute(
+            'DELETE FROM runs WHERE id <= (SELECT id FROM runs ORDER BY id DESC LIMIT 1 OFFSET ?)',
+            (HISTORY_MAX_RUNS,))
+        self.conn.execute('PRAGMA incremental_vacuum')
+
+    def search(self, project=None, command=None, status=None, since=None, text=None, limit=500):
+        """Find runs, newest first. status is 'failed', 'succeeded' or None; command matches as a prefix"""
+        clauses = []
+        args = []
+        if project:
+            clauses.append('runs.project = ?')
+            args.append(project)
+        if command:
+            clauses.append(r"runs.command LIKE ? ESCAPE '\'")
+            args.append(re.sub(r'([\\%_])', r'\\\1', command) + '%')
+        if status == 'failed':
+            clauses.append('(runs.exit_code IS NULL OR runs.exit_code != 0)')
+        elif status == 'succeeded':
+            clauses.append('runs.exit_code = 0')
+        if since:
+            clauses.append('runs.started_at >= ?')
+            args.append(since)
+        source = 'runs'
+        if text:
+            if self.has_fts:
+                source = 'runs JOIN runs_fts ON runs_fts.rowid = runs.id'
+                clauses.append('runs_fts MATCH ?')
+                # Quote every word so user input is never parsed as FTS syntax
+                args.append(' '.join('"' + word.replace('"', '""') + '"' for word in text.split()))
+            else:
+                clauses.append('runs.output LIKE ?')
+                args.append(f"%{text}%")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        query = (f"SELECT runs.id, runs.project, runs.command, runs.params, runs.started_at, runs.finished_at, "
+                 f"runs.exit_code, runs.error, runs.output_bytes FROM {source} {where} "
+                 f"ORDER BY runs.started_at DESC LIMIT ?")
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(query, args + [limit])]
+
+    def telemetry(self, project=None, command=None):
+        """Telemetry rows for finished runs, oldest first"""
+        clauses = ['wall_ms IS NOT NULL']
+        args = []
+        if project:
+            clauses.append('project = ?')
+            args.append(project)
+        if command:
+            clauses.append('command = ?')
+            args.append(command)
+        query = (f"SELECT id, project, command, params, started_at, exit_code, warm, {', '.join(TELEMETRY_FIELDS)} "
+                 f"FROM runs WHERE {' AND '.join(clauses)} ORDER BY started_at")
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(query, args)]
+
+    def stats(self):
+        """Percentiles and trend of each telemetry field, per (project, command)"""
+        groups = collections.defaultdict(list)
+        for row in self.telemetry():
+            groups[row['project'], row['command']].append(row)
+        stats = []
+        for (project, command), rows in sorted(groups.items()):
+            entry = {'project': project, 'command': command, 'runs': len(rows)}
+            for field in TELEMETRY_FIELDS:
+                values = [row[field] for row in rows if row[field] is not None]
+                for pct in (50, 90, 99):
+                    entry[f'{field}_p{pct}'] = percentile(values, pct)
+            # Trend: median wall time of the latest runs against the runs before them
+            walls = [row['wall_ms'] for row in rows]
+            recent, earlier = walls[-TELEMETRY_TREND_RUNS:], walls[:-TELEMETRY_TREND_RUNS]
+            if earlier:
+                before = percentile(earlier, 50)
+                entry['trend_pct'] = (percentile(recent, 50) - before) / before * 100 if before else None
+            else:
+                entry['trend_pct'] = None
+            stats.append(entry)
+        return stats
+
+    def export_telemetry(self, path):
+        """Write every telemetry row to path as CSV or JSON, chosen by its extension"""
+        rows = self.telemetry()
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            if path.lower().endswith('.json'):
+                json.dump(rows, f, indent=2)
+            else:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['id'])
+                writer.writeheader()
+                writer.writerows(rows)
+        return len(rows)
+
+    def output(self, run_id):
+        with self._lock:
+            row = self.conn.execute('SELECT output FROM runs WHERE id = ?', (run_id,)).fetchone()
+        return row['output'] if row else ''
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,423 @@
+"""Running commands as jobs: concurrency limits, stop control and fan-out across projects"""
+
+import collections
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from .parsers import OutputParsers
+from .streams import OUTPUT_ENCODING, StreamReader
+from .telemetry import RssSampler, wait_with_rusage
+from .utils import unique_paths
+from .warm import WorkerUnavailable
+
+# Characters of output each job keeps in memory; the full output goes to the log file
+JOB_OUTPUT_MAX_CHARS = 1024 * 1024
+
+# Errors kept per job from its parsed output
+JOB_MAX_ERRORS = 100
+
+# How many commands may run at once; further launches wait in the queue
+MAX_CONCURRENT_JOBS = 4
+
+# Fan-out runs get their own pool so they don't starve interactive commands
+FANOUT_MAX_WORKERS = max(4, (os.cpu_count() or 2) * 2)
+
+
+class Job:
+    """A single command run and its captured output"""
+
+    def __init__(self, job_id, project_path, cmd_list):
+        self.id = job_id
+        self.project_path = project_path
+        self.cmd_list = cmd_list
+        self.status = 'queued'  # queued -> running -> exited, or queued -> cancelled
+        self.returncode = None
+        self.error = None
+        self.process = None
+        self.output = collections.deque()
+        self.output_chars = 0
+        self.output_truncated = False
+        self.output_bytes = 0
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.stop_requested = False
+        self.warm = None  # True if the job ran on a warm worker
+        self.skipped = None  # Why the command was skipped as redundant, if it was
+        self.unlimited = False  # True for long-lived jobs (servers) that don't take a slot
+        self.waiting_for = None  # Project whose install of the same composer.lock this job waits for
+        self.lock_hash = None  # composer.lock hash of an install, taken when it is queued
+        self.metrics = {}
+        self.progress = None  # Latest progress event from the output parsers
+        self.errors = []  # Error events from the output parsers, at most JOB_MAX_ERRORS
+        self.done = threading.Event()
+
+    @property
+    def command(self):
+        return ' '.join(self.cmd_list)
+
+    @property
+    def title(self):
+        """Short label: the artisan/composer command without the executable"""
+        if self.cmd_list[:2] == ['php', 'artisan']:
+            return ' '.join(self.cmd_list[2:3])
+        return ' '.join(self.cmd_list[:2])
+
+    def wait(self, timeout=None):
+        """Block until the job has exited or been cancelled"""
+        return self.done.wait(timeout)
+
+    @property
+    def duration(self):
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+    def describe_status(self):
+        if self.status == 'running':
+            if self.warm:
+                return "Running (warm worker)"
+            return f"Running (pid {self.process.pid})" if self.process else "Running"
+        if self.status == 'exited':
+            if self.error:
+                return f"Failed: {self.error}"
+            if self.skipped:
+                return "Skipped (already up to date)"
+            return f"Exited with code {self.returncode}"
+        if self.status == 'queued' and self.waiting_for:
+            return f"Queued (waiting for {self.waiting_for} to install the same composer.lock)"
+        return self.status.capitalize()
+
+
+class JobManager:
+    """Run commands concurrently, at most max_concurrent at a time.
+
+    Callbacks are invoked from worker threads: on_output(job, stream, text)
+    for every chunk read, on_event(job, event) for every event the output
+    parsers find in it (see parsers.py) and on_status(job) whenever a job
+    changes state.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_JOBS, on_output=None, on_status=None, warm_pool=None,
+                 skip_cache=None, on_event=None):
+        self.max_concurrent = max_concurrent
+        self.on_output = on_output
+        self.on_status = on_status
+        self.on_event = on_event
+        # When set, eligible artisan commands go through a WarmWorkerPool first
+        self.warm_pool = warm_pool
+        # When set, composer install/dump-autoload runs go through a ComposerSkipCache
+        self.skip_cache = skip_cache
+        self.jobs = {}
+        self._pending = collections.deque()
+        self._running = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create(self, project_path, cmd_list):
+        """Register a job without scheduling it yet, so callers can set up its output first"""
+        with self._lock:
+            job = Job(next(self._ids), project_path, cmd_list)
+            self.jobs[job.id] = job
+        return job
+
+    def start(self, job, unlimited=False):
+        """Queue a job created with create() and start it as soon as a slot is free.
+
+        Jobs started with unlimited=True, such as dev servers that run until
+        stopped, start at once and are not counted against max_concurrent.
+        """
+        job.unlimited = unlimited
+        skip_cache = self.skip_cache
+        if skip_cache and not unlimited:
+            # Read composer.lock now rather than in _dispatch(), which holds the lock
+            job.lock_hash = skip_cache.lock_hash(job.project_path, job.cmd_list)
+        with self._lock:
+            if not unlimited:
+                self._pending.append(job)
+        self._notify(job)
+        if unlimited:
+            with self._lock:
+                job.status = 'running'
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        else:
+            self._dispatch()
+        return job
+
+    def submit(self, project_path, cmd_list):
+        return self.start(self.create(project_path, cmd_list))
+
+    def set_limit(self, max_concurrent):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._dispatch()
+
+    def stop(self, job_id):
+        """Cancel a queued job or terminate a running one"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        cancelled = stop_worker = False
+        with self._lock:
+            if job.status == 'queued' and job in self._pending:
+                self._pending.remove(job)
+                job.status = 'cancelled'
+                job.finished_at = time.time()
+                job.done.set()
+                cancelled = True
+            elif job.status == 'running':
+                job.stop_requested = True
+                if job.process is not None:
+                    job.process.terminate()
+                else:
+                    stop_worker = job.warm and self.warm_pool is not None
+        if cancelled:
+            self._notify(job)
+        elif stop_worker:
+            # Waits for the worker to exit, so other jobs shouldn't wait on the lock meanwhile
+            self.warm_pool.stop(job.project_path)
+
+    def remove(self, job_id):
+        """Forget a finished job"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job.status in ('exited', 'cancelled'):
+                del self.jobs[job_id]
+
+    def running(self):
+        # Other threads (e.g. the project watcher) create and remove jobs meanwhile
+        with self._lock:
+            return [job for job in self.jobs.values() if job.status == 'running']
+
+    def _notify(self, job):
+        if self.on_status:
+            self.on_status(job)
+
+    def _dispatch(self):
+        started = []
+        waiting = []
+        with self._lock:
+            blocked = []
+            while self._pending and self._running < self.max_concurrent:
+                job = self._pending.popleft()
+                token = None
+                if self.skip_cache and job.lock_hash is not None:
+                    # Installs held back for the first one of their lock wait here, without a slot
+                    token, waiting_for = self.skip_cache.acquire(job.lock_hash, job.project_path,
+                                                                 on_ready=self._dispatch)
+                    if waiting_for is not None:
+                        blocked.append(job)
+                        if job.waiting_for != waiting_for:
+                            job.waiting_for = waiting_for
+                            waiting.append(job)
+                        continue
+                job.waiting_for = None
+                job.status = 'running'
+                self._running += 1
+                # The cache that granted the token gets it back, even if the option is toggled meanwhile
+                started.append((job, (self.skip_cache, token) if token is not None else None))
+            self._pending.extendleft(reversed(blocked))
+        for job in waiting:
+            self._notify(job)
+        for job, install in started:
+            threading.Thread(target=self._run, args=(job, install), daemon=True).start()
+
+    def _run(self, job, install=None):
+        clock = {'spawned': time.perf_counter()}
+        parsers = OutputParsers(job.cmd_list)
+
+        def on_events(events):
+            for event in events:
+                if event['kind'] == 'progress':
+                    job.progress = event
+                elif event['kind'] == 'error':
+                    if len(job.errors) >= JOB_MAX_ERRORS:
+                        continue
+                    job.errors.append(event)
+                if self.on_event:
+                    self.on_event(job, event)
+
+        def on_output(stream, text):
+            if 'ttfb_ms' not in job.metrics:
+                job.metrics['ttfb_ms'] = (time.perf_counter() - clock['spawned']) * 1000
+            job.output.append(text)
+            job.output_chars += len(text)
+            while job.output_chars > JOB_OUTPUT_MAX_CHARS and len(job.output) > 1:
+                job.output_chars -= len(job.output.popleft())
+                job.output_truncated = True
+            job.output_bytes += len(text.encode(OUTPUT_ENCODING, errors='replace'))
+            if self.on_output:
+                self.on_output(job, stream, text)
+            if parsers:
+                on_events(parsers.feed(stream, text))
+
+        skip_cache = self.skip_cache if self.skip_cache and self.skip_cache.action(job.cmd_list) else None
+        try:
+            job.started_at = time.time()
+            if skip_cache:
+                job.skipped = skip_cache.check(job.project_path, job.cmd_list)
+                if job.skipped:
+                    job.returncode = 0
+                    on_output('stdout', f"[skipped: {job.skipped}]\n")
+                    return
+            warm_pool = self.warm_pool
+            if warm_pool and warm_pool.eligible(job.cmd_list) and self._run_warm(job, warm_pool, on_output):
+                return
+            job.metrics.pop('ttfb_ms', None)
+            spawn_start = time.perf_counter()
+            env = self.skip_cache.env() if self.skip_cache and job.cmd_list[:1] == ['composer'] else None
+            with subprocess.Popen(job.cmd_list, cwd=job.project_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=False, env=env) as process:
+                clock['spawned'] = time.perf_counter()
+                job.metrics['spawn_ms'] = (clock['spawned'] - spawn_start) * 1000
+                sampler = RssSampler(process.pid).start()
+                with self._lock:
+                    job.process = process
+                    if job.stop_requested:
+                        process.terminate()
+                self._notify(job)
+                StreamReader(process, on_output).run()
+                job.returncode, rusage = wait_with_rusage(process)
+                peak_kb = sampler.stop()
+            if rusage is not None:
+                job.metrics['cpu_ms'] = (rusage.ru_utime + rusage.ru_stime) * 1000
+                # ru_maxrss is the largest single process (KB on Linux, bytes on macOS)
+                maxrss = rusage.ru_maxrss // 1024 if sys.platform == 'darwin' else rusage.ru_maxrss
+                peak_kb = max(peak_kb or 0, maxrss)
+            if peak_kb:
+                job.metrics['peak_rss_kb'] = peak_kb
+            if warm_pool and warm_pool.eligible(job.cmd_list):
+                warm_pool.record('cold', time.time() - job.started_at)
+            if skip_cache and job.returncode == 0 and not job.stop_requested:
+                skip_cache.record(job.project_path, job.cmd_list)
+        except Exception as e:
+            job.error = str(e)
+        finally:
+            if parsers:
+                on_events(parsers.finish())
+            if install is not None:
+                # A skipped or failed first install leaves filling the cache to the next one
+                install[0].release(install[1], primed=job.returncode == 0 and not job.skipped and not job.error)
+            job.process = None
+            job.finished_at = time.time()
+            # Skipped runs stay out of the timing statistics
+            if not job.skipped:
+                job.metrics['wall_ms'] = (job.finished_at - job.started_at) * 1000
+            with self._lock:
+                job.status = 'exited'
+                if not job.unlimited:
+                    self._running -= 1
+            self._notify(job)
+            job.done.set()
+            self._dispatch()
+
+    def _run_warm(self, job, warm_pool, on_output):
+        """Try a job on a warm worker; False means fall back to a fresh process"""
+        job.warm = True
+        self._notify(job)
+        try:
+            job.returncode, output = warm_pool.call(job.project_path, job.cmd_list[2:],
+                                                    stopped=lambda: job.stop_requested)
+        except WorkerUnavailable as e:
+            job.warm = False
+            if job.stop_requested:
+                job.error = "stopped"
+                return True
+            on_output('stderr', f"[warm worker unavailable, running normally: {e}]\n")
+            return False
+        if output:
+            on_output('stdout', output if output.endswith('\n') else output + '\n')
+        return True
+
+
+class FanOutRun:
+    """Run one command across many projects through a bounded worker pool.
+
+    on_update(job) is called from worker threads whenever a project's job
+    produces output or changes state; on_done(run) once every job has finished.
+    Projects are made absolute and run once each, however often they are
+    listed; jobs and last_line are keyed by those paths.
+    """
+
+    def __init__(self, projects, cmd_list, max_workers=FANOUT_MAX_WORKERS, on_update=None, on_done=None,
+                 skip_cache=None):
+        self.projects = unique_paths(projects)
+        self.cmd_list = cmd_list
+        self.on_update = on_update
+        self.on_done = on_done
+        self.manager = JobManager(max_concurrent=max_workers, on_output=self._on_output, on_status=self._on_status,
+                                  skip_cache=skip_cache)
+        self.jobs = {}
+        self.last_line = {}
+        self.started_at = None
+        self.finished_at = None
+        self._remaining = len(self.projects)
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        self.started_at = time.time()
+        if not self.projects:
+            self._finish()
+            return self
+        jobs = [self.manager.create(project, self.cmd_list) for project in self.projects]
+        for job in jobs:
+            self.jobs[job.project_path] = job
+        for job in jobs:
+            self.manager.start(job)
+        return self
+
+    def stop(self):
+        for job in self.jobs.values():
+            self.manager.stop(job.id)
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    def wait(self, timeout=None):
+        """Block until every project's job has finished"""
+        return self._done.wait(timeout)
+
+    def summary(self):
+        """One row per project: path, status, exit code, duration in seconds, output bytes"""
+        return [
+            {
+                'project': project,
+                'status': 'skipped' if job.skipped else job.status,
+                'returncode': job.returncode,
+                'duration': job.duration,
+                'output_bytes': job.output_bytes,
+                'error': job.error,
+            }
+            for project, job in self.jobs.items()
+        ]
+
+    @property
+    def wall_time(self):
+        return (self.finished_at or time.time()) - self.started_at
+
+    def _on_output(self, job, stream, text):
+        lines = text.rstrip().splitlines()
+        if lines:
+            self.last_line[job.project_path] = lines[-1]
+        if self.on_update:
+            self.on_update(job)
+
+    def _on_status(self, job):
+        if self.on_update:
+            self.on_update(job)
+        if job.status in ('exited', 'cancelled'):
+            with self._lock:
+                self._remaining -= 1
+                finished = self._remaining == 0
+            if finished:
+                self._finish()
+
+    def _finish(self):
+        self.finished_at = time.time()
+        if self.on_done:
+            self.on_done(self)
+        self._done.set()
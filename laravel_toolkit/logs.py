@@ -0,0 +1,186 @@
+"""The on-disk command log"""
+
+import datetime
+import gzip
+import os
+import re
+import shutil
+import threading
+import time
+
+LOG_FILE = 'command_log.txt'
+
+# Command log file: buffered writes, flushed every LOG_FLUSH_SECONDS or once
+# LOG_BUFFER_BYTES are pending, and rotated by size or age
+LOG_BUFFER_BYTES = 64 * 1024
+LOG_FLUSH_SECONDS = 1.0
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_MAX_AGE_DAYS = 7
+LOG_BACKUP_COUNT = 5
+LOG_COMPRESS_BACKUPS = True
+# How much of the log to show when the window opens
+LOG_TAIL_BYTES = 64 * 1024
+
+
+class LogSink:
+    """Buffered, rotating writer for the command log file.
+
+    write() only appends to an in-memory buffer; a background thread flushes
+    it every flush_seconds, and writes flush immediately once buffer_bytes
+    are pending. Before a flush the file is rotated if it has grown past
+    max_bytes or its first entry is older than max_age_days. Rotated files
+    are renamed with a timestamp suffix, optionally gzipped on a background
+    thread, and only the newest backup_count are kept.
+    """
+
+    def __init__(self, path=LOG_FILE, buffer_bytes=LOG_BUFFER_BYTES, flush_seconds=LOG_FLUSH_SECONDS,
+                 max_bytes=LOG_MAX_BYTES, max_age_days=LOG_MAX_AGE_DAYS, backup_count=LOG_BACKUP_COUNT,
+                 compress=LOG_COMPRESS_BACKUPS):
+        self.path = path
+        self.buffer_bytes = buffer_bytes
+        self.flush_seconds = flush_seconds
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.backup_count = backup_count
+        self.compress = compress
+        self._buffer = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._compress_lock = threading.Lock()  # One rotated file is gzipped at a time
+        self._compressors = []
+        self._closed = threading.Event()
+        self._started_at = self._read_start_time()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def write(self, entry):
+        """Queue a log entry (safe to call from any thread)"""
+        with self._lock:
+            self._buffer.append(entry)
+            self._buffered += len(entry)
+            full = self._buffered >= self.buffer_bytes
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._file_lock:
+            with self._lock:
+                if not self._buffer:
+                    return
+                data = ''.join(self._buffer)
+                self._buffer = []
+                self._buffered = 0
+            if self._should_rotate():
+                self._rotate()
+            with open(self.path, 'a', encoding='utf-8') as log_file:
+                log_file.write(data)
+            if self._started_at is None:
+                self._started_at = time.time()
+
+    def close(self):
+        self._closed.set()
+        self.flush()
+        for thread in self._compressors:
+            thread.join()
+
+    def clear(self, entry=''):
+        """Drop pending entries and truncate the current file to entry"""
+        with self._file_lock:
+            with self._lock:
+                self._buffer = []
+                self._buffered = 0
+            with open(self.path, 'w', encoding='utf-8') as log_file:
+                log_file.write(entry)
+            self._started_at = time.time() if entry else None
+
+    def tail(self, max_bytes=LOG_TAIL_BYTES):
+        """Return roughly the last max_bytes of the log, starting at a line boundary"""
+        self.flush()
+        try:
+            with open(self.path, 'rb') as log_file:
+                size = log_file.seek(0, os.SEEK_END)
+                start = max(0, size - max_bytes)
+                log_file.seek(start)
+                data = log_file.read()
+        except FileNotFoundError:
+            return ''
+        if start > 0:
+            # Drop the partial first line
+            newline = data.find(b'\n')
+            data = data[newline + 1:] if newline >= 0 else b''
+        return data.decode('utf-8', errors='replace')
+
+    def backups(self):
+        """Rotated log files, oldest first"""
+        directory = os.path.dirname(self.path) or '.'
+        prefix = os.path.basename(self.path) + '.'
+        try:
+            names = sorted(name for name in os.listdir(directory) if name.startswith(prefix))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(directory, name) for name in names]
+
+    def _read_start_time(self):
+        """Timestamp of the first entry in the current file, if any"""
+        try:
+            with open(self.path, 'r', encoding='utf-8', errors='replace') as log_file:
+                first_line = log_file.readline(64)
+        except FileNotFoundError:
+            return None
+        match = re.match(r'\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]', first_line)
+        if match:
+            return datetime.datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S').timestamp()
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def _should_rotate(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return False
+        if size == 0:
+            return False
+        if size >= self.max_bytes:
+            return True
+        return self._started_at is not None and time.time() - self._started_at >= self.max_age
+
+    def _rotate(self):
+        suffix = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        rotated = f"{self.path}.{suffix}"
+        os.replace(self.path, rotated)
+        self._started_at = None
+        if self.compress:
+            # Runs under _file_lock, so gzip elsewhere instead of holding up writes
+            thread = threading.Thread(target=self._compress, args=(rotated,), daemon=True)
+            self._compressors = [compressor for compressor in self._compressors if compressor.is_alive()]
+            self._compressors.append(thread)
+            thread.start()
+        else:
+            self._remove_old_backups()
+
+    def _compress(self, rotated):
+        with self._compress_lock:
+            try:
+                with open(rotated, 'rb') as source, gzip.open(rotated + '.gz', 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                os.remove(rotated)
+            except OSError:
+                pass  # Already removed as an old backup
+            self._remove_old_backups()
+
+    def _remove_old_backups(self):
+        for old in self.backups()[:-self.backup_count or None]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except OSError:
+                pass
@@ -0,0 +1,278 @@
+"""Turning command output into structured events while it is read.
+
+Each job gets the parsers registered for its kind of command (migrations,
+Composer, serve, any artisan command) and they run in the job's reader
+thread, so the UI only receives events. Events are dicts with a 'kind':
+
+- progress: current, total (None when unknown) and message
+- error: severity, message, file and line (None when unknown)
+- url: the address a server is listening on, in message
+- request: a request a server handled: path in message, milliseconds in ms
+
+A parser may declare triggers, substrings without which a chunk of
+output cannot concern it; chunks that contain none of them are never
+split into lines for that parser.
+"""
+
+import re
+
+SERVE_URL_PATTERN = re.compile(r'Server running on \[([^\]]+)\]')
+# Laravel 10+: "  2024-05-01 10:00:00 /api/users ........ ~ 12.34ms" (or "~ 1s 234ms")
+REQUEST_PATTERN = re.compile(r'^\s*\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\s+(\S+)\s.*~\s*(\S.*?)\s*$')
+DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)\s*(ms|µs|μs|us|s|m|h)\b')
+DURATION_UNITS_MS = {'µs': 0.001, 'μs': 0.001, 'us': 0.001, 'ms': 1, 's': 1000, 'm': 60000, 'h': 3600000}
+
+MIGRATION_COMMANDS = ('migrate', 'db:seed')
+COMPOSER_PACKAGE_COMMANDS = ('install', 'i', 'update', 'u', 'upgrade', 'require', 'r', 'remove', 'rm', 'reinstall')
+
+PARSERS = []
+
+
+def register_parser(parser_class):
+    """Add a parser class; its applies(cmd_list) decides which commands it sees"""
+    PARSERS.append(parser_class)
+    return parser_class
+
+
+def parse_duration_ms(text):
+    """Milliseconds in a Laravel run time such as '12.34ms', '1.5s' or '1s 234ms', or None"""
+    parts = DURATION_PART.findall(text.replace(',', ''))
+    if not parts:
+        return None
+    return sum(float(value) * DURATION_UNITS_MS[unit] for value, unit in parts)
+
+
+def parse_request(line):
+    """(path, milliseconds) for a request line of `artisan serve` output, or None"""
+    match = REQUEST_PATTERN.match(line)
+    if not match:
+        return None
+    ms = parse_duration_ms(match.group(2))
+    return None if ms is None else (match.group(1), ms)
+
+
+def _artisan_command(cmd_list):
+    return cmd_list[2] if cmd_list[:2] == ['php', 'artisan'] and len(cmd_list) > 2 else None
+
+
+class OutputParser:
+    """Base class: one instance per job, so parsers may keep state between lines"""
+
+    # Substrings a chunk must contain for this parser to look at it; empty means every chunk
+    triggers = ()
+
+    @classmethod
+    def applies(cls, cmd_list):
+        return False
+
+    @property
+    def pending(self):
+        """True while a multi-line block has started, so every chunk must be seen"""
+        return False
+
+    def feed(self, line, stream, emit):
+        """Look at one line (without its newline); emit(event) for what it means"""
+
+    def finish(self, emit):
+        """Called once when the output ends"""
+
+
+@register_parser
+class PhpErrorParser(OutputParser):
+    """PHP fatal errors and exceptions as rendered by artisan.
+
+    Warnings, notices and deprecations are left alone: they rarely stop a
+    command, and leaving them out keeps the chunk filter to two substrings.
+    """
+
+    triggers = ('rror', 'xception')
+    # "PHP Fatal error:  Uncaught Error: ... in /app/Foo.php:12" or "Parse error: ... in /app/Foo.php on line 12"
+    PHP_ERROR = re.compile(r'(?:PHP )?(Fatal error|Parse error|Recoverable fatal error):'
+                           r'\s+(.*?)\s+in\s+(\S+?\.php)(?::(\d+)| on line (\d+))')
+    # "   Illuminate\Database\QueryException " then the message, then "  at app/Foo.php:12"
+    EXCEPTION_CLASS = re.compile(r'^\s+((?:[A-Z]\w*\\)*\w*(?:Exception|Error))\s*$')
+    EXCEPTION_AT = re.compile(r'^\s+at\s+(\S+?):(\d+)\s*$')
+
+    def __init__(self):
+        self.exception = None
+
+    @classmethod
+    def applies(cls, cmd_list):
+        return cmd_list[:1] in (['php'], ['composer']) and _artisan_command(cmd_list) != 'serve'
+
+    @property
+    def pending(self):
+        return self.exception is not None
+
+    def feed(self, line, stream, emit):
+        if self.exception is not None:
+            if not line.strip():
+                return
+            match = self.EXCEPTION_AT.match(line)
+            if self.exception['message'] is None and not match:
+                self.exception['message'] = line.strip()
+                return
+            if match:
+                self.exception['file'], self.exception['line'] = match.group(1), int(match.group(2))
+            self._emit_exception(emit)
+            if match:
+                return
+        match = self.PHP_ERROR.search(line)
+        if match:
+            emit({'kind': 'error', 'severity': match.group(1).lower(), 'message': match.group(2),
+                  'file': match.group(3), 'line': int(match.group(4) or match.group(5))})
+            return
+        match = self.EXCEPTION_CLASS.match(line)
+        if match:
+            self.exception = {'class': match.group(1), 'message': None, 'file': None, 'line': None}
+
+    def _emit_exception(self, emit):
+        exception, self.exception = self.exception, None
+        message = f"{exception['class']}: {exception['message']}" if exception['message'] else exception['class']
+        emit({'kind': 'error', 'severity': 'exception', 'message': message,
+              'file': exception['file'], 'line': exception['line']})
+
+    def finish(self, emit):
+        if self.exception is not None and self.exception['message'] is not None:
+            self._emit_exception(emit)
+
+
+@register_parser
+class MigrationParser(OutputParser):
+    """Migrations and seeders run so far; Laravel does not announce how many there will be"""
+
+    # Laravel 9+: "  2014_10_12_000000_create_users_table ....... 12ms DONE" (or FAIL)
+    TASK = re.compile(r'^\s+(\S+)\s+\.+\s*(?:([\d.,]+\s*\S*s)\s+)?(DONE|FAIL|RUNNING)\s*$')
+    # Laravel 8 and older
+    LEGACY = re.compile(r'^(Migrating|Migrated|Rolling back|Rolled back|Seeding|Seeded):\s+(\S+)')
+    NOTHING = re.compile(r'Nothing to (?:migrate|rollback)')
+
+    def __init__(self):
+        self.done = 0
+
+    @classmethod
+    def applies(cls, cmd_list):
+        return (_artisan_command(cmd_list) or '').startswith(MIGRATION_COMMANDS)
+
+    def feed(self, line, stream, emit):
+        match = self.TASK.match(line)
+        if match:
+            name, _, state = match.groups()
+            if state == 'RUNNING':
+                emit({'kind': 'progress', 'current': self.done, 'total': None, 'message': f"Running {name}"})
+                return
+            self.done += 1
+            emit({'kind': 'progress', 'current': self.done, 'total': None, 'message': name})
+            if state == 'FAIL':
+                emit({'kind': 'error', 'severity': 'migration', 'message': f"{name} failed", 'file': None, 'line': None})
+            return
+        match = self.LEGACY.match(line)
+        if match:
+            action, name = match.groups()
+            if action.endswith('ed') or action == 'Rolled back':
+                self.done += 1
+                emit({'kind': 'progress', 'current': self.done, 'total': None, 'message': name})
+            else:
+                emit({'kind': 'progress', 'current': self.done, 'total': None, 'message': f"{action} {name}"})
+            return
+        if self.NOTHING.search(line):
+            emit({'kind': 'progress', 'current': 0, 'total': 0, 'message': line.strip()})
+
+
+@register_parser
+class ComposerParser(OutputParser):
+    """Package operations of install/update/require/remove, and dependency resolution problems"""
+
+    OPERATIONS = re.compile(r'Package operations: (\d+) installs?, (\d+) updates?, (\d+) removals?')
+    OPERATION = re.compile(r'^\s+- (Installing|Updating|Upgrading|Downgrading|Removing) (\S+)')
+    PROGRESS_BAR = re.compile(r'^\s*(\d+)/(\d+) \[')
+    PROBLEM = re.compile(r'^\s+Problem \d+\s*$')
+
+    def __init__(self):
+        self.total = None
+        self.done = 0
+        self.problem = False
+
+    @classmethod
+    def applies(cls, cmd_list):
+        return cmd_list[:1] == ['composer'] and len(cmd_list) > 1 and cmd_list[1] in COMPOSER_PACKAGE_COMMANDS
+
+    @property
+    def pending(self):
+        return self.problem
+
+    def feed(self, line, stream, emit):
+        if self.problem:
+            if line.strip():
+                self.problem = False
+                emit({'kind': 'error', 'severity': 'composer', 'message': line.strip().lstrip('- '),
+                      'file': 'composer.json', 'line': None})
+            return
+        match = self.OPERATION.match(line)
+        if match:
+            self.done += 1
+            emit({'kind': 'progress', 'current': self.done, 'total': self.total,
+                  'message': f"{match.group(1)} {match.group(2)}"})
+            return
+        match = self.OPERATIONS.search(line)
+        if match:
+            self.total = sum(int(count) for count in match.groups())
+            emit({'kind': 'progress', 'current': 0, 'total': self.total, 'message': line.strip()})
+            return
+        match = self.PROGRESS_BAR.match(line)
+        if match:
+            emit({'kind': 'progress', 'current': int(match.group(1)), 'total': int(match.group(2)),
+                  'message': 'Installing packages'})
+            return
+        if self.PROBLEM.match(line):
+            self.problem = True
+
+
+@register_parser
+class ServeParser(OutputParser):
+    """The URL `artisan serve` listens on and the requests it logs"""
+
+    triggers = ('Server running on', '~')
+
+    @classmethod
+    def applies(cls, cmd_list):
+        return _artisan_command(cmd_list) == 'serve'
+
+    def feed(self, line, stream, emit):
+        request = parse_request(line)
+        if request:
+            emit({'kind': 'request', 'message': request[0], 'ms': request[1]})
+            return
+        match = SERVE_URL_PATTERN.search(line)
+        if match:
+            emit({'kind': 'url', 'message': match.group(1)})
+
+
+class OutputParsers:
+    """The parsers for one command, fed with its output chunks"""
+
+    def __init__(self, cmd_list, parsers=None):
+        self.parsers = [parser_class() for parser_class in (PARSERS if parsers is None else parsers)
+                        if parser_class.applies(cmd_list)]
+
+    def __bool__(self):
+        return bool(self.parsers)
+
+    def feed(self, stream, text):
+        """Events for a chunk of complete lines"""
+        events = []
+        lines = None
+        for parser in self.parsers:
+            if parser.triggers and not parser.pending and not any(trigger in text for trigger in parser.triggers):
+                continue
+            if lines is None:
+                lines = text.splitlines()
+            for line in lines:
+                parser.feed(line, stream, events.append)
+        return events
+
+    def finish(self):
+        events = []
+        for parser in self.parsers:
+            parser.finish(events.append)
+        return events
@@ -0,0 +1,305 @@
+"""Named pipelines of commands whose steps run in dependency order"""
+
+import json
+import os
+import threading
+import time
+
+from .commands import build_command
+from .jobs import FANOUT_MAX_WORKERS, JobManager
+from .utils import unique_paths
+
+PIPELINES_FILE = 'laravel_pipelines.json'
+
+# Offered until the user saves their own pipelines
+DEFAULT_PIPELINES = {
+    'Clear caches': [
+        {'name': 'cache:clear', 'command': 'cache:clear'},
+        {'name': 'config:clear', 'command': 'config:clear'},
+        {'name': 'route:clear', 'command': 'route:clear'},
+        {'name': 'view:clear', 'command': 'view:clear'},
+    ],
+    'Warm caches': [
+        {'name': 'cache:clear', 'command': 'cache:clear'},
+        {'name': 'config:clear', 'command': 'config:clear'},
+        {'name': 'view:clear', 'command': 'view:clear'},
+        {'name': 'route:cache', 'command': 'route:cache', 'needs': ['config:clear']},
+        {'name': 'optimize', 'command': 'optimize', 'needs': ['cache:clear', 'view:clear', 'route:cache']},
+    ],
+}
+
+# Step states besides the Job ones: waiting on dependencies, or never run
+# because a dependency failed
+PENDING = 'pending'
+SKIPPED = 'skipped'
+
+
+def load_pipelines(pipelines_file=PIPELINES_FILE):
+    if os.path.exists(pipelines_file):
+        with open(pipelines_file, 'r') as f:
+            return json.load(f)
+    return json.loads(json.dumps(DEFAULT_PIPELINES))
+
+
+def save_pipelines(pipelines, pipelines_file=PIPELINES_FILE):
+    with open(pipelines_file, 'w') as f:
+        json.dump(pipelines, f, indent=2)
+
+
+def parse_steps(text):
+    """Steps from the editor's text form, one per line:
+
+        [name =] command [params] [after step, step...]
+
+    The name defaults to the command. Blank lines and lines starting with
+    '#' are ignored.
+    """
+    steps = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        needs = []
+        head, sep, tail = line.rpartition(' after ')
+        if sep:
+            line = head.strip()
+            needs = [name.strip() for name in tail.split(',') if name.strip()]
+        name = None
+        if '=' in line.split()[0] or ' = ' in line:
+            name, _, line = line.partition('=')
+            name, line = name.strip(), line.strip()
+        words = line.split()
+        if not words:
+            raise ValueError(f"Line {number}: missing command")
+        size = 2 if words[0] == 'composer' and len(words) > 1 else 1
+        command = ' '.join(words[:size])
+        step = {'name': name or command, 'command': command}
+        if words[size:]:
+            step['params'] = ' '.join(words[size:])
+        if needs:
+            step['needs'] = needs
+        steps.append(step)
+    validate_steps(steps)
+    return steps
+
+
+def format_steps(steps):
+    """Inverse of parse_steps"""
+    lines = []
+    for step in steps:
+        line = ' '.join(filter(None, (step['command'], step.get('params'))))
+        if step['name'] != step['command']:
+            line = f"{step['name']} = {line}"
+        if step.get('needs'):
+            line += f" after {', '.join(step['needs'])}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def validate_steps(steps):
+    """Raise ValueError on duplicate names, unknown dependencies or cycles"""
+    names = [step['name'] for step in steps]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate step names: {', '.join(duplicates)} (name them with 'name = command')")
+    for step in steps:
+        unknown = [need for need in step.get('needs', ()) if need not in names]
+        if unknown:
+            raise ValueError(f"Step {step['name']} depends on unknown steps: {', '.join(unknown)}")
+    # Kahn's algorithm: whatever can never become ready is part of a cycle
+    remaining = {step['name']: set(step.get('needs', ())) for step in steps}
+    while remaining:
+        ready = [name for name, needs in remaining.items() if not needs]
+        if not ready:
+            raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+        for needs in remaining.values():
+            needs.difference_update(ready)
+
+
+class PipelineRun:
+    """Run a pipeline's steps in one or more projects.
+
+    A step starts as soon as every step it needs has succeeded in the same
+    project, so independent steps run side by side (up to max_workers jobs
+    across all projects). When a step fails, only the steps that depend on
+    it, directly or not, are skipped. on_update(project, step_name) and
+    on_done(run) are called from worker threads. As with FanOutRun, projects
+    are made absolute and deduplicated.
+    """
+
+    def __init__(self, steps, projects, max_workers=FANOUT_MAX_WORKERS, on_update=None, on_done=None,
+                 skip_cache=None):
+        validate_steps(steps)
+        self.steps = list(steps)
+        self.projects = unique_paths(projects)
+        self.on_update = on_update
+        self.on_done = on_done
+        self.manager = JobManager(max_concurrent=max_workers, on_status=self._on_status, skip_cache=skip_cache)
+        # (project, step name) -> Job, and the step states that have no Job
+        self.jobs = {}
+        self.states = {(project, step['name']): PENDING for project in self.projects for step in self.steps}
+        self.started_at = None
+        self.finished_at = None
+        self._keys = {}
+        self._remaining = len(self.states)
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        self.started_at = time.time()
+        if not self._remaining:
+            self._finish()
+            return self
+        for project in self.projects:
+            for step in self.steps:
+                if not step.get('needs'):
+                    self._start_step(project, step)
+        return self
+
+    def stop(self):
+        """Cancel queued and running steps; pending ones are skipped"""
+        with self._lock:
+            self._stopped = True
+            pending = [key for key, state in self.states.items() if state == PENDING]
+            for key in pending:
+                self.states[key] = SKIPPED
+                self._remaining -= 1
+            finished = bool(pending) and self._remaining == 0
+        for key in pending:
+            self._update(*key)
+        for job in list(self.jobs.values()):
+            self.manager.stop(job.id)
+        if finished:
+            self._finish()
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    def wait(self, timeout=None):
+        """Block until every step has finished or been skipped"""
+        return self._done.wait(timeout)
+
+    @property
+    def wall_time(self):
+        return (self.finished_at or time.time()) - self.started_at
+
+    def state(self, project, name):
+        """pending, skipped, or the step job's status with exited split into succeeded/failed/stopped"""
+        state = self.states[(project, name)]
+        if state == 'exited':
+            job = self.jobs[(project, name)]
+            if job.stop_requested:
+                return 'stopped'
+            return 'succeeded' if job.returncode == 0 and not job.error else 'failed'
+        return state
+
+    def summary(self):
+        """One row per project and step: state, exit code, duration in seconds, output bytes"""
+        rows = []
+        for project in self.projects:
+            for step in self.steps:
+                job = self.jobs.get((project, step['name']))
+                rows.append({
+                    'project': project,
+                    'step': step['name'],
+                    'state': self.state(project, step['name']),
+                    'returncode': job.returncode if job else None,
+                    'duration': job.duration if job else None,
+                    'output_bytes': job.output_bytes if job else 0,
+                    'error': job.error if job else None,
+                })
+        return rows
+
+    def _start_step(self, project, step):
+        key = (project, step['name'])
+        with self._lock:
+            if self._stopped:
+                # Became ready just before stop(), which only saw pending steps and started jobs
+                self.states[key] = SKIPPED
+                self._remaining -= 1
+                finished = self._remaining == 0
+                job = None
+            else:
+                job = self.manager.create(project, build_command(step['command'], step.get('params', '')))
+                self.jobs[key] = job
+                self._keys[job.id] = key
+        if job is None:
+            self._update(project, step['name'])
+            if finished:
+                self._finish()
+            return
+        self.manager.start(job)
+        if self._stopped:
+            self.manager.stop(job.id)  # stop() may have come before the job was queued
+
+    def _update(self, project, name):
+        if self.on_update:
+            self.on_update(project, name)
+
+    def _on_status(self, job):
+        key = self._keys.get(job.id)
+        if key is None:
+            return
+        project, name = key
+        ready = []
+        skipped = []
+        with self._lock:
+            if self.states[key] == SKIPPED:
+                return
+            self.states[key] = job.status
+            if job.status in ('exited', 'cancelled'):
+                self._remaining -= 1
+                if job.status == 'exited' and job.returncode == 0 and not job.error:
+                    ready = self._ready_steps(project, name)
+                    for step in ready:
+                        self.states[(project, step['name'])] = 'queued'
+                else:
+                    skipped = self._downstream(project, name)
+                    for downstream in skipped:
+                        self.states[(project, downstream)] = SKIPPED
+                    self._remaining -= len(skipped)
+            finished = self._remaining == 0
+        self._update(project, name)
+        for downstream in skipped:
+            self._update(project, downstream)
+        for step in ready:
+            self._start_step(project, step)
+        if finished:
+            self._finish()
+
+    def _ready_steps(self, project, finished):
+        """Pending steps whose dependencies have all succeeded now that finished has"""
+        ready = []
+        for step in self.steps:
+            needs = step.get('needs', ())
+            if finished in needs and self.states[(project, step['name'])] == PENDING and all(
+                    self.states[(project, need)] == 'exited' and self.jobs[(project, need)].returncode == 0
+                    and not self.jobs[(project, need)].error for need in needs):
+                ready.append(step)
+        return ready
+
+    def _downstream(self, project, failed):
+        """Names of pending steps that depend, directly or not, on failed"""
+        found = set()
+        frontier = [failed]
+        while frontier:
+            current = frontier.pop()
+            for step in self.steps:
+                if current in step.get('needs', ()) and step['name'] not in found \
+                        and self.states[(project, step['name'])] == PENDING:
+                    found.add(step['name'])
+                    frontier.append(step['name'])
+        return sorted(found)
+
+    def _finish(self):
+        with self._lock:
+            if self.finished_at is not None:
+                return
+            self.finished_at = time.time()
+        if self.on_done:
+            self.on_done(self)
+        self._done.set()
@@ -0,0 +1,287 @@
+"""Fetching, parsing, caching and searching `route:list` output"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import time
+
+from .streams import StreamReader
+from .utils import fingerprint_paths
+from .warm import WARM_COMMAND_RESTART_PATHS, WorkerUnavailable
+
+# Per-project route:list results cached on disk, invalidated when any of
+# these paths (relative to the project) change
+ROUTE_CACHE_DIR = 'route_cache'
+ROUTE_FINGERPRINT_PATHS = WARM_COMMAND_RESTART_PATHS['route:list'] + ('composer.lock',)
+ROUTE_LIST_COMMAND = ['php', '-d', 'xdebug.mode=off', 'artisan', 'route:list', '--json', '--no-ansi']
+ROUTE_FIELDS = ('method', 'uri', 'name', 'action')
+# Characters of a failed route:list's output kept for its error message
+ROUTE_ERROR_MAX_CHARS = 2000
+
+
+class RouteStreamParser:
+    """Parse route:list output incrementally as it arrives.
+
+    feed() takes the next chunk of text and returns the routes completed by
+    it. --json output is decoded one array element at a time; anything that
+    doesn't start with '[' is treated as the plain-text table and parsed
+    line by line.
+    """
+
+    _whitespace = re.compile(r'[\s,]*')
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.mode = None
+        self.header_skipped = False
+        self.finished = False
+
+    def feed(self, text):
+        self.buffer += text
+        if self.mode is None:
+            stripped = self.buffer.lstrip()
+            if not stripped:
+                return []
+            self.mode = 'json' if stripped[0] == '[' else 'text'
+            if self.mode == 'json':
+                self.buffer = stripped[1:]
+        if self.mode == 'json':
+            return self._feed_json()
+        return self._feed_text(final=False)
+
+    def close(self):
+        """Return any routes left in the buffer once the output has ended"""
+        if self.mode == 'text':
+            return self._feed_text(final=True)
+        if self.mode == 'json' and not self.finished:
+            raise ValueError("route:list JSON output ended unexpectedly")
+        return []
+
+    def _feed_json(self):
+        routes = []
+        pos = 0
+        buffer = self.buffer
+        while not self.finished:
+            pos = self._whitespace.match(buffer, pos).end()
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == ']':
+                self.finished = True
+                pos += 1
+                break
+            try:
+                route, end = self.decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # Element not complete yet; wait for more output
+            routes.append(route)
+            pos = end
+        self.buffer = buffer[pos:]
+        return routes
+
+    def _feed_text(self, final):
+        # اگر خروجی JSON نبود، سعی می‌کنیم خروجی معمولی را پردازش کنیم
+        lines = self.buffer.split('\n')
+        self.buffer = '' if final else lines.pop()
+        routes = []
+        for line in lines:
+            if not self.header_skipped:
+                if line.strip():
+                    self.header_skipped = True  # Skip header row
+                continue
+            # Split line and clean up values
+            parts = line.strip().split()
+            if len(parts) >= 3:
+                # Join remaining parts as action
+                routes.append({'method': parts[0], 'uri': parts[1], 'name': '', 'action': ' '.join(parts[2:])})
+        return routes
+
+
+def parse_route_list(output):
+    """Parse complete route:list output, either --json or the plain-text table"""
+    parser = RouteStreamParser()
+    routes = parser.feed(output)
+    routes.extend(parser.close())
+    return routes
+
+
+def fetch_routes(project_path, on_batch=None, warm_pool=None):
+    """Run route:list in a project and return the parsed routes.
+
+    Routes are parsed while the command is still writing them; on_batch(routes)
+    is called from this thread with each newly parsed group. With a warm_pool
+    the project's warm worker is tried first. Raises RuntimeError if
+    route:list fails, whatever it printed before failing.
+    """
+    if warm_pool is not None:
+        try:
+            exit_code, output = warm_pool.call(project_path, ROUTE_LIST_COMMAND[4:])
+        except WorkerUnavailable:
+            pass
+        else:
+            try:
+                routes = parse_route_list(output) if exit_code == 0 else None
+            except ValueError:
+                routes = None  # Truncated or garbled output: run route:list cold instead
+            if routes is not None:
+                if on_batch and routes:
+                    on_batch(routes)
+                return routes
+
+    started = time.perf_counter()
+    parser = RouteStreamParser()
+    routes = []
+    errors = []
+    output = []
+
+    def on_output(stream, text):
+        if stream == 'stderr':
+            errors.append(text)
+            return
+        if sum(map(len, output)) < ROUTE_ERROR_MAX_CHARS:
+            output.append(text)  # The start of stdout goes into the error message
+        batch = parser.feed(text)
+        if batch:
+            routes.extend(batch)
+            if on_batch:
+                on_batch(batch)
+
+    # اجرای دستور با پارامترهای اضافی برای جلوگیری از نوشتن در فایل لاگ
+    with subprocess.Popen(
+        ROUTE_LIST_COMMAND,
+        cwd=project_path,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    ) as process:
+        StreamReader(process, on_output).run()
+        returncode = process.wait()
+
+    if returncode != 0 or (errors and parser.mode is None):
+        # Artisan prints errors such as a parse error in routes/web.php to stdout
+        details = ''.join(errors).strip() or ''.join(output).strip()[:ROUTE_ERROR_MAX_CHARS]
+        raise RuntimeError(f"Failed to get routes (exit code {returncode}): {details}")
+    batch = parser.close()
+    if batch:
+        routes.extend(batch)
+        if on_batch:
+            on_batch(batch)
+    if warm_pool is not None:
+        warm_pool.record('cold', time.perf_counter() - started)
+    return routes
+
+
+class RouteIndex:
+    """Lowercased search keys for a route list, built once per load.
+
+    Queries are whitespace separated terms that must all match. A term is
+    either plain text, matched against every column, or scoped to one column
+    with a prefix such as method:POST or uri:/api. When a query only narrows
+    the previous one (e.g. the user typed another character) the previous
+    matches are filtered instead of rescanning every route.
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.fields = {field: [] for field in ROUTE_FIELDS}
+        self.keys = []
+        self.extend(routes)
+
+    def extend(self, routes):
+        """Index routes appended to the route list"""
+        for field, values in self.fields.items():
+            values.extend(str(route.get(field) or '').lower() for route in routes)
+        # Newline-separated so a plain term can't match across two columns
+        start = len(self.keys)
+        self.keys.extend('\n'.join(values[i] for values in self.fields.values())
+                         for i in range(start, len(self.fields['method'])))
+        self._last_terms = None
+        self._last_result = None
+
+    @staticmethod
+    def parse_query(query):
+        """Split a query into (field or None, lowercased value) terms"""
+        terms = []
+        for token in query.lower().split():
+            field, sep, value = token.partition(':')
+            if sep and field in ROUTE_FIELDS:
+                if value:
+                    terms.append((field, value))
+            else:
+                terms.append((None, token))
+        return terms
+
+    @staticmethod
+    def _implies(terms, previous):
+        """True if every route matching terms also matches previous"""
+        for prev_field, prev_value in previous:
+            if not any(prev_value in value and (prev_field is None or prev_field == field)
+                       for field, value in terms):
+                return False
+        return True
+
+    def search(self, query):
+        """Return the indexes of the routes matching query, in route order"""
+        terms = self.parse_query(query)
+        if not terms:
+            result = range(len(self.keys))
+        else:
+            if self._last_terms is not None and self._implies(terms, self._last_terms):
+                candidates = self._last_result
+            else:
+                candidates = range(len(self.keys))
+            result = candidates
+            for field, value in terms:
+                haystack = self.keys if field is None else self.fields[field]
+                result = [i for i in result if value in haystack[i]]
+        self._last_terms = terms
+        self._last_result = result
+        return result
+
+
+class RouteCache:
+    """On-disk cache of route:list results, one JSON file per project"""
+
+    def __init__(self, cache_dir=ROUTE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.warm_pool = None
+        self.hits = 0
+        self.misses = 0
+
+    def _cache_file(self, project_path):
+        key = hashlib.sha1(os.path.abspath(project_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def fingerprint(project_path):
+        """Hash of the names, sizes and mtimes of every file routing depends on"""
+        return fingerprint_paths(project_path, ROUTE_FINGERPRINT_PATHS)
+
+    def load(self, project_path):
+        """Return the cached entry (fingerprint, fetched_at, routes) or None"""
+        try:
+            with open(self._cache_file(project_path), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, project_path, fingerprint, routes):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = {'project': project_path, 'fingerprint': fingerprint, 'fetched_at': time.time(), 'routes': routes}
+        cache_file = self._cache_file(project_path)
+        # Write to a temporary file first so a crash never leaves half a cache
+        with open(cache_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(cache_file + '.tmp', cache_file)
+        return entry
+
+    def get(self, project_path, force=False, cached=None, on_batch=None):
+        """Return (entry, hit), running route:list only if the fingerprint changed"""
+        fingerprint = self.fingerprint(project_path)
+        entry = None if force else (cached or self.load(project_path))
+        if entry and entry.get('fingerprint') == fingerprint:
+            self.hits += 1
+            return entry, True
+        self.misses += 1
+        return self.store(project_path, fingerprint, fetch_routes(project_path, on_batch, self.warm_pool)), False
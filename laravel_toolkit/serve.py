@@ -0,0 +1,265 @@
+"""Running several `artisan serve` instances and measuring their latency"""
+
+import collections
+import os
+import re
+import socket
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from .commands import build_command
+from .utils import percentile
+
+SERVE_HOST = '127.0.0.1'
+# Servers get the first free port from SERVE_BASE_PORT on
+SERVE_BASE_PORT = 8000
+SERVE_PORT_RANGE = 100
+SERVE_PROBE_INTERVAL = 2.0
+SERVE_PROBE_TIMEOUT = 2.0
+# Requested by health probes and left out of request timings. Laravel 11
+# answers it out of the box; older apps return a 404 that still goes
+# through the framework, which is what the probe measures.
+SERVE_PROBE_PATH = '/up'
+# Latency samples kept per server and per path
+SERVE_SAMPLE_WINDOW = 500
+# Distinct paths tracked per server; later ones only count towards the totals
+SERVE_MAX_PATHS = 200
+
+PORT_OPTION = re.compile(r'--port[= ](\d+)')
+
+# Probes go straight to the local server, whatever proxy the environment sets
+_opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+def port_is_free(host, port):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        # Like the servers themselves, ignore connections lingering in TIME_WAIT
+        # (on Windows the option would also allow binding a port in use)
+        if os.name != 'nt':
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((host, port))
+        except OSError:
+            return False
+    return True
+
+
+class LatencyStats:
+    """Rolling window of latency samples in milliseconds"""
+
+    def __init__(self, window=SERVE_SAMPLE_WINDOW):
+        self.samples = collections.deque(maxlen=window)
+        self.count = 0
+        self.max = None
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    def percentiles(self, *ps):
+        """{p: nearest-rank percentile of the window, or None without samples}"""
+        samples = list(self.samples)
+        return {p: percentile(samples, p) for p in ps}
+
+
+class Server:
+    """One managed `artisan serve` and what has been measured about it"""
+
+    def __init__(self, job, port):
+        self.job = job
+        self.port = port
+        self.url = None
+        self.probes = LatencyStats()
+        self.probe_failures = 0
+        self.last_probe_error = None
+        self.requests = LatencyStats()
+        self.paths = {}
+
+    @property
+    def id(self):
+        return self.job.id
+
+    @property
+    def project_path(self):
+        return self.job.project_path
+
+    @property
+    def state(self):
+        """starting, up, down or stopped"""
+        if self.job.status in ('exited', 'cancelled'):
+            return 'stopped'
+        if self.url is None:
+            return 'starting'
+        return 'down' if self.last_probe_error else 'up'
+
+    def record_request(self, path, ms):
+        self.requests.add(ms)
+        stats = self.paths.get(path)
+        if stats is None and len(self.paths) < SERVE_MAX_PATHS:
+            stats = self.paths[path] = LatencyStats()
+        if stats is not None:
+            stats.add(ms)
+
+    def slowest_paths(self, limit=10):
+        """Paths by 95th percentile latency, slowest first"""
+        rows = []
+        for path, stats in list(self.paths.items()):
+            p = stats.percentiles(50, 95)
+            rows.append({'path': path, 'count': stats.count, 'p50': p[50], 'p95': p[95], 'max': stats.max})
+        rows.sort(key=lambda row: row['p95'] or 0, reverse=True)
+        return rows[:limit]
+
+    def summary(self):
+        """Status row: state, probe and request percentiles in milliseconds"""
+        probe = self.probes.percentiles(50, 95)
+        requests = self.requests.percentiles(50, 95, 99)
+        slowest = self.slowest_paths(1)
+        return {
+            'id': self.id,
+            'project': self.project_path,
+            'url': self.url,
+            'state': self.state,
+            'probe_p50': probe[50],
+            'probe_p95': probe[95],
+            'probe_failures': self.probe_failures,
+            'requests': self.requests.count,
+            'p50': requests[50],
+            'p95': requests[95],
+            'p99': requests[99],
+            'slowest': slowest[0]['path'] if slowest else None,
+        }
+
+
+class ServeManager:
+    """Several `php artisan serve` instances on free ports, with health probes.
+
+    start() gives each server the first free port from base_port unless its
+    parameters choose one. That port stays reserved until the server reports
+    its URL, which gives the port it really listens on, or stops without
+    reporting one. The 'url' and 'request' events that the output
+    parsers find in their output have to be passed to handle_event().
+    While any server is up, one thread requests probe_path from each of them
+    every probe_interval seconds and calls on_update() afterwards.
+    """
+
+    def __init__(self, job_manager, on_job=None, on_update=None, host=SERVE_HOST, base_port=SERVE_BASE_PORT,
+                 probe_interval=SERVE_PROBE_INTERVAL, probe_path=SERVE_PROBE_PATH):
+        self.job_manager = job_manager
+        self.on_job = on_job
+        self.on_update = on_update
+        self.host = host
+        self.base_port = base_port
+        self.probe_interval = probe_interval
+        self.probe_path = probe_path
+        self.servers = {}
+        self._reserved = {}  # port -> id of the server it was given to, until that server reports its URL
+        self._lock = threading.Lock()
+        self._prober = None
+        self._closed = threading.Event()
+
+    def start(self, project_path, params=''):
+        """Start serving a project; on_job(job) is called before the job starts"""
+        with self._lock:
+            match = PORT_OPTION.search(params)
+            if match:
+                port = int(match.group(1))
+                cmd_list = build_command('serve', params)
+            else:
+                port = self._free_port()
+                cmd_list = build_command('serve', params) + [f'--port={port}']
+            job = self.job_manager.create(project_path, cmd_list)
+            server = self.servers[job.id] = Server(job, port)
+            self._reserved[port] = job.id
+        if self.on_job:
+            self.on_job(job)
+        # Servers run until stopped, so they must not hold up other commands
+        self.job_manager.start(job, unlimited=True)
+        return server
+
+    def _free_port(self):
+        for port, server_id in list(self._reserved.items()):
+            server = self.servers.get(server_id)
+            if server is None or server.state == 'stopped':
+                del self._reserved[port]
+        taken = set(self._reserved)
+        taken.update(server.port for server in self.servers.values() if server.state != 'stopped')
+        for port in range(self.base_port, self.base_port + SERVE_PORT_RANGE):
+            if port not in taken and port_is_free(self.host, port):
+                return port
+        raise RuntimeError(f"No free port between {self.base_port} and {self.base_port + SERVE_PORT_RANGE - 1}")
+
+    def stop(self, server_id):
+        self.job_manager.stop(server_id)
+
+    def remove(self, server_id):
+        """Forget a stopped server"""
+        with self._lock:
+            server = self.servers.get(server_id)
+            if server is not None and server.state == 'stopped':
+                del self.servers[server_id]
+
+    def active(self):
+        return [server for server in list(self.servers.values()) if server.state != 'stopped']
+
+    def handle_event(self, job, event):
+        """Take a server's URL and request timings from its parsed output"""
+        server = self.servers.get(job.id)
+        if server is None:
+            return
+        if event['kind'] == 'url' and server.url is None:
+            with self._lock:
+                server.url = event['message']
+                try:
+                    # artisan serve moves on to the next port when the one it was given is taken
+                    server.port = urllib.parse.urlsplit(server.url).port or server.port
+                except ValueError:
+                    pass
+                for port in [port for port, server_id in self._reserved.items() if server_id == server.id]:
+                    del self._reserved[port]
+            self._start_prober()
+            if self.on_update:
+                self.on_update()
+        elif event['kind'] == 'request' and event['message'] != self.probe_path:
+            server.record_request(event['message'], event['ms'])
+
+    def probe(self, server):
+        """Request the probe path once and record the latency, or the failure"""
+        started = time.perf_counter()
+        try:
+            with _opener.open(server.url.rstrip('/') + self.probe_path, timeout=SERVE_PROBE_TIMEOUT) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            e.close()  # An error status still means the server answered
+        except (urllib.error.URLError, OSError) as e:
+            server.probe_failures += 1
+            server.last_probe_error = str(getattr(e, 'reason', e))
+            return
+        server.probes.add((time.perf_counter() - started) * 1000)
+        server.last_probe_error = None
+
+    def _start_prober(self):
+        with self._lock:
+            if self._prober is None and not self._closed.is_set():
+                self._prober = threading.Thread(target=self._probe_loop, daemon=True)
+                self._prober.start()
+
+    def _probe_loop(self):
+        while not self._closed.wait(self.probe_interval):
+            servers = [server for server in self.active() if server.url]
+            for server in servers:
+                self.probe(server)
+            if self.on_update:
+                self.on_update()
+            with self._lock:
+                if not any(server.state != 'stopped' for server in self.servers.values()):
+                    # Nothing left to probe; the next server to come up restarts the loop
+                    self._prober = None
+                    return
+
+    def close(self):
+        """Stop probing (the servers themselves keep running)"""
+        self._closed.set()
@@ -0,0 +1,121 @@
+"""Reading child process output without blocking the caller's UI"""
+
+import codecs
+import os
+import selectors
+import threading
+import time
+
+# Process output: bytes read per syscall, and how long an unterminated line
+# (e.g. an interactive prompt) may sit in the buffer before it is shown anyway
+READ_CHUNK_SIZE = 64 * 1024
+PARTIAL_LINE_FLUSH = 0.2
+OUTPUT_ENCODING = 'utf-8'
+
+
+class StreamReader:
+    """Read a process' stdout and stderr together without busy-polling.
+
+    on_output(stream, text) is called from the reading thread with stream set
+    to 'stdout' or 'stderr' and text holding one or more complete lines, with
+    '\r\n' and lone '\r' line endings turned into '\n'. An unterminated line
+    is held back until its newline arrives, PARTIAL_LINE_FLUSH seconds pass
+    without more output, or the stream closes.
+    """
+
+    def __init__(self, process, on_output, chunk_size=READ_CHUNK_SIZE):
+        self.process = process
+        self.on_output = on_output
+        self.chunk_size = chunk_size
+        self.streams = {}
+        for name in ('stdout', 'stderr'):
+            stream = getattr(process, name)
+            if stream is not None:
+                self.streams[name] = stream
+        self.decoders = {name: codecs.getincrementaldecoder(OUTPUT_ENCODING)(errors='replace')
+                         for name in self.streams}
+        self.pending = {name: '' for name in self.streams}
+        self.after_cr = {name: False for name in self.streams}
+
+    def run(self):
+        """Block until every stream reaches EOF"""
+        if os.name == 'nt':
+            # selectors cannot wait on pipes on Windows; use one blocking thread per stream
+            self._run_threaded()
+        else:
+            self._run_selector()
+
+    def _run_selector(self):
+        with selectors.DefaultSelector() as selector:
+            for name, stream in self.streams.items():
+                os.set_blocking(stream.fileno(), False)
+                selector.register(stream, selectors.EVENT_READ, name)
+            while selector.get_map():
+                # Only wake up periodically while a partial line is waiting
+                timeout = PARTIAL_LINE_FLUSH if any(self.pending.values()) else None
+                events = selector.select(timeout)
+                if not events:
+                    for name in self.streams:
+                        self._flush_pending(name)
+                    continue
+                for key, _ in events:
+                    try:
+                        data = os.read(key.fd, self.chunk_size)
+                    except BlockingIOError:
+                        continue
+                    if data:
+                        self._feed(key.data, data)
+                    else:
+                        selector.unregister(key.fileobj)
+                        self._feed(key.data, b'', final=True)
+
+    def _run_threaded(self):
+        def pump(name, stream):
+            nonlocal last_read
+            while True:
+                data = stream.read1(self.chunk_size)
+                if not data:
+                    break
+                with lock:
+                    last_read = time.monotonic()
+                    self._feed(name, data)
+            with lock:
+                self._feed(name, b'', final=True)
+
+        lock = threading.Lock()
+        last_read = time.monotonic()
+        threads = [threading.Thread(target=pump, args=item, daemon=True) for item in self.streams.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(PARTIAL_LINE_FLUSH)
+                # Same as a selector timeout: no stream has produced output for a while
+                with lock:
+                    if time.monotonic() - last_read >= PARTIAL_LINE_FLUSH:
+                        for name in self.streams:
+                            self._flush_pending(name)
+
+    def _feed(self, name, data, final=False):
+        text = self.decoders[name].decode(data, final)
+        if text:
+            if self.after_cr[name] and text[0] == '\n':
+                text = text[1:]  # Second half of a '\r\n' split across reads
+            self.after_cr[name] = text.endswith('\r')
+        text = self.pending[name] + text.replace('\r\n', '\n').replace('\r', '\n')
+        if final:
+            self.pending[name] = ''
+            complete = text
+        else:
+            cut = text.rfind('\n') + 1
+            if cut == 0 and len(text) >= self.chunk_size:
+                # A single huge line; don't let it grow without bound
+                cut = len(text)
+            complete, self.pending[name] = text[:cut], text[cut:]
+        if complete:
+            self.on_output(name, complete)
+
+    def _flush_pending(self, name):
+        if self.pending[name]:
+            text, self.pending[name] = self.pending[name], ''
+            self.on_output(name, text)
@@ -0,0 +1,71 @@
+"""Per-run resource measurements: CPU time and peak memory of a process tree"""
+
+import os
+import threading
+
+# Per-run telemetry stored alongside each history row, and how often the
+# child process tree's memory is sampled while it runs
+TELEMETRY_FIELDS = ('spawn_ms', 'ttfb_ms', 'wall_ms', 'cpu_ms', 'peak_rss_kb')
+RSS_SAMPLE_INTERVAL = 0.25
+TELEMETRY_TREND_RUNS = 5
+
+
+def process_tree_rss_kb(pid):
+    """Resident memory of a process and all its descendants (Linux /proc only)"""
+    page_kb = os.sysconf('SC_PAGE_SIZE') // 1024
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/statm') as f:
+                total += int(f.read().split()[1]) * page_kb
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError, IndexError):
+            continue
+    return total
+
+
+class RssSampler:
+    """Track the peak resident memory of a running process tree"""
+
+    def __init__(self, pid, interval=RSS_SAMPLE_INTERVAL):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if os.path.exists(f'/proc/{self.pid}/statm'):
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+        return self.peak_kb
+
+    def _run(self):
+        while True:
+            rss = process_tree_rss_kb(self.pid)
+            if rss:
+                self.peak_kb = max(self.peak_kb or 0, rss)
+            if self._stopped.wait(self.interval):
+                break
+
+
+def wait_with_rusage(process):
+    """Wait for a Popen process and return (returncode, rusage or None)"""
+    if hasattr(os, 'wait4'):
+        try:
+            _, status, rusage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            pass  # Already reaped elsewhere (e.g. by poll() during terminate())
+        else:
+            process.returncode = os.waitstatus_to_exitcode(status)
+            return process.returncode, rusage
+    return process.wait(), None
@@ -0,0 +1,48 @@
+"""Small helpers shared by the engine modules"""
+
+import hashlib
+import os
+
+
+def format_size(size):
+    """Human readable byte count"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def unique_paths(paths):
+    """Absolute versions of paths, in order and without duplicates"""
+    return list(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of values, or None if there are none"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def fingerprint_paths(project_path, relative_paths):
+    """Hash of the names, sizes and mtimes of the given files and everything under the given directories"""
+    digest = hashlib.sha1()
+    for relative in relative_paths:
+        path = os.path.join(project_path, relative)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            digest.update(f"{relative}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                file_path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                digest.update(f"{file_path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
@@ -0,0 +1,216 @@
+"""Warm worker mode: persistent PHP processes that keep Laravel booted between commands"""
+
+import collections
+import itertools
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+
+from .streams import OUTPUT_ENCODING
+from .utils import fingerprint_paths
+
+# One long-lived PHP process per project that keeps Laravel booted between
+# commands. Only commands that are safe to run repeatedly in one process are
+# sent to it; everything else takes the normal cold path.
+WARM_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artisan_worker.php')
+WARM_COMMAND_PREFIXES = ('make:', 'route:list')
+# Read when the app boots, so a change to any of them means a fresh worker
+WARM_RESTART_PATHS = ('config', '.env', 'composer.lock')
+# Also read at boot, but only some commands show what they registered
+WARM_COMMAND_RESTART_PATHS = {
+    'route:list': ('routes', os.path.join('app', 'Http'), os.path.join('bootstrap', 'cache')),
+}
+WARM_MAX_WORKERS = 4
+WARM_BOOT_TIMEOUT = 30
+WARM_CALL_TIMEOUT = 120
+
+
+class WorkerUnavailable(Exception):
+    """The warm worker could not run a command; use the cold path instead"""
+
+
+class WarmWorker:
+    """A persistent `php artisan_worker.php` process for one project"""
+
+    def __init__(self, project_path):
+        self.project_path = project_path
+        self.process = None
+        self.fingerprints = {}  # command (None for every command) -> fingerprint at boot
+        self.last_used = 0
+        self._ids = itertools.count(1)
+        self._responses = queue.SimpleQueue()
+        self._stderr = collections.deque(maxlen=50)
+        self._lock = threading.Lock()  # One call() at a time
+        self._process_lock = threading.Lock()  # Guards process and _stops, which stop() changes from any thread
+        self._stops = 0
+
+    @property
+    def alive(self):
+        process = self.process
+        return process is not None and process.poll() is None
+
+    def start(self):
+        self._terminate()
+        self.fingerprints = {None: fingerprint_paths(self.project_path, WARM_RESTART_PATHS)}
+        for command, paths in WARM_COMMAND_RESTART_PATHS.items():
+            self.fingerprints[command] = fingerprint_paths(self.project_path, paths)
+        self._responses = queue.SimpleQueue()
+        try:
+            process = subprocess.Popen(
+                ['php', '-d', 'xdebug.mode=off', WARM_WORKER_SCRIPT],
+                cwd=self.project_path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding=OUTPUT_ENCODING,
+                errors='replace',
+            )
+        except OSError as e:
+            raise WorkerUnavailable(f"worker did not start: {e}")
+        with self._process_lock:
+            self.process = process
+        threading.Thread(target=self._read_stdout, args=(process, self._responses), daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(process,), daemon=True).start()
+        ready = self._next_response(WARM_BOOT_TIMEOUT)
+        if not ready.get('ready'):
+            self._terminate()
+            raise WorkerUnavailable(f"worker did not start: {''.join(self._stderr).strip()}")
+
+    def stop(self):
+        """Terminate the worker; a call() in progress in another thread raises WorkerUnavailable"""
+        with self._process_lock:
+            self._stops += 1
+        self._terminate()
+
+    def _terminate(self):
+        with self._process_lock:
+            process, self.process = self.process, None
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def call(self, args, stopped=None):
+        """Run `artisan <args>` in the worker and return (exit_code, output).
+
+        Raises WorkerUnavailable if stop() is called before the response
+        arrives, or if stopped() returns True once the worker is running.
+        """
+        stops = self._stops
+        with self._lock:
+            if not self.alive or self._changed_since_boot(args[0] if args else None):
+                self.start()
+            with self._process_lock:
+                process = self.process if self._stops == stops else None
+            if process is None:
+                self._terminate()  # Started after stop() was called
+                raise WorkerUnavailable("worker stopped")
+            if stopped is not None and stopped():
+                raise WorkerUnavailable("stopped")
+            self.last_used = time.time()
+            request_id = next(self._ids)
+            if '--no-interaction' not in args and '-n' not in args:
+                args = list(args) + ['--no-interaction']
+            try:
+                process.stdin.write(json.dumps({'id': request_id, 'args': args}) + '\n')
+                process.stdin.flush()
+            except OSError as e:
+                self._terminate()
+                raise WorkerUnavailable(f"worker pipe closed: {e}")
+            response = self._next_response(WARM_CALL_TIMEOUT)
+            if response.get('id') != request_id:
+                self._terminate()
+                raise WorkerUnavailable("worker answered out of order")
+            return response['exit_code'], response['output']
+
+    def _changed_since_boot(self, command):
+        if fingerprint_paths(self.project_path, WARM_RESTART_PATHS) != self.fingerprints.get(None):
+            return True
+        paths = WARM_COMMAND_RESTART_PATHS.get(command)
+        return paths is not None and fingerprint_paths(self.project_path, paths) != self.fingerprints.get(command)
+
+    def _next_response(self, timeout):
+        try:
+            response = self._responses.get(timeout=timeout)
+        except queue.Empty:
+            self._terminate()
+            raise WorkerUnavailable("worker timed out")
+        if response is None:
+            self._terminate()
+            raise WorkerUnavailable(f"worker exited: {''.join(self._stderr).strip()}")
+        return response
+
+    @staticmethod
+    def _read_stdout(process, responses):
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue  # Not a protocol line, e.g. a PHP startup warning
+            if isinstance(message, dict):  # Output such as `1` or `"text"` also parses as JSON
+                responses.put(message)
+        responses.put(None)
+
+    def _read_stderr(self, process):
+        for line in process.stderr:
+            self._stderr.append(line)
+
+
+class WarmWorkerPool:
+    """Warm workers for the most recently used projects, plus cold/warm latency stats"""
+
+    def __init__(self, max_workers=WARM_MAX_WORKERS):
+        self.max_workers = max_workers
+        self.workers = collections.OrderedDict()
+        self.latencies = {'cold': collections.deque(maxlen=200), 'warm': collections.deque(maxlen=200)}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def eligible(cmd_list):
+        return (cmd_list[:2] == ['php', 'artisan'] and len(cmd_list) > 2
+                and cmd_list[2].startswith(WARM_COMMAND_PREFIXES))
+
+    def worker(self, project_path):
+        project_path = os.path.abspath(project_path)
+        with self._lock:
+            worker = self.workers.pop(project_path, None) or WarmWorker(project_path)
+            self.workers[project_path] = worker
+            while len(self.workers) > self.max_workers:
+                _, evicted = self.workers.popitem(last=False)
+                evicted.stop()
+        return worker
+
+    def call(self, project_path, args, stopped=None):
+        """Run artisan args in the project's worker; raises WorkerUnavailable on failure"""
+        if not os.path.exists(WARM_WORKER_SCRIPT):
+            raise WorkerUnavailable(f"{WARM_WORKER_SCRIPT} is missing")
+        started = time.perf_counter()
+        result = self.worker(project_path).call(args, stopped)
+        self.record('warm', time.perf_counter() - started)
+        return result
+
+    def stop(self, project_path):
+        with self._lock:
+            worker = self.workers.pop(os.path.abspath(project_path), None)
+        if worker:
+            worker.stop()
+
+    def stop_all(self):
+        with self._lock:
+            workers = list(self.workers.values())
+            self.workers.clear()
+        for worker in workers:
+            worker.stop()
+
+    def record(self, kind, seconds):
+        self.latencies[kind].append(seconds)
+
+    def median(self, kind):
+        values = sorted(self.latencies[kind])
+        return values[len(values) // 2] if values else None
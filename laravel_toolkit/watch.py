@@ -0,0 +1,510 @@
+"""Watching project files and firing rules once per burst of changes"""
+
+import collections
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import re
+import select
+import struct
+import sys
+import threading
+import time
+
+from .commands import build_command
+
+WATCH_RULES_FILE = 'laravel_watch.json'
+# Rule action that refreshes the Routes tab instead of running a command
+WATCH_REFRESH_ROUTES = '@refresh-routes'
+# Suggested for projects without rules of their own
+DEFAULT_WATCH_RULES = [
+    {'pattern': 'config/**', 'run': 'config:clear'},
+    {'pattern': '.env', 'run': 'config:clear'},
+    {'pattern': 'routes/**', 'run': WATCH_REFRESH_ROUTES},
+    {'pattern': 'resources/views/**', 'run': 'view:clear'},
+]
+# A rule fires once its files have been quiet for WATCH_DEBOUNCE seconds,
+# or WATCH_MAX_DELAY seconds after the first change of a continuous burst
+WATCH_DEBOUNCE = 0.3
+WATCH_MAX_DELAY = 3.0
+# How often the polling fallback rescans the watched directories
+WATCH_POLL_INTERVAL = 1.0
+# Never watched, whatever the rules say
+WATCH_PRUNE_DIRS = frozenset(('vendor', 'node_modules', '.git'))
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+INOTIFY_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+# Set on the nearest existing parent of a watched directory that doesn't exist (yet)
+INOTIFY_PARENT_MASK = IN_MOVED_TO | IN_CREATE | IN_ONLYDIR
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def load_watch_rules(rules_file=WATCH_RULES_FILE):
+    """{project path: [rule, ...]}"""
+    if os.path.exists(rules_file):
+        with open(rules_file, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def save_watch_rules(rules, rules_file=WATCH_RULES_FILE):
+    with open(rules_file, 'w') as f:
+        json.dump(rules, f, indent=2)
+
+
+def parse_rules(text):
+    """Rules from the editor's text form, one `pattern -> command` per line"""
+    rules = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        pattern, sep, run = line.partition('->')
+        if not sep or not pattern.strip() or not run.strip():
+            raise ValueError(f"Line {number}: expected 'pattern -> command'")
+        rules.append({'pattern': pattern.strip().strip('/'), 'run': run.strip()})
+    return rules
+
+
+def format_rules(rules):
+    """Inverse of parse_rules"""
+    return '\n'.join(f"{rule['pattern']} -> {rule['run']}" for rule in rules)
+
+
+def rule_command(run):
+    """Argument list for a rule's command, e.g. 'config:clear' or 'composer dump-autoload -o'"""
+    words = run.split()
+    size = 2 if words[0] == 'composer' and len(words) > 1 else 1
+    return build_command(' '.join(words[:size]), ' '.join(words[size:]))
+
+
+def compile_pattern(pattern):
+    """(regex over '/'-separated relative paths, [(directory, recursive)]) for a glob pattern.
+
+    '**' matches across directories, '*' and '?' within one. Only the part
+    of the tree before the first wildcard is watched, recursively when the
+    pattern can match below it.
+    """
+    glob = pattern.strip('/')
+    parts = glob.split('/')
+    base = []
+    for part in parts:
+        if any(char in part for char in '*?['):
+            break
+        base.append(part)
+    if base == parts:
+        # A literal path such as .env or config/app.php; it may also be a directory
+        return re.compile(re.escape(glob) + r'(?:/.*)?\Z'), [('/'.join(base[:-1]), False), (glob, True)]
+    regex = ''
+    i = 0
+    while i < len(glob):
+        if glob.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif glob.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif glob[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif glob[i] == '?':
+            regex += '[^/]'
+            i += 1
+        else:
+            regex += re.escape(glob[i])
+            i += 1
+    recursive = len(parts) - len(base) > 1 or '**' in glob
+    return re.compile(regex + r'\Z'), [('/'.join(base), recursive)]
+
+
+def _under(path, root):
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def _snapshot(path, recursive):
+    """{file path: (mtime_ns, size)} for the files under path"""
+    files = {}
+    stack = [path]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive and entry.name not in WATCH_PRUNE_DIRS:
+                                stack.append(entry.path)
+                        else:
+                            stat = entry.stat()
+                            files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return files
+
+
+class InotifyBackend:
+    """Kernel change notifications (Linux); blocks without using any CPU while idle.
+
+    A watched directory that is missing, or is deleted later, is waited for
+    from its nearest existing parent. Once it appears it is watched again
+    and every file already in it is reported as changed.
+    """
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._wake_read, self._wake_write = os.pipe()
+        self.dirs = {}  # watch descriptor -> (directory, recursive)
+        self.wds = {}  # directory -> watch descriptor
+        self.bases = {}  # directory passed to watch() -> recursive
+        self.missing = {}  # base that doesn't exist -> parent directory waited on
+        self.parents = {}  # watch descriptor -> parent directory watched only for missing bases
+
+    def watch(self, path, recursive):
+        self.bases[path] = recursive
+        if os.path.isdir(path):
+            self._add(path, recursive)
+        else:
+            self._wait_for(path)
+
+    def _add(self, path, recursive):
+        if path in self.wds:
+            return
+        wd = self._add_inotify_watch(path, INOTIFY_MASK)
+        # Adding a watch on a directory that already has one reuses it
+        self.parents.pop(wd, None)
+        self.dirs[wd] = (path, recursive)
+        self.wds[path] = wd
+        if recursive:
+            try:
+                with os.scandir(path) as entries:
+                    subdirs = [entry.path for entry in entries
+                               if entry.name not in WATCH_PRUNE_DIRS and entry.is_dir(follow_symlinks=False)]
+            except OSError:
+                return
+            for subdir in subdirs:
+                self._add(subdir, True)
+
+    def _add_inotify_watch(self, path, mask):
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def _wait_for(self, base):
+        """Watch base's nearest existing parent for base (or a directory above it) appearing"""
+        parent = os.path.dirname(base)
+        while not os.path.isdir(parent) and os.path.dirname(parent) != parent:
+            parent = os.path.dirname(parent)
+        self.missing[base] = parent
+        if parent not in self.wds and parent not in self.parents.values():
+            self.parents[self._add_inotify_watch(parent, INOTIFY_PARENT_MASK)] = parent
+        self._drop_unused_parents()
+
+    def _drop_unused_parents(self):
+        waited_on = set(self.missing.values())
+        for wd, parent in list(self.parents.items()):
+            if parent not in waited_on:
+                del self.parents[wd]
+                self._rm_watch(self.fd, wd)
+
+    def _created(self, path):
+        """A directory appeared at path: watch the missing bases it brings back, returning their files"""
+        files = []
+        for base in [base for base in self.missing if _under(base, path)]:
+            if not os.path.isdir(base):
+                self._wait_for(base)  # Only a parent of it so far
+                if not os.path.isdir(base):  # Unless it appeared before that parent was watched
+                    continue
+            del self.missing[base]
+            self._add(base, self.bases[base])
+            # Files may have been written before the watch was in place
+            files.append(base)
+            files.extend(_snapshot(base, self.bases[base]))
+        self._drop_unused_parents()
+        return files
+
+    def unwatch(self, path):
+        for watched in [watched for watched in self.wds if _under(watched, path)]:
+            wd = self.wds.pop(watched)
+            self.dirs.pop(wd, None)
+            self._rm_watch(self.fd, wd)
+        for base in [base for base in self.bases if _under(base, path)]:
+            del self.bases[base]
+            self.missing.pop(base, None)
+        # Bases elsewhere may have been waiting on a directory that was just unwatched
+        for base in list(self.missing):
+            self._wait_for(base)
+        self._drop_unused_parents()
+
+    def wake(self):
+        os.write(self._wake_write, b'x')
+
+    def read(self, timeout):
+        """Paths changed since the last call; waits up to timeout seconds (None: until something happens)"""
+        ready, _, _ = select.select([self.fd, self._wake_read], [], [], timeout)
+        if self._wake_read in ready:
+            os.read(self._wake_read, 512)
+        if self.fd not in ready:
+            return []
+        changes = []
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b'\0')
+                offset += INOTIFY_EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped: report every watched directory as changed
+                    changes.extend(directory for directory, _ in self.dirs.values())
+                    for base in list(self.missing):
+                        changes.extend(self._created(base))
+                    continue
+                if wd in self.parents:
+                    if mask & IN_IGNORED:
+                        # The parent went too: wait further up
+                        del self.parents[wd]
+                        for base in list(self.missing):
+                            self._wait_for(base)
+                    elif name:
+                        changes.extend(self._created(os.path.join(self.parents[wd], os.fsdecode(name))))
+                    continue
+                if wd not in self.dirs:
+                    continue
+                directory, recursive = self.dirs[wd]
+                if mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    if self.wds.get(directory) == wd:
+                        del self.wds[directory]
+                    if directory in self.bases and not os.path.isdir(directory):
+                        self._wait_for(directory)
+                    continue
+                path = os.path.join(directory, os.fsdecode(name)) if name else directory
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    if recursive and os.path.basename(path) not in WATCH_PRUNE_DIRS:
+                        self._add(path, True)
+                    if self.missing:
+                        changes.extend(self._created(path))
+                changes.append(path)
+        return changes
+
+    def close(self):
+        for fd in (self.fd, self._wake_read, self._wake_write):
+            os.close(fd)
+
+
+class PollingBackend:
+    """Portable fallback: rescan the watched directories' mtimes every interval"""
+
+    def __init__(self, interval=WATCH_POLL_INTERVAL):
+        self.interval = interval
+        self.trees = {}  # directory -> (recursive, {file path: (mtime_ns, size)})
+        self._wake = threading.Event()
+        self._next_scan = time.monotonic() + interval
+
+    def watch(self, path, recursive):
+        # A missing directory scans as empty until it appears
+        if path not in self.trees:
+            self.trees[path] = (recursive, _snapshot(path, recursive))
+
+    def unwatch(self, path):
+        for watched in [watched for watched in self.trees if _under(watched, path)]:
+            del self.trees[watched]
+
+    def wake(self):
+        self._wake.set()
+
+    def read(self, timeout):
+        now = time.monotonic()
+        wait = self._next_scan - now if timeout is None else min(timeout, self._next_scan - now)
+        if wait > 0 and self._wake.wait(wait):
+            self._wake.clear()
+        if time.monotonic() < self._next_scan:
+            return []
+        self._next_scan = time.monotonic() + self.interval
+        changes = []
+        for path, (recursive, before) in list(self.trees.items()):
+            after = _snapshot(path, recursive)
+            changes.extend(file for file in after.keys() | before.keys() if before.get(file) != after.get(file))
+            self.trees[path] = (recursive, after)
+        return changes
+
+    def close(self):
+        self.trees.clear()
+
+
+def open_backend():
+    """inotify where available, otherwise mtime polling"""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyBackend()
+        except (OSError, AttributeError):
+            pass
+    return PollingBackend()
+
+
+class ProjectWatcher:
+    """Run watch rules for projects on a background thread.
+
+    set_rules(project, rules) replaces a project's rules; each rule is
+    {'pattern': glob relative to the project, 'run': action}. When files
+    matching a rule change, on_trigger(project, rule, paths) is called from
+    the watcher thread once per burst, with every path changed in it;
+    rules running the same action share their bursts.
+    """
+
+    def __init__(self, on_trigger, debounce=WATCH_DEBOUNCE, max_delay=WATCH_MAX_DELAY, backend=None):
+        self.on_trigger = on_trigger
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.backend = backend or open_backend()
+        self.rules = {}  # project -> [(rule, regex)]
+        self._requests = collections.deque()
+        self._stopped = False
+        self._thread = None
+
+    @property
+    def backend_name(self):
+        return 'inotify' if isinstance(self.backend, InotifyBackend) else 'polling'
+
+    def set_rules(self, project, rules):
+        self._requests.append((os.path.abspath(project), list(rules)))
+        self.backend.wake()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped = True
+        self.backend.wake()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.backend.close()
+
+    def _apply(self, project, rules):
+        """Replace a project's rules and watches (watcher thread only)"""
+        self.backend.unwatch(project)
+        compiled = []
+        watches = {}
+        for rule in rules:
+            regex, directories = compile_pattern(rule['pattern'])
+            compiled.append((rule, regex))
+            for base, recursive in directories:
+                directory = os.path.join(project, *base.split('/')) if base else project
+                watches[directory] = watches.get(directory, False) or recursive
+        if compiled:
+            self.rules[project] = compiled
+        else:
+            self.rules.pop(project, None)
+        try:
+            for directory, recursive in watches.items():
+                self.backend.watch(directory, recursive)
+        except OSError as e:
+            if e.errno not in (errno.ENOSPC, errno.EMFILE) or isinstance(self.backend, PollingBackend):
+                raise
+            # Out of inotify watches: move every project to polling
+            self.backend.close()
+            self.backend = PollingBackend()
+            for other, other_rules in list(self.rules.items()):
+                self._apply(other, [rule for rule, _ in other_rules])
+
+    def _project_of(self, path):
+        owners = [project for project in self.rules if _under(path, project)]
+        return max(owners, key=len) if owners else None
+
+    def _run(self):
+        # Rules with the same action share a burst, so .env and config/** saved together clear the config once
+        pending = {}  # (project, action) -> {'rule', 'first', 'last', 'paths'}
+        while not self._stopped:
+            while self._requests:
+                self._apply(*self._requests.popleft())
+
+            now = time.monotonic()
+            deadlines = [min(burst['last'] + self.debounce, burst['first'] + self.max_delay)
+                         for burst in pending.values()]
+            timeout = max(0.0, min(deadlines) - now) if deadlines else None
+            changes = self.backend.read(timeout)
+
+            now = time.monotonic()
+            for path in changes:
+                project = self._project_of(path)
+                if project is None:
+                    continue
+                relative = os.path.relpath(path, project).replace(os.sep, '/')
+                for rule, regex in self.rules[project]:
+                    if regex.match(relative):
+                        burst = pending.setdefault((project, rule['run']),
+                                                   {'rule': rule, 'first': now, 'last': now, 'paths': set()})
+                        burst['last'] = now
+                        burst['paths'].add(relative)
+
+            for key, burst in list(pending.items()):
+                if now >= min(burst['last'] + self.debounce, burst['first'] + self.max_delay):
+                    del pending[key]
+                    if key[0] in self.rules:
+                        self.on_trigger(key[0], burst['rule'], sorted(burst['paths']))
+
+
+class WatchRunner:
+    """Run fired rules' commands on a JobManager, one at a time per project and command.
+
+    A rule firing again while its command is still queued or running does
+    not start a second copy; the command runs once more after it finishes.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self._active = set()
+        self._rerun = set()
+        self._lock = threading.Lock()
+
+    def run(self, project, run):
+        key = (project, run)
+        with self._lock:
+            if key in self._active:
+                self._rerun.add(key)
+                return
+            self._active.add(key)
+        threading.Thread(target=self._run, args=(key,), daemon=True).start()
+
+    def _run(self, key):
+        while True:
+            job = self.manager.submit(key[0], rule_command(key[1]))
+            job.wait()
+            # These jobs have no output tab that would remove them when closed
+            self.manager.remove(job.id)
+            with self._lock:
+                if key not in self._rerun:
+                    self._active.discard(key)
+                    return
+                self._rerun.discard(key)
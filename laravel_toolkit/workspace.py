@@ -0,0 +1,192 @@
+"""Discovering Laravel projects under workspace directories"""
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+WORKSPACE_INDEX = 'workspace_index.json'
+# Never descended into; directories starting with '.' are skipped as well
+SCAN_PRUNE_DIRS = frozenset(('vendor', 'node_modules'))
+SCAN_MAX_DEPTH = 8
+# Scanning is mostly waiting on the filesystem, so use more threads than cores
+SCAN_MAX_WORKERS = min(32, (os.cpu_count() or 2) * 4)
+INDEX_VERSION = 1
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def read_project(path):
+    """Name, Laravel version and PHP constraint of the project at path"""
+    info = {
+        'path': path,
+        'name': os.path.basename(path),
+        'laravel_version': None,
+        'laravel_constraint': None,
+        'php_constraint': None,
+        'composer_json_mtime_ns': _mtime_ns(os.path.join(path, 'composer.json')),
+        'composer_lock_mtime_ns': _mtime_ns(os.path.join(path, 'composer.lock')),
+    }
+    try:
+        with open(os.path.join(path, 'composer.json'), 'r', encoding='utf-8') as f:
+            composer = json.load(f)
+        require = composer.get('require') or {}
+        info['name'] = composer.get('name') or info['name']
+        info['php_constraint'] = require.get('php')
+        info['laravel_constraint'] = require.get('laravel/framework')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if info['composer_lock_mtime_ns'] is not None:
+        try:
+            with open(os.path.join(path, 'composer.lock'), 'r', encoding='utf-8') as f:
+                lock = json.load(f)
+            for package in lock.get('packages') or ():
+                if package.get('name') == 'laravel/framework':
+                    info['laravel_version'] = re.sub(r'^v', '', package.get('version') or '') or None
+                    break
+        except (OSError, ValueError, AttributeError):
+            pass
+    return info
+
+
+class WorkspaceIndex:
+    """Laravel projects found under workspace roots, persisted between scans.
+
+    A directory counts as a project when it holds both `artisan` and
+    `composer.json`; projects are not searched further. The index keeps each
+    directory's mtime and subdirectories, so a rescan lists only directories
+    whose entries changed and otherwise just stats them. Project metadata is
+    re-read when composer.json or composer.lock change.
+    """
+
+    def __init__(self, index_file=WORKSPACE_INDEX, max_workers=SCAN_MAX_WORKERS, max_depth=SCAN_MAX_DEPTH):
+        self.index_file = index_file
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.dirs = {}
+        self.roots = []
+        self.last_scan = None
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == INDEX_VERSION:
+            self.dirs = data.get('dirs', {})
+            self.roots = data.get('roots', [])
+
+    def save(self):
+        data = {'version': INDEX_VERSION, 'roots': self.roots, 'dirs': self.dirs}
+        # Write to a temporary file first so a crash never leaves half an index
+        with open(self.index_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(self.index_file + '.tmp', self.index_file)
+
+    def projects(self, roots=None):
+        """Indexed projects, optionally only those under the given roots"""
+        roots = [os.path.abspath(os.path.expanduser(root)) for root in roots] if roots else None
+        found = [entry['project'] for path, entry in self.dirs.items()
+                 if entry.get('project') and (roots is None or any(self._under(path, root) for root in roots))]
+        return sorted(found, key=lambda project: project['path'])
+
+    @staticmethod
+    def _under(path, root):
+        return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+    def scan(self, roots, on_project=None):
+        """Walk the roots in parallel and return the projects found.
+
+        on_project(project) is called from worker threads as projects are
+        found. Statistics of the scan are left in last_scan.
+        """
+        started = time.perf_counter()
+        roots = [os.path.abspath(os.path.expanduser(root)) for root in roots]
+        previous = self.dirs
+        visited = {}
+        counts = {'listed': 0, 'reused': 0}
+        lock = threading.Lock()
+        pending = [0]
+        done = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            def submit(path, depth):
+                with lock:
+                    pending[0] += 1
+                executor.submit(visit, path, depth)
+
+            def visit(path, depth):
+                try:
+                    entry, reused = self._visit(path, previous.get(path))
+                    if entry is None:
+                        return
+                    with lock:
+                        visited[path] = entry
+                        counts['reused' if reused else 'listed'] += 1
+                    if entry['project']:
+                        if on_project:
+                            on_project(entry['project'])
+                    elif depth < self.max_depth:
+                        for subdir in entry['subdirs']:
+                            submit(os.path.join(path, subdir), depth + 1)
+                finally:
+                    with lock:
+                        pending[0] -= 1
+                        if not pending[0]:
+                            done.set()
+
+            roots = [root for root in roots if os.path.isdir(root)]
+            if roots:
+                for root in roots:
+                    submit(root, 0)
+                done.wait()
+
+        # Replace what was indexed under the scanned roots; keep other roots
+        self.dirs = {path: entry for path, entry in previous.items()
+                     if not any(self._under(path, root) for root in roots)}
+        self.dirs.update(visited)
+        self.roots = sorted(set(self.roots) | set(roots))
+        self.last_scan = dict(counts, dirs=len(visited), seconds=time.perf_counter() - started)
+        self.save()
+        return self.projects(roots)
+
+    def _visit(self, path, cached):
+        """Index entry for one directory and whether the cached entry was reused"""
+        mtime = _mtime_ns(path)
+        if mtime is None:
+            return None, False
+        if cached and cached.get('mtime_ns') == mtime:
+            project = cached.get('project')
+            if project and (
+                project.get('composer_json_mtime_ns') != _mtime_ns(os.path.join(path, 'composer.json'))
+                or project.get('composer_lock_mtime_ns') != _mtime_ns(os.path.join(path, 'composer.lock'))
+            ):
+                project = read_project(path)
+            return dict(cached, project=project), True
+
+        subdirs = []
+        files = set()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SCAN_PRUNE_DIRS and not entry.name.startswith('.'):
+                                subdirs.append(entry.name)
+                        elif entry.name in ('artisan', 'composer.json'):
+                            files.add(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        project = read_project(path) if len(files) == 2 else None
+        return {'mtime_ns': mtime, 'subdirs': [] if project else sorted(subdirs), 'project': project}, False
@@ -0,0 +1,53 @@
+"""Shared fixtures: the fake php/composer from benchmarks/ and a stand-in project"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_PHP = os.path.join(ROOT, 'benchmarks', 'fake_php.py')
+FAKE_ENV = ('FAKE_LINES', 'FAKE_RATE', 'FAKE_LINE_BYTES', 'FAKE_STDERR_BYTES', 'FAKE_ROUTES', 'FAKE_EXIT',
+            'FAKE_FAIL', 'FAKE_SERVE_MS')
+
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def fake_php(tmp_path, monkeypatch):
+    """Put `php` and `composer` shims running fake_php.py first on PATH.
+
+    Returns a function that sets the FAKE_* variables for the following
+    commands, e.g. fake_php(lines=5, exit=1).
+    """
+    if os.name == 'nt':
+        pytest.skip("the fake php/composer shims need a POSIX shell")
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    for program in ('php', 'composer'):
+        shim = bin_dir / program
+        shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_PHP}" {program} "$@"\n')
+        shim.chmod(0o755)
+    monkeypatch.setenv('PATH', str(bin_dir) + os.pathsep + os.environ.get('PATH', ''))
+    for name in FAKE_ENV:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('FAKE_LINES', '5')
+
+    def configure(**values):
+        for name, value in values.items():
+            monkeypatch.setenv(f"FAKE_{name.upper()}", str(value))
+
+    return configure
+
+
+@pytest.fixture
+def make_project(tmp_path):
+    """Create empty directories that pass for Laravel projects"""
+    def make(name='project'):
+        project = tmp_path / name
+        (project / 'routes').mkdir(parents=True)
+        for relative in ('artisan', 'composer.json', 'composer.lock', os.path.join('routes', 'api.php')):
+            (project / relative).write_text('')
+        return str(project)
+
+    return make
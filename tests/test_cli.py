@@ -0,0 +1,34 @@
+from laravel_toolkit.cli import main
+from laravel_toolkit.jobs import Job
+
+
+def run(project, *argv):
+    return main(['run', '--no-history', project, *argv])
+
+
+def test_run_returns_the_command_exit_code(fake_php, make_project, capsys):
+    fake_php(lines=2, exit=3)
+    assert run(make_project(), 'migrate') == 3
+    assert capsys.readouterr().out.count('\n') == 2
+
+
+def test_run_that_cannot_start_returns_1(make_project, monkeypatch, capsys):
+    monkeypatch.setenv('PATH', '')
+    assert run(make_project(), 'migrate') == 1
+    assert 'Failed to execute command' in capsys.readouterr().err
+
+
+def test_interrupted_run_returns_130(fake_php, make_project, monkeypatch):
+    fake_php(lines=1000, rate=10)
+    wait = Job.wait
+    interrupted = []
+
+    def wait_until_interrupted(self, timeout=None):
+        if not interrupted:
+            interrupted.append(self)
+            raise KeyboardInterrupt
+        return wait(self, timeout)
+
+    monkeypatch.setattr(Job, 'wait', wait_until_interrupted)
+    assert run(make_project(), 'migrate') == 130
+    assert interrupted[0].status == 'exited'
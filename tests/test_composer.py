@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+
+import pytest
+
+from laravel_toolkit.composer import ComposerSkipCache, vendor_matches_lock
+from laravel_toolkit.jobs import FanOutRun, JobManager
+
+LOCK = {'packages': [{'name': 'laravel/framework', 'version': 'v11.0.0', 'dist': {'reference': 'abc'}}],
+        'packages-dev': [{'name': 'phpunit/phpunit', 'version': '11.0.0', 'dist': {'reference': 'def'}}]}
+INSTALL = ['composer', 'install']
+# A fake install writing 30 lines at 100 lines per second takes at least this long
+INSTALL_SECONDS = 0.25
+DUMP = ['composer', 'dump-autoload']
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ComposerSkipCache(state_dir=str(tmp_path / 'state'), cache_dir=str(tmp_path / 'composer-cache'))
+
+
+@pytest.fixture
+def project(make_project):
+    project = make_project()
+    write_json(os.path.join(project, 'composer.json'),
+               {'autoload': {'psr-4': {'App\\': 'app/'}, 'classmap': ['database/seeds']}})
+    write_json(os.path.join(project, 'composer.lock'), LOCK)
+    os.makedirs(os.path.join(project, 'app'))
+    os.makedirs(os.path.join(project, 'database', 'seeds'))
+    return project
+
+
+def add_file(project, relative):
+    with open(os.path.join(project, relative), 'w') as f:
+        f.write('<?php')
+
+
+def acquire(cache, project, cmd_list, on_ready=None):
+    return cache.acquire(cache.lock_hash(project, cmd_list), project, on_ready)
+
+
+def test_action():
+    assert ComposerSkipCache.action(['composer', 'i']) == 'install'
+    assert ComposerSkipCache.action(['composer', 'dumpautoload', '-o']) == 'dump-autoload'
+    assert ComposerSkipCache.action(['composer', 'update']) is None
+    assert ComposerSkipCache.action(['php', 'artisan', 'install']) is None
+
+
+def test_vendor_matches_lock(project):
+    installed = os.path.join(project, 'vendor', 'composer', 'installed.json')
+    write_json(installed, {'dev': True, 'packages': LOCK['packages'] + LOCK['packages-dev']})
+    assert not vendor_matches_lock(project)  # No vendor/autoload.php yet
+    add_file(project, os.path.join('vendor', 'autoload.php'))
+    assert vendor_matches_lock(project)
+    assert not vendor_matches_lock(project, dev=False)
+    write_json(installed, {'dev': False, 'packages': LOCK['packages']})
+    assert vendor_matches_lock(project, dev=False)
+
+
+def test_dump_skipped_until_something_changes(cache, project):
+    assert cache.check(project, DUMP) is None
+    cache.record(project, DUMP)
+    assert cache.check(project, DUMP)
+    add_file(project, 'composer.json')
+    assert cache.check(project, DUMP) is None
+
+
+def test_classmap_files_always_count(cache, project):
+    cache.record(project, DUMP)
+    add_file(project, os.path.join('database', 'seeds', 'UserSeeder.php'))
+    assert cache.check(project, DUMP) is None
+
+
+def test_psr4_files_only_count_for_optimized_dumps(cache, project):
+    optimized = DUMP + ['-o']
+    cache.record(project, DUMP)
+    cache.record(project, optimized)
+    add_file(project, os.path.join('app', 'User.php'))
+    assert cache.check(project, DUMP)
+    assert cache.check(project, optimized) is None
+
+
+def test_records_are_per_options(cache, project):
+    cache.record(project, INSTALL + ['--no-dev'])
+    assert cache.check(project, INSTALL + ['--no-dev'])
+    assert cache.check(project, DUMP) is None
+
+
+def test_skip_off_still_records(cache, project):
+    cache.skip = False
+    cache.record(project, DUMP)
+    assert cache.check(project, DUMP) is None
+    cache.skip = True
+    assert cache.check(project, DUMP)
+
+
+def test_env_sets_the_cache_dir_only_when_given(cache, tmp_path):
+    assert cache.env()['COMPOSER_CACHE_DIR'] == str(tmp_path / 'composer-cache')
+    assert ComposerSkipCache(state_dir=str(tmp_path / 'state')).env() is None
+
+
+def test_only_the_first_install_of_a_lock_is_exclusive(cache, make_project, project):
+    other = make_project('other')
+    write_json(os.path.join(other, 'composer.lock'), LOCK)
+    ready = threading.Event()
+
+    token, waiting_for = acquire(cache, project, INSTALL)
+    assert token is not None and waiting_for is None
+    assert acquire(cache, other, INSTALL, on_ready=ready.set) == (None, project)
+    assert acquire(cache, other, DUMP) == (None, None)
+    cache.release(token)
+    assert ready.is_set()
+    # Primed: every later install of this lock may start at once
+    assert acquire(cache, other, INSTALL) == (None, None)
+    assert acquire(cache, project, INSTALL) == (None, None)
+
+
+def test_failed_first_install_hands_over(cache, make_project, project):
+    other = make_project('other')
+    write_json(os.path.join(other, 'composer.lock'), LOCK)
+    token, _ = acquire(cache, project, INSTALL)
+    cache.release(token, primed=False)
+    token, waiting_for = acquire(cache, other, INSTALL)
+    assert token is not None and waiting_for is None
+
+
+def test_different_locks_do_not_wait(cache, make_project, project):
+    other = make_project('other')
+    write_json(os.path.join(other, 'composer.lock'), {'packages': []})
+    token, _ = acquire(cache, project, INSTALL)
+    other_token, waiting_for = acquire(cache, other, INSTALL)
+    assert other_token is not None and waiting_for is None
+    cache.release(token)
+    cache.release(other_token)
+
+
+def test_installs_after_the_first_run_side_by_side(fake_php, cache, make_project):
+    fake_php(lines=30, rate=100)
+    projects = [make_project(f"p{i}") for i in range(4)]
+    for project in projects:
+        write_json(os.path.join(project, 'composer.lock'), LOCK)
+    run = FanOutRun(projects, INSTALL, max_workers=4, skip_cache=cache).start()
+    assert run.wait(30)
+    first = run.jobs[projects[0]]
+    rest = [run.jobs[project] for project in projects[1:]]
+    assert all(job.returncode == 0 for job in run.jobs.values())
+    assert all(job.started_at >= first.started_at + INSTALL_SECONDS for job in rest)
+    # Started together, not one after another
+    assert max(job.started_at for job in rest) < min(job.finished_at for job in rest)
+
+
+def test_installs_wait_for_the_first_one_with_skip_off(fake_php, cache, make_project):
+    fake_php(lines=30, rate=100)
+    cache.skip = False
+    first, second = make_project('a'), make_project('b')
+    for project in (first, second):
+        write_json(os.path.join(project, 'composer.lock'), LOCK)
+    manager = JobManager(max_concurrent=2, skip_cache=cache)
+    jobs = [manager.submit(project, INSTALL) for project in (first, second)]
+    for job in jobs:
+        assert job.wait(30) and job.returncode == 0 and not job.skipped
+    assert jobs[1].started_at >= jobs[0].started_at + INSTALL_SECONDS
+
+
+def test_lock_is_hashed_outside_the_job_lock(fake_php, cache, project, monkeypatch):
+    manager = JobManager(skip_cache=cache)
+    lock_hash = cache.lock_hash
+    locked = []
+
+    def hash_lock(project_path, cmd_list):
+        locked.append(manager._lock.locked())
+        return lock_hash(project_path, cmd_list)
+
+    monkeypatch.setattr(cache, 'lock_hash', hash_lock)
+    assert manager.submit(project, INSTALL).wait(30)
+    assert locked == [False]
+
+
+def test_waiting_install_leaves_its_slot_to_other_jobs(fake_php, cache, make_project):
+    fake_php(lines=30, rate=100)
+    first, second, third = (make_project(name) for name in ('a', 'b', 'c'))
+    for project in (first, second):
+        write_json(os.path.join(project, 'composer.lock'), LOCK)
+    manager = JobManager(max_concurrent=2, skip_cache=cache)
+    installing = manager.submit(first, INSTALL)
+    waiting = manager.submit(second, INSTALL)
+    other = manager.submit(third, ['php', 'artisan', 'list'])
+    for job in (installing, waiting, other):
+        assert job.wait(30)
+    assert other.started_at < installing.finished_at
+    assert waiting.started_at >= installing.started_at + INSTALL_SECONDS
+
+
+def test_jobs_skip_redundant_runs(fake_php, cache, project):
+    manager = JobManager(skip_cache=cache)
+    first = manager.submit(project, DUMP)
+    assert first.wait(30)
+    assert first.returncode == 0 and not first.skipped
+    second = manager.submit(project, DUMP)
+    assert second.wait(30)
+    assert second.returncode == 0 and second.skipped
+    assert ''.join(second.output).startswith("[skipped: ")
+    # A failed run is not recorded, so the next one runs again
+    fake_php(exit=1)
+    failed = manager.submit(project, DUMP + ['-o'])
+    assert failed.wait(30) and failed.returncode == 1
+    fake_php(exit=0)
+    again = manager.submit(project, DUMP + ['-o'])
+    assert again.wait(30) and again.returncode == 0 and not again.skipped
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+from laravel_toolkit.history import HistoryStore
+from laravel_toolkit.jobs import Job
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    yield store
+    store.close()
+
+
+def record(store, project, cmd_list, returncode=0, output='', started_at=None, error=None):
+    job = Job(0, project, cmd_list)
+    job.started_at = started_at or time.time()
+    job.finished_at = job.started_at + 1
+    job.returncode = returncode
+    job.error = error
+    job.output.append(output)
+    job.output_bytes = len(output.encode('utf-8'))
+    store.record(job)
+
+
+def commands(runs):
+    return [f"{run['command']} {run['params']}".strip() for run in runs]
+
+
+def test_search_filters(store):
+    now = time.time()
+    record(store, '/a', ['php', 'artisan', 'migrate', '--force'], started_at=now - 3 * 86400)
+    record(store, '/a', ['php', 'artisan', 'make:model', 'User'], returncode=1, started_at=now - 2)
+    record(store, '/b', ['composer', 'install'], started_at=now - 1)
+    record(store, '/b', ['no-such-program'], returncode=None, error='not found', started_at=now)
+    assert commands(store.search()) == ['no-such-program', 'composer install', 'make:model User', 'migrate --force']
+    assert commands(store.search(project='/a')) == ['make:model User', 'migrate --force']
+    assert commands(store.search(command='make:')) == ['make:model User']
+    assert commands(store.search(status='failed')) == ['no-such-program', 'make:model User']
+    assert commands(store.search(status='succeeded', since=now - 86400)) == ['composer install']
+    assert commands(store.search(limit=1)) == ['no-such-program']
+
+
+def test_command_prefix_is_not_a_pattern(store):
+    record(store, '/a', ['php', 'artisan', 'migrate'])
+    assert store.search(command='%') == []
+    assert store.search(command='_igrate') == []
+
+
+@pytest.mark.parametrize('fts', [True, False])
+def test_text_search(store, fts):
+    if fts and not store.has_fts:
+        pytest.skip("this SQLite build has no FTS5")
+    store.has_fts = fts
+    record(store, '/a', ['php', 'artisan', 'migrate'], output='SQLSTATE[HY000] Connection refused\n')
+    record(store, '/a', ['php', 'artisan', 'tinker'], output='Class "App\\Foo" not found\n')
+    assert commands(store.search(text='connection refused')) == ['migrate']
+    assert commands(store.search(text='"App\\Foo" NOT')) == ['tinker']
+    assert store.search(text='refused tinker') == []
+
+
+def test_output_keeps_the_tail(store, monkeypatch):
+    monkeypatch.setattr('laravel_toolkit.history.HISTORY_MAX_OUTPUT_CHARS', 10)
+    record(store, '/a', ['php', 'artisan', 'list'], output='0123456789abcdef')
+    [run] = store.search()
+    assert store.output(run['id']) == '6789abcdef'
+    assert run['output_bytes'] == 16
+    assert store.output(run['id'] + 1) == ''
+
+
+def test_retention(store, monkeypatch):
+    monkeypatch.setattr('laravel_toolkit.history.HISTORY_MAX_RUNS', 3)
+    # Prunes after the 1st and 6th insert
+    monkeypatch.setattr('laravel_toolkit.history.HISTORY_PRUNE_EVERY', 5)
+    record(store, '/a', ['php', 'artisan', 'old'], started_at=time.time() - 365 * 86400)
+    for number in range(5):
+        record(store, '/a', ['php', 'artisan', f"run{number}"], output=f"run {number}")
+    assert commands(store.search()) == ['run4', 'run3', 'run2']
+    if store.has_fts:
+        # Pruned runs leave the full-text index too
+        assert store.search(text='run') == store.search()
+
+
+def test_history_survives_reopening(tmp_path):
+    path = str(tmp_path / 'history.db')
+    store = HistoryStore(path)
+    record(store, '/a', ['php', 'artisan', 'migrate'])
+    store.close()
+    store = HistoryStore(path)
+    assert commands(store.search()) == ['migrate']
+    store.close()
@@ -0,0 +1,195 @@
+import os
+import sys
+import threading
+import time
+
+from laravel_toolkit.jobs import FanOutRun, JobManager
+
+
+def python(code):
+    return [sys.executable, '-c', code]
+
+
+def wait_until(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def finished(*jobs):
+    return lambda: all(job.status in ('exited', 'cancelled') for job in jobs)
+
+
+def test_job_output_and_exit_code(tmp_path):
+    seen = []
+    statuses = []
+    manager = JobManager(on_output=lambda job, stream, text: seen.append((stream, text)),
+                         on_status=lambda job: statuses.append(job.status))
+    job = manager.submit(str(tmp_path), python("import os, sys; print(os.getcwd()); sys.exit(3)"))
+    wait_until(finished(job))
+    assert job.returncode == 3 and job.error is None
+    assert ''.join(job.output) == f"{tmp_path}\n"
+    assert seen == [('stdout', f"{tmp_path}\n")]
+    assert statuses[0] == 'queued' and statuses[-1] == 'exited'
+
+
+def test_job_keeps_only_the_newest_output(tmp_path, monkeypatch):
+    monkeypatch.setattr('laravel_toolkit.jobs.JOB_OUTPUT_MAX_CHARS', 100)
+    job = JobManager().submit(str(tmp_path), python(
+        "import time\nfor i in range(20):\n    print(f'line {i:02} ' + 'x' * 11, flush=True)\n    time.sleep(0.01)"))
+    wait_until(finished(job))
+    output = ''.join(job.output)
+    assert job.output_truncated and len(output) < 200
+    assert output.endswith("line 19 xxxxxxxxxxx\n")
+    assert job.output_bytes == 20 * 20
+
+def test_missing_executable_is_a_job_error(tmp_path):
+    job = JobManager().submit(str(tmp_path), ['no-such-program-here'])
+    wait_until(finished(job))
+    assert job.status == 'exited' and job.returncode is None and job.error
+    assert job.describe_status().startswith("Failed:")
+
+
+def test_at_most_max_concurrent_jobs_run(tmp_path):
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def on_status(job):
+        with lock:
+            if job.status == 'running' and job.process is not None and job not in running:
+                running.append(job)
+            elif job.status == 'exited' and job in running:
+                running.remove(job)
+            peak.append(len(running))
+
+    manager = JobManager(max_concurrent=2, on_status=on_status)
+    jobs = [manager.submit(str(tmp_path), python("import time; time.sleep(0.2)")) for _ in range(5)]
+    assert [job.status for job in jobs].count('queued') == 3
+    wait_until(finished(*jobs))
+    assert max(peak) == 2
+    assert all(job.returncode == 0 for job in jobs)
+
+
+def test_stop_cancels_queued_and_terminates_running(tmp_path):
+    manager = JobManager(max_concurrent=1)
+    running = manager.submit(str(tmp_path), python("import time; time.sleep(30)"))
+    queued = manager.submit(str(tmp_path), python("print('never')"))
+    wait_until(lambda: running.process is not None)
+    manager.stop(queued.id)
+    assert queued.status == 'cancelled'
+    manager.stop(running.id)
+    wait_until(finished(running))
+    assert running.stop_requested and running.returncode != 0
+    assert not queued.output
+
+
+def test_remove_only_forgets_finished_jobs(tmp_path):
+    manager = JobManager(max_concurrent=1)
+    running = manager.submit(str(tmp_path), python("import time; time.sleep(30)"))
+    manager.remove(running.id)
+    assert running.id in manager.jobs
+    assert manager.running() == [running]
+    manager.stop(running.id)
+    wait_until(finished(running))
+    manager.remove(running.id)
+    assert running.id not in manager.jobs
+
+
+
+def test_jobs_can_be_listed_and_removed_while_others_finish(tmp_path):
+    manager = JobManager(max_concurrent=8)
+    errors = []
+    done = threading.Event()
+
+    def poll():
+        while not done.is_set():
+            try:
+                manager.running()
+                for job_id in list(manager.jobs):
+                    manager.remove(job_id)
+            except RuntimeError as e:  # dictionary changed size during iteration
+                errors.append(e)
+
+    pollers = [threading.Thread(target=poll) for _ in range(2)]
+    for poller in pollers:
+        poller.start()
+    jobs = [manager.submit(str(tmp_path), python("pass")) for _ in range(40)]
+    wait_until(finished(*jobs), timeout=30)
+    done.set()
+    for poller in pollers:
+        poller.join()
+    assert errors == []
+
+def test_set_limit_starts_queued_jobs(tmp_path):
+    manager = JobManager(max_concurrent=1)
+    jobs = [manager.submit(str(tmp_path), python("import time; time.sleep(0.3)")) for _ in range(3)]
+    assert [job.status for job in jobs] == ['running', 'queued', 'queued']
+    manager.set_limit(3)
+    assert [job.status for job in jobs] == ['running'] * 3
+    wait_until(finished(*jobs))
+
+
+def test_title():
+    manager = JobManager()
+    assert manager.create('.', ['php', 'artisan', 'migrate', '--force']).title == 'migrate'
+    assert manager.create('.', ['composer', 'install', '-o']).title == 'composer install'
+
+
+def make_projects(tmp_path, count):
+    projects = []
+    for i in range(count):
+        project = tmp_path / f"p{i}"
+        project.mkdir()
+        projects.append(str(project))
+    return projects
+
+
+def test_fan_out_runs_in_every_project(tmp_path):
+    projects = make_projects(tmp_path, 5)
+    done = threading.Event()
+    run = FanOutRun(projects, python("import os; print('in', os.path.basename(os.getcwd()))"), max_workers=2,
+                    on_done=lambda run: done.set()).start()
+    assert done.wait(10) and run.done
+    assert [row['project'] for row in run.summary()] == projects
+    assert all(row['status'] == 'exited' and row['returncode'] == 0 for row in run.summary())
+    assert run.last_line == {project: f"in p{i}" for i, project in enumerate(projects)}
+    assert all(row['output_bytes'] == len(f"in p{i}\n") for i, row in enumerate(run.summary()))
+
+
+def test_fan_out_failures_stay_per_project(tmp_path):
+    projects = make_projects(tmp_path, 3)
+    done = threading.Event()
+    run = FanOutRun(projects, python("import os, sys; sys.exit(os.getcwd().endswith('p1'))"),
+                    on_done=lambda run: done.set()).start()
+    assert done.wait(10)
+    assert [row['returncode'] for row in run.summary()] == [0, 1, 0]
+
+
+def test_fan_out_stop(tmp_path):
+    projects = make_projects(tmp_path, 4)
+    done = threading.Event()
+    run = FanOutRun(projects, python("import time; time.sleep(30)"), max_workers=2,
+                    on_done=lambda run: done.set()).start()
+    wait_until(lambda: all(job.process for job in run.jobs.values() if job.status == 'running'))
+    run.stop()
+    assert done.wait(10)
+    assert sorted(row['status'] for row in run.summary()) == ['cancelled', 'cancelled', 'exited', 'exited']
+
+
+def test_fan_out_runs_each_project_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    projects = make_projects(tmp_path, 2)
+    done = threading.Event()
+    run = FanOutRun([projects[0], 'p0', projects[1], projects[0] + os.sep], python("print('ok')"),
+                    on_done=lambda run: done.set()).start()
+    assert done.wait(10)
+    assert [row['project'] for row in run.summary()] == projects
+    assert len(run.manager.jobs) == 2
+
+
+def test_fan_out_over_no_projects():
+    done = threading.Event()
+    run = FanOutRun([], ['true'], on_done=lambda run: done.set()).start()
+    assert done.is_set() and run.summary() == []
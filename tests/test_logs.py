@@ -0,0 +1,110 @@
+import gzip
+import os
+import shutil
+import threading
+
+import pytest
+
+from laravel_toolkit.logs import LogSink
+
+
+@pytest.fixture
+def make_sink(tmp_path):
+    sinks = []
+
+    def make(**options):
+        options.setdefault('flush_seconds', 60)
+        sink = LogSink(str(tmp_path / 'command_log.txt'), **options)
+        sinks.append(sink)
+        return sink
+
+    yield make
+    for sink in sinks:
+        sink.close()
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_writes_are_buffered_until_flush(make_sink):
+    sink = make_sink()
+    sink.write("[2024-05-01 10:00:00] one\n")
+    assert not os.path.exists(sink.path)
+    sink.flush()
+    assert read(sink.path) == "[2024-05-01 10:00:00] one\n"
+
+
+def test_a_full_buffer_flushes_at_once(make_sink):
+    sink = make_sink(buffer_bytes=10)
+    sink.write("short\n")
+    assert not os.path.exists(sink.path)
+    sink.write("long enough\n")
+    assert read(sink.path) == "short\nlong enough\n"
+
+
+def test_rotates_by_size_and_keeps_backup_count(make_sink):
+    sink = make_sink(max_bytes=100, backup_count=2)
+    for number in range(5):
+        sink.write(f"entry {number} " + 'x' * 100 + "\n")
+        sink.flush()
+    sink.close()
+    backups = sink.backups()
+    assert len(backups) == 2 and all(path.endswith('.gz') for path in backups)
+    with gzip.open(backups[-1], 'rt', encoding='utf-8') as f:
+        assert f.read().startswith("entry 3 ")
+    assert read(sink.path).startswith("entry 4 ")
+
+
+def test_writes_continue_while_a_backup_is_compressed(make_sink, monkeypatch):
+    release = threading.Event()
+    copyfileobj = shutil.copyfileobj
+
+    def copy(source, target):
+        release.wait(10)
+        copyfileobj(source, target)
+
+    monkeypatch.setattr(shutil, 'copyfileobj', copy)
+    sink = make_sink(max_bytes=10)
+    sink.write("first entry\n")
+    sink.flush()
+    sink.write("second entry\n")
+    sink.flush()  # Rotates
+    sink.write("third entry\n")
+    sink.flush()  # Rotates again while the first backup is still being compressed
+    assert read(sink.path) == "third entry\n"
+    release.set()
+    sink.close()
+    backups = sink.backups()
+    assert len(backups) == 2 and all(path.endswith('.gz') for path in backups)
+    with gzip.open(backups[0], 'rt', encoding='utf-8') as f:
+        assert f.read() == "first entry\n"
+
+
+def test_rotates_by_age_without_compression(make_sink, tmp_path):
+    (tmp_path / 'command_log.txt').write_text("[2000-01-01 00:00:00] old\n")
+    sink = make_sink(compress=False)
+    sink.write("[2024-05-01 10:00:00] new\n")
+    sink.flush()
+    [backup] = sink.backups()
+    assert read(backup) == "[2000-01-01 00:00:00] old\n"
+    assert read(sink.path) == "[2024-05-01 10:00:00] new\n"
+
+
+def test_tail_starts_at_a_line_boundary(make_sink):
+    sink = make_sink()
+    assert sink.tail() == ''
+    for number in range(100):
+        sink.write(f"line {number}\n")
+    tail = sink.tail(max_bytes=30)
+    assert tail.endswith("line 99\n")
+    assert tail.startswith("line ") and len(tail) <= 30
+
+
+def test_clear_drops_pending_entries(make_sink):
+    sink = make_sink()
+    sink.write("pending\n")
+    sink.clear("cleared\n")
+    sink.flush()
+    assert read(sink.path) == "cleared\n"
@@ -0,0 +1,196 @@
+import pytest
+
+from laravel_toolkit.jobs import JOB_MAX_ERRORS, JobManager
+from laravel_toolkit.parsers import (
+    PARSERS, ComposerParser, MigrationParser, OutputParser, OutputParsers, PhpErrorParser, ServeParser,
+    parse_duration_ms, parse_request, register_parser,
+)
+
+MIGRATE = ['php', 'artisan', 'migrate']
+COMPOSER_INSTALL = ['composer', 'install']
+
+
+def parse(cmd_list, *chunks):
+    parsers = OutputParsers(cmd_list)
+    events = []
+    for chunk in chunks:
+        events.extend(parsers.feed('stdout', chunk))
+    return events + parsers.finish()
+
+
+def kinds(parsers):
+    return [type(parser) for parser in parsers.parsers]
+
+
+@pytest.mark.parametrize('cmd_list, expected', [
+    (MIGRATE, [PhpErrorParser, MigrationParser]),
+    (['php', 'artisan', 'db:seed', '--class=UserSeeder'], [PhpErrorParser, MigrationParser]),
+    (['php', 'artisan', 'serve'], [ServeParser]),
+    (['php', 'artisan', 'route:list'], [PhpErrorParser]),
+    (COMPOSER_INSTALL, [PhpErrorParser, ComposerParser]),
+    (['composer', 'dump-autoload'], [PhpErrorParser]),
+    (['npm', 'run', 'dev'], []),
+])
+def test_parsers_for_command(cmd_list, expected):
+    assert kinds(OutputParsers(cmd_list)) == expected
+
+
+def test_registered_parsers_apply_to_their_commands():
+    class CountingParser(OutputParser):
+        @classmethod
+        def applies(cls, cmd_list):
+            return cmd_list[:1] == ['npm']
+
+        def __init__(self):
+            self.lines = 0
+
+        def feed(self, line, stream, emit):
+            self.lines += 1
+            emit({'kind': 'progress', 'current': self.lines, 'total': None, 'message': line})
+
+    assert register_parser(CountingParser) is CountingParser
+    try:
+        parsers = OutputParsers(['npm', 'run', 'dev'])
+        assert kinds(parsers) == [CountingParser]
+        assert [event['current'] for event in parsers.feed('stdout', "a\nb\n")] == [1, 2]
+    finally:
+        PARSERS.remove(CountingParser)
+    assert not OutputParsers(['npm', 'run', 'dev'])
+
+
+def test_chunks_without_triggers_are_not_split(monkeypatch):
+    seen = []
+    monkeypatch.setattr(PhpErrorParser, 'feed', lambda self, line, stream, emit: seen.append(line))
+    parsers = OutputParsers(['php', 'artisan', 'route:list'])
+    parsers.feed('stdout', "GET /users\nPOST /users\n")
+    assert seen == []
+    parsers.feed('stdout', "ok\nan error\n")
+    assert seen == ['ok', 'an error']
+
+
+def test_php_fatal_error():
+    [event] = parse(MIGRATE, "PHP Fatal error:  Uncaught Error: Class \"Foo\" not found in /app/routes/web.php:12\n")
+    assert event == {'kind': 'error', 'severity': 'fatal error', 'message': 'Uncaught Error: Class "Foo" not found',
+                     'file': '/app/routes/web.php', 'line': 12}
+
+
+def test_parse_error_on_line():
+    [event] = parse(['php', 'artisan', 'list'], "Parse error: syntax error, unexpected '}' in /app/a.php on line 7\n")
+    assert (event['severity'], event['file'], event['line']) == ('parse error', '/app/a.php', 7)
+
+
+def test_exception_block_split_across_chunks():
+    # The class name arrives in a chunk with no trigger left for the rest of the block
+    events = parse(['php', 'artisan', 'tinker'],
+                   "\n   Illuminate\\Database\\QueryException \n",
+                   "\n  SQLSTATE[HY000] [2002] Connection refused\n\n",
+                   "  at vendor/laravel/framework/src/Illuminate/Database/Connection.php:813\n    809▕\n")
+    assert events == [{'kind': 'error', 'severity': 'exception',
+                       'message': 'Illuminate\\Database\\QueryException: SQLSTATE[HY000] [2002] Connection refused',
+                       'file': 'vendor/laravel/framework/src/Illuminate/Database/Connection.php', 'line': 813}]
+
+
+def test_exception_without_location_is_reported_at_the_end():
+    [event] = parse(['php', 'artisan', 'tinker'], "   RuntimeException \n\n  Something broke\n")
+    assert (event['message'], event['file'], event['line']) == ('RuntimeException: Something broke', None, None)
+
+
+def test_migrations():
+    events = parse(MIGRATE,
+                   "\n   INFO  Running migrations.\n\n",
+                   "  2014_10_12_000000_create_users_table .............. 12.45ms DONE\n",
+                   "  2019_08_19_000000_create_failed_jobs_table ........ 3ms FAIL\n")
+    assert [(event['kind'], event.get('current'), event['message']) for event in events] == [
+        ('progress', 1, '2014_10_12_000000_create_users_table'),
+        ('progress', 2, '2019_08_19_000000_create_failed_jobs_table'),
+        ('error', None, '2019_08_19_000000_create_failed_jobs_table failed'),
+    ]
+
+
+def test_legacy_migrations_and_nothing_to_migrate():
+    events = parse(MIGRATE, "Migrating: 2014_create_users\nMigrated:  2014_create_users (12.3ms)\n")
+    assert [(event['current'], event['message']) for event in events] == [
+        (0, 'Migrating 2014_create_users'), (1, '2014_create_users')]
+    [event] = parse(MIGRATE, "\n   INFO  Nothing to migrate.\n")
+    assert (event['current'], event['total']) == (0, 0)
+
+
+def test_composer_package_operations():
+    events = parse(COMPOSER_INSTALL,
+                   "Package operations: 2 installs, 1 update, 0 removals\n",
+                   "  - Installing psr/log (3.0.0): Extracting archive\n"
+                   "  - Upgrading monolog/monolog (3.4.0 => 3.5.0): Extracting archive\n",
+                   "  - Installing laravel/framework (v11.0.0): Extracting archive\n")
+    assert [(event['current'], event['total'], event['message']) for event in events] == [
+        (0, 3, 'Package operations: 2 installs, 1 update, 0 removals'),
+        (1, 3, 'Installing psr/log'),
+        (2, 3, 'Upgrading monolog/monolog'),
+        (3, 3, 'Installing laravel/framework'),
+    ]
+
+
+def test_composer_problem():
+    events = parse(COMPOSER_INSTALL, "Your requirements could not be resolved.\n\n  Problem 1\n",
+                   "    - laravel/framework v11 requires php ^8.2\n")
+    assert events == [{'kind': 'error', 'severity': 'composer', 'message': 'laravel/framework v11 requires php ^8.2',
+                       'file': 'composer.json', 'line': None}]
+
+
+@pytest.mark.parametrize('text, ms', [('12.34ms', 12.34), ('1s 234ms', 1234), ('1.5s', 1500), ('850µs', 0.85),
+                                      ('1m 2s', 62000), ('soon', None)])
+def test_parse_duration_ms(text, ms):
+    assert parse_duration_ms(text) == (pytest.approx(ms) if ms is not None else None)
+
+
+def test_serve_events():
+    assert parse_request("  2024-05-01 10:00:00 /api/users ........ ~ 0.5ms") == ('/api/users', 0.5)
+    events = parse(['php', 'artisan', 'serve'], "\n   INFO  Server running on [http://127.0.0.1:8001].\n\n",
+                   "  2024-05-01 10:00:00 /api/users ........ ~ 1s 2ms\n")
+    assert events == [{'kind': 'url', 'message': 'http://127.0.0.1:8001'},
+                      {'kind': 'request', 'message': '/api/users', 'ms': 1002}]
+
+
+
+def test_job_keeps_latest_progress_and_capped_errors(fake_php, make_project):
+    class LineParser(OutputParser):
+        @classmethod
+        def applies(cls, cmd_list):
+            return cmd_list[:2] == ['composer', 'update']
+
+        def __init__(self):
+            self.lines = 0
+
+        def feed(self, line, stream, emit):
+            self.lines += 1
+            emit({'kind': 'progress', 'current': self.lines, 'total': None, 'message': line})
+            emit({'kind': 'error', 'severity': 'composer', 'message': line, 'file': None, 'line': None})
+
+    fake_php(lines=JOB_MAX_ERRORS + 20)
+    events = []
+    register_parser(LineParser)
+    try:
+        job = JobManager(on_event=lambda job, event: events.append(event)).submit(make_project(),
+                                                                                 ['composer', 'update'])
+        assert job.wait(30)
+    finally:
+        PARSERS.remove(LineParser)
+    assert job.progress['current'] == JOB_MAX_ERRORS + 20
+    assert len(job.errors) == JOB_MAX_ERRORS
+    # Errors beyond the cap are dropped, not passed on
+    assert len(events) == (JOB_MAX_ERRORS + 20) + JOB_MAX_ERRORS
+
+
+def test_job_collects_events(fake_php, make_project):
+    events = []
+    manager = JobManager(on_event=lambda job, event: events.append(event))
+    job = manager.submit(make_project(), ['php', 'artisan', 'route:list', '--json'])
+    job.wait()
+    assert job.returncode == 0 and job.errors == [] and events == []
+
+    fake_php(exit=1)
+    job = manager.submit(make_project('broken'), ['php', 'artisan', 'route:list'])
+    job.wait()
+    assert job.returncode == 1
+    assert job.errors == events
+    assert [(event['message'], event['file'], event['line']) for event in job.errors] == [
+        ('ParseError: syntax error, unexpected token "}"', 'routes/web.php', 18)]
@@ -0,0 +1,86 @@
+import pytest
+
+from laravel_toolkit.pipelines import DEFAULT_PIPELINES, PipelineRun, format_steps, parse_steps, validate_steps
+
+
+def test_parse_steps_names_params_and_needs():
+    steps = parse_steps("""
+        # comment
+        cache:clear
+        routes = route:cache --quiet after cache:clear
+        composer install --no-dev
+        optimize after routes, composer install
+    """)
+    assert steps == [
+        {'name': 'cache:clear', 'command': 'cache:clear'},
+        {'name': 'routes', 'command': 'route:cache', 'params': '--quiet', 'needs': ['cache:clear']},
+        {'name': 'composer install', 'command': 'composer install', 'params': '--no-dev'},
+        {'name': 'optimize', 'command': 'optimize', 'needs': ['routes', 'composer install']},
+    ]
+
+
+@pytest.mark.parametrize('steps', DEFAULT_PIPELINES.values())
+def test_format_steps_round_trips(steps):
+    assert parse_steps(format_steps(steps)) == steps
+
+
+@pytest.mark.parametrize('text, message', [
+    ("cache:clear\ncache:clear", "Duplicate step names: cache:clear"),
+    ("optimize after missing", "unknown steps: missing"),
+    ("a = list after b\nb = list after c\nc = list after a\nd = list", "Dependency cycle between: a, b, c"),
+])
+def test_validate_steps_rejects(text, message):
+    with pytest.raises(ValueError, match=message):
+        parse_steps(text)
+
+
+def test_validate_steps_accepts_a_diamond():
+    validate_steps([
+        {'name': 'a', 'command': 'list'},
+        {'name': 'b', 'command': 'list', 'needs': ['a']},
+        {'name': 'c', 'command': 'list', 'needs': ['a']},
+        {'name': 'd', 'command': 'list', 'needs': ['b', 'c']},
+    ])
+
+
+def run_pipeline(text, projects, **options):
+    run = PipelineRun(parse_steps(text), projects, **options).start()
+    assert run.wait(30)
+    return run
+
+
+def test_steps_start_after_their_dependencies(fake_php, make_project):
+    project = make_project()
+    run = run_pipeline("a = list\nb = list after a\nc = list after a\nd = list after b, c", [project])
+    assert {row['step']: row['state'] for row in run.summary()} == dict.fromkeys('abcd', 'succeeded')
+    for step, needs in (('b', 'a'), ('c', 'a'), ('d', 'b'), ('d', 'c')):
+        assert run.jobs[(project, step)].started_at >= run.jobs[(project, needs)].finished_at
+
+
+def test_failure_skips_only_dependent_steps(fake_php, make_project):
+    fake_php(fail='route:cache')
+    first, second = make_project('one'), make_project('two')
+    run = run_pipeline("cache:clear\nroute:cache after cache:clear\noptimize after route:cache\n"
+                       "view:clear after cache:clear", [first, second])
+    for project in (first, second):
+        assert run.state(project, 'cache:clear') == 'succeeded'
+        assert run.state(project, 'route:cache') == 'failed'
+        assert run.state(project, 'optimize') == 'skipped'
+        assert run.state(project, 'view:clear') == 'succeeded'
+        assert (project, 'optimize') not in run.jobs
+
+
+def test_stop_skips_steps_that_just_became_ready(fake_php, make_project):
+    project = make_project()
+
+    def on_update(project, name):
+        # Runs after b has been marked ready but before it is started
+        if name == 'a' and run.state(project, 'a') == 'succeeded':
+            run.stop()
+
+    run = PipelineRun(parse_steps("a = list\nb = list after a"), [project], on_update=on_update)
+    run.start()
+    assert run.wait(30)
+    assert run.state(project, 'a') == 'succeeded'
+    assert run.state(project, 'b') == 'skipped'
+    assert (project, 'b') not in run.jobs
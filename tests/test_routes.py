@@ -0,0 +1,196 @@
+import json
+import os
+import sys
+
+import pytest
+
+from laravel_toolkit.routes import RouteCache, RouteIndex, RouteStreamParser, fetch_routes, parse_route_list
+
+ROUTES = [
+    {'domain': None, 'method': 'GET|HEAD', 'uri': 'api/users', 'name': 'users.index',
+     'action': 'App\\Http\\Controllers\\UserController@index', 'middleware': ['api']},
+    {'domain': None, 'method': 'POST', 'uri': 'api/users', 'name': 'users.store',
+     'action': 'App\\Http\\Controllers\\UserController@store', 'middleware': ['api', 'auth']},
+    {'domain': None, 'method': 'GET|HEAD', 'uri': 'login', 'name': 'login',
+     'action': 'Closure "[x, y]"', 'middleware': []},
+]
+
+
+def feed_in_chunks(text, size):
+    parser = RouteStreamParser()
+    routes = []
+    for start in range(0, len(text), size):
+        routes.extend(parser.feed(text[start:start + size]))
+    routes.extend(parser.close())
+    return routes
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 10000])
+def test_json_split_anywhere(size):
+    text = '\n' + json.dumps(ROUTES, indent=2) + '\n'
+    assert feed_in_chunks(text, size) == ROUTES
+
+
+def test_json_routes_returned_as_soon_as_complete():
+    parser = RouteStreamParser()
+    text = json.dumps(ROUTES)
+    second = text.index('}, {') + 3
+    assert parser.feed(text[:second + 5]) == ROUTES[:1]
+    assert parser.feed(text[second + 5:]) == ROUTES[1:]
+    assert parser.close() == []
+
+
+def test_truncated_json_raises_on_close():
+    parser = RouteStreamParser()
+    parser.feed(json.dumps(ROUTES)[:-1])
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+@pytest.mark.parametrize('size', [1, 5, 10000])
+def test_text_table(size):
+    text = ("  Method   URI         Action\n"
+            "  GET|HEAD api/users  App\\Http\\Controllers\\UserController@index\n"
+            "\n"
+            "  POST     api/users  App\\Http\\Controllers\\UserController@store")
+    assert feed_in_chunks(text, size) == [
+        {'method': 'GET|HEAD', 'uri': 'api/users', 'name': '', 'action': 'App\\Http\\Controllers\\UserController@index'},
+        {'method': 'POST', 'uri': 'api/users', 'name': '', 'action': 'App\\Http\\Controllers\\UserController@store'},
+    ]
+
+
+def test_empty_output():
+    assert parse_route_list('') == []
+    assert parse_route_list('[]') == []
+
+
+def many_routes(count):
+    methods = ('GET|HEAD', 'POST', 'PUT|PATCH', 'DELETE')
+    return [{'method': methods[i % 4], 'uri': f"api/v1/resource{i // 4}", 'name': f"resource{i // 4}.{i % 4}",
+             'action': f"App\\Http\\Controllers\\Resource{i // 4}Controller"} for i in range(count)]
+
+
+def scan(routes, query):
+    """What RouteIndex.search must return, computed the slow way"""
+    terms = RouteIndex.parse_query(query)
+    return [i for i, route in enumerate(routes)
+            if all(any(value in str(route[field]).lower() for field in ([field] if field else route))
+                   for field, value in terms)]
+
+
+def test_parse_query():
+    assert RouteIndex.parse_query('  Users method:POST uri: bogus:x ') == [
+        (None, 'users'), ('method', 'post'), (None, 'bogus:x')]
+
+
+@pytest.mark.parametrize('queries', [
+    ['r', 're', 'resource1', 'resource12', 'resource1', 'resource'],
+    ['method:p', 'method:po', 'method:post uri:9', 'method:post uri:99', 'method:put'],
+    ['store', 'store get', 'get', 'resource3 controller', 'delete resource3 controller'],
+    ['uri:resource1', 'resource1', 'name:resource1'],
+])
+def test_search_matches_a_full_scan_while_typing(queries):
+    routes = many_routes(400)
+    index = RouteIndex(routes)
+    for query in queries:
+        assert list(index.search(query)) == scan(routes, query), query
+
+
+def test_search_sees_routes_added_later():
+    routes = many_routes(8)
+    index = RouteIndex(routes[:4])
+    assert list(index.search('resource1')) == []
+    index.extend(routes[4:])
+    assert list(index.search('resource1')) == [4, 5, 6, 7]
+
+
+def test_a_term_cannot_match_across_columns():
+    index = RouteIndex([{'method': 'GET', 'uri': 'abc', 'name': 'def', 'action': 'x'}])
+    assert list(index.search('cdef')) == []
+    assert list(index.search('c')) == [0]
+
+
+def route_list_command(monkeypatch, code, *args):
+    monkeypatch.setattr('laravel_toolkit.routes.ROUTE_LIST_COMMAND', [sys.executable, '-c', code, *args])
+
+
+def test_fetch_routes_streams_batches(fake_php, make_project):
+    fake_php(routes=2000)
+    batches = []
+    routes = fetch_routes(make_project(), on_batch=batches.append)
+    assert len(routes) == 2000 and len(batches) > 1
+    assert sum(batches, []) == routes
+    assert routes[1]['uri'] == 'api/v1/resource0/{id}'
+
+
+def test_fetch_routes_raises_when_only_errors_are_printed(monkeypatch, tmp_path):
+    route_list_command(monkeypatch, "import sys; sys.stderr.write('Could not open input file: artisan')")
+    with pytest.raises(RuntimeError, match='Could not open input file'):
+        fetch_routes(str(tmp_path))
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = tmp_path / 'project'
+    (project / 'routes').mkdir(parents=True)
+    (project / 'routes' / 'api.php').write_text('<?php')
+    (project / 'composer.lock').write_text('{}')
+    return str(project)
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    calls = []
+
+    def fetch_routes(project_path, *args):
+        calls.append(project_path)
+        return ROUTES
+
+    monkeypatch.setattr('laravel_toolkit.routes.fetch_routes', fetch_routes)
+    return calls
+
+
+def touch(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def test_route_cache_hit_until_routes_change(tmp_path, project, fetches):
+    cache = RouteCache(cache_dir=str(tmp_path / 'cache'))
+    entry, hit = cache.get(project)
+    assert not hit and entry['routes'] == ROUTES
+    assert cache.get(project) == (entry, True)
+    # A new cache object reads the same file, as after a restart
+    assert RouteCache(cache_dir=str(tmp_path / 'cache')).get(project)[1] is True
+    touch(os.path.join(project, 'routes', 'web.php'), '<?php')
+    assert cache.get(project)[1] is False
+    touch(os.path.join(project, 'composer.lock'), '{"changed": true}')
+    assert cache.get(project)[1] is False
+    assert len(fetches) == 3
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_route_cache_force_and_files_outside_the_fingerprint(tmp_path, project, fetches):
+    cache = RouteCache(cache_dir=str(tmp_path / 'cache'))
+    cache.get(project)
+    touch(os.path.join(project, 'README.md'), 'docs')
+    assert cache.get(project)[1] is True
+    assert cache.get(project, force=True)[1] is False
+    assert len(fetches) == 2
+
+
+def test_route_cache_ignores_a_corrupt_file(tmp_path, project, fetches):
+    cache = RouteCache(cache_dir=str(tmp_path / 'cache'))
+    cache.get(project)
+    touch(cache._cache_file(project), '{not json')
+    assert cache.load(project) is None
+    assert cache.get(project)[1] is False
+
+
+def test_failed_route_list_raises_and_is_not_cached(fake_php, make_project, tmp_path):
+    fake_php(exit=255)
+    project = make_project()
+    cache = RouteCache(cache_dir=str(tmp_path / 'cache'))
+    with pytest.raises(RuntimeError, match=r'exit code 255.*ParseError'):
+        cache.get(project)
+    assert cache.load(project) is None
@@ -0,0 +1,148 @@
+import itertools
+import socket
+import time
+import urllib.request
+
+import pytest
+
+from laravel_toolkit.jobs import Job, JobManager
+from laravel_toolkit.serve import LatencyStats, Server, ServeManager
+
+opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+def test_latency_stats_keep_a_window():
+    stats = LatencyStats(window=100)
+    for ms in range(1, 201):
+        stats.add(ms)
+    assert (stats.count, stats.max) == (200, 200)
+    assert stats.percentiles(50, 95, 99) == {50: 150, 95: 195, 99: 199}
+    assert LatencyStats().percentiles(50) == {50: None}
+
+
+def test_server_summary_and_slowest_paths():
+    job = Job(1, '/app', ['php', 'artisan', 'serve'])
+    job.status = 'running'
+    server = Server(job, 8000)
+    assert server.state == 'starting'
+    server.url = 'http://127.0.0.1:8000'
+    for ms in (10, 20, 30):
+        server.record_request('/fast', ms)
+    server.record_request('/slow', 900)
+    assert [row['path'] for row in server.slowest_paths()] == ['/slow', '/fast']
+    summary = server.summary()
+    assert (summary['state'], summary['requests'], summary['p50'], summary['p99']) == ('up', 4, 20, 900)
+    assert summary['slowest'] == '/slow'
+    job.status = 'exited'
+    assert server.state == 'stopped'
+
+
+def free_base_port(count=3):
+    """A port followed by count - 1 more that are free right now"""
+    for _ in range(50):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            base = sock.getsockname()[1]
+        if base + count < 65536 and all(_bindable(base + offset) for offset in range(count)):
+            return base
+    pytest.skip("no run of free ports")
+
+
+def _bindable(port):
+    with socket.socket() as sock:
+        try:
+            sock.bind(('127.0.0.1', port))
+        except OSError:
+            return False
+    return True
+
+
+def serve_manager(**options):
+    holder = []
+    jobs = JobManager(on_event=lambda job, event: holder[0].handle_event(job, event))
+    holder.append(ServeManager(jobs, **options))
+    return holder[0]
+
+
+def test_ports_skip_busy_and_allocated_ones(fake_php, make_project):
+    base = free_base_port()
+    servers = serve_manager(base_port=base, probe_interval=0.1)
+    try:
+        with socket.socket() as busy:
+            busy.bind(('127.0.0.1', base))
+            busy.listen()
+            first = servers.start(make_project('one'))
+            second = servers.start(make_project('two'))
+        assert (first.port, second.port) == (base + 1, base + 2)
+        assert first.job.cmd_list[-1] == f'--port={base + 1}'
+        chosen = servers.start(make_project('three'), '--port=1234')
+        assert chosen.port == 1234 and chosen.job.cmd_list.count('--port=1234') == 1
+    finally:
+        for server in list(servers.servers.values()):
+            servers.stop(server.id)
+        servers.close()
+
+
+class IdleJobs:
+    """Creates server jobs without running anything"""
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+
+    def create(self, project_path, cmd_list):
+        return Job(next(self.ids), project_path, cmd_list)
+
+    def start(self, job, unlimited=False):
+        job.status = 'running'
+        return job
+
+
+def test_ports_stay_reserved_until_the_server_reports_its_url():
+    base = free_base_port(4)
+    servers = ServeManager(IdleJobs(), base_port=base)
+    try:
+        first = servers.start('one')
+        assert first.port == base
+        # The port was taken meanwhile, so artisan serve moved on to the next one
+        servers.handle_event(first.job, {'kind': 'url', 'message': f'http://127.0.0.1:{base + 1}'})
+        assert first.port == base + 1
+        assert servers.start('two').port == base
+        failed = servers.start('three')
+        assert failed.port == base + 2
+        failed.job.status = 'exited'
+        assert servers.start('four').port == base + 2
+    finally:
+        servers.close()
+
+
+def wait_until(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_servers_are_probed_and_timed(fake_php, make_project):
+    fake_php(serve_ms=20)
+    servers = serve_manager(base_port=free_base_port(), probe_interval=0.1)
+    try:
+        started = [servers.start(make_project(name)) for name in ('one', 'two')]
+        wait_until(lambda: all(server.state == 'up' and server.probes.count for server in started))
+        assert started[0].url != started[1].url
+        for _ in range(3):
+            opener.open(started[0].url + '/api/users').read()
+        wait_until(lambda: started[0].requests.count == 3)
+        summary = started[0].summary()
+        assert summary['slowest'] == '/api/users' and summary['p50'] >= 20
+        assert summary['probe_p50'] >= 20
+        # Probes are not counted as requests
+        assert started[1].requests.count == 0
+        servers.stop(started[0].id)
+        wait_until(lambda: started[0].state == 'stopped')
+        assert servers.active() == [started[1]]
+        servers.remove(started[0].id)
+        assert list(servers.servers) == [started[1].id]
+    finally:
+        for server in servers.active():
+            servers.stop(server.id)
+        servers.close()
@@ -0,0 +1,83 @@
+import subprocess
+import sys
+import time
+
+import pytest
+
+from laravel_toolkit.streams import PARTIAL_LINE_FLUSH, StreamReader
+
+
+def read(code, threaded=False, **options):
+    """Run a Python snippet and return the (stream, text) chunks StreamReader delivers, with arrival times.
+
+    threaded uses the one-thread-per-stream reader that Windows gets.
+    """
+    chunks = []
+    started = time.perf_counter()
+    with subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+        reader = StreamReader(
+            process, lambda stream, text: chunks.append((stream, text, time.perf_counter() - started)), **options)
+        if threaded:
+            reader._run_threaded()
+        else:
+            reader.run()
+    return chunks
+
+
+def joined(chunks, stream):
+    return ''.join(text for name, text, _ in chunks if name == stream)
+
+
+def test_stdout_and_stderr_are_read_together():
+    chunks = read("import sys\n"
+                  "for i in range(3):\n"
+                  "    print('out', i, flush=True)\n"
+                  "    print('err', i, file=sys.stderr, flush=True)\n")
+    assert joined(chunks, 'stdout') == 'out 0\nout 1\nout 2\n'
+    assert joined(chunks, 'stderr') == 'err 0\nerr 1\nerr 2\n'
+
+
+def test_chunks_hold_complete_lines():
+    chunks = read("import sys, time\n"
+                  "sys.stdout.write('first li'); sys.stdout.flush(); time.sleep(0.05)\n"
+                  "sys.stdout.write('ne\\nsecond line\\n'); sys.stdout.flush()\n")
+    assert [text for _, text, _ in chunks] == ['first line\nsecond line\n']
+
+
+@pytest.mark.parametrize('threaded', [False, True])
+def test_unterminated_line_is_shown_after_a_pause(threaded):
+    chunks = read("import sys, time\n"
+                  "sys.stdout.write('Continue? [y/N] '); sys.stdout.flush()\n"
+                  "time.sleep(1)\n", threaded=threaded)
+    [(stream, text, arrived)] = chunks
+    assert (stream, text) == ('stdout', 'Continue? [y/N] ')
+    assert arrived < PARTIAL_LINE_FLUSH + 0.6  # Well before the process exits
+
+
+@pytest.mark.parametrize('threaded', [False, True])
+def test_line_endings_are_normalized(threaded):
+    chunks = read("import sys, time\n"
+                  "sys.stdout.buffer.write(b'one\\r\\ntwo\\rthree\\r'); sys.stdout.flush(); time.sleep(0.05)\n"
+                  "sys.stdout.buffer.write(b'\\nfour\\r\\r\\n')\n", threaded=threaded)
+    assert joined(chunks, 'stdout') == 'one\ntwo\nthree\nfour\n\n'
+
+
+def test_crlf_split_by_the_read_size():
+    chunks = read("import sys\nsys.stdout.buffer.write(b'a\\r\\nb\\r\\n')\n", chunk_size=1)
+    assert joined(chunks, 'stdout') == 'a\nb\n'
+
+
+def test_multibyte_characters_split_across_reads():
+    chunks = read("import sys\nsys.stdout.buffer.write('héllo wörld ✓\\n'.encode('utf-8'))\n", chunk_size=1)
+    assert joined(chunks, 'stdout') == 'héllo wörld ✓\n'
+
+
+def test_huge_line_is_not_held_back_forever():
+    chunks = read("print('x' * 100)", chunk_size=16)
+    assert joined(chunks, 'stdout') == 'x' * 100 + '\n'
+    assert len(chunks) > 1
+
+
+def test_invalid_utf8_is_replaced():
+    chunks = read("import sys\nsys.stdout.buffer.write(b'bad \\xff byte\\n')\n")
+    assert joined(chunks, 'stdout') == 'bad � byte\n'
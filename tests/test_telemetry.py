@@ -0,0 +1,105 @@
+import csv
+import json
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+from laravel_toolkit.history import HistoryStore
+from laravel_toolkit.jobs import Job, JobManager
+from laravel_toolkit.telemetry import wait_with_rusage
+from laravel_toolkit.utils import percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(10, 0, -1))
+    assert [percentile(values, pct) for pct in (1, 50, 90, 99, 100)] == [1, 5, 9, 10, 10]
+    assert percentile([], 50) is None
+
+
+def test_wait_with_rusage():
+    process = subprocess.Popen([sys.executable, '-c', 'import sys; sum(range(10 ** 6)); sys.exit(4)'])
+    returncode, rusage = wait_with_rusage(process)
+    assert returncode == 4 and process.returncode == 4
+    if rusage is not None:
+        assert rusage.ru_utime + rusage.ru_stime > 0
+
+
+def test_job_metrics(tmp_path):
+    job = JobManager().submit(str(tmp_path), [sys.executable, '-c', (
+        "import time\n"
+        "time.sleep(0.2)\n"
+        "print('first', flush=True)\n"
+        "block = bytearray(64 * 1024 * 1024)\n"
+        "deadline = time.process_time() + 0.1\n"
+        "while time.process_time() < deadline: pass\n")])
+    deadline = time.monotonic() + 10
+    while job.status != 'exited':
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+    metrics = job.metrics
+    assert metrics['spawn_ms'] < metrics['ttfb_ms'] <= metrics['wall_ms']
+    assert metrics['ttfb_ms'] >= 200
+    if sys.platform.startswith('linux'):
+        assert metrics['cpu_ms'] >= 100
+        assert metrics['peak_rss_kb'] >= 64 * 1024
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    yield store
+    store.close()
+
+
+def record(store, project, command, wall_ms, started_at):
+    job = Job(0, project, ['php', 'artisan', command])
+    job.started_at = started_at
+    job.finished_at = started_at + wall_ms / 1000
+    job.returncode = 0
+    job.metrics = {'spawn_ms': 2.0, 'ttfb_ms': wall_ms / 2, 'wall_ms': wall_ms, 'cpu_ms': wall_ms / 4}
+    store.record(job)
+
+
+def test_stats_percentiles_and_trend(store):
+    now = time.time()
+    walls = [100] * 5 + [150] * 5
+    for number, wall_ms in enumerate(walls):
+        record(store, '/a', 'migrate', wall_ms, now + number)
+    record(store, '/a', 'optimize', 80, now)
+    migrate, optimize = store.stats()
+    assert (migrate['command'], migrate['runs']) == ('migrate', 10)
+    assert (migrate['wall_ms_p50'], migrate['wall_ms_p90'], migrate['ttfb_ms_p50']) == (100, 150, 50)
+    assert migrate['peak_rss_kb_p50'] is None
+    assert migrate['trend_pct'] == pytest.approx(50)
+    assert optimize['trend_pct'] is None
+
+
+@pytest.mark.parametrize('suffix', ['.csv', '.json'])
+def test_export_telemetry(store, tmp_path, suffix):
+    record(store, '/a', 'migrate', 100, time.time())
+    path = str(tmp_path / f"telemetry{suffix}")
+    assert store.export_telemetry(path) == 1
+    with open(path, newline='') as f:
+        [row] = json.load(f) if suffix == '.json' else csv.DictReader(f)
+    assert (row['command'], float(row['wall_ms'])) == ('migrate', 100)
+
+
+def test_old_databases_gain_the_telemetry_columns(tmp_path):
+    path = str(tmp_path / 'history.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE runs (id INTEGER PRIMARY KEY, project TEXT NOT NULL, command TEXT NOT NULL, "
+                 "params TEXT NOT NULL DEFAULT '', started_at REAL, finished_at REAL, exit_code INTEGER, "
+                 "error TEXT, output_bytes INTEGER NOT NULL DEFAULT 0, output TEXT NOT NULL DEFAULT '')")
+    conn.execute("INSERT INTO runs (project, command, started_at) VALUES ('/a', 'migrate', ?)", (time.time() - 1,))
+    conn.commit()
+    conn.close()
+    store = HistoryStore(path)
+    try:
+        record(store, '/a', 'migrate', 100, time.time())
+        assert len(store.search()) == 2
+        assert [row['wall_ms'] for row in store.telemetry()] == [100]
+    finally:
+        store.close()
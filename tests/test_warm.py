@@ -0,0 +1,248 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from laravel_toolkit.jobs import JobManager
+from laravel_toolkit.routes import fetch_routes
+from laravel_toolkit.warm import WarmWorkerPool, WorkerUnavailable
+
+# Speaks artisan_worker.php's protocol, or acts as a cold `php artisan` run
+FAKE_WORKER = r'''
+import json, os, sys, time
+
+args = sys.argv[1:]
+while args[:1] == ['-d']:
+    args = args[2:]
+if args[:1] == ['artisan']:
+    if args[1] == 'route:list':
+        print(json.dumps([{'method': 'GET|HEAD', 'uri': 'cold', 'name': '', 'action': 'Closure'}]))
+    else:
+        print('cold', *args[1:])
+    sys.exit(0)
+
+with open(os.environ['FAKE_WORKER_LOG'], 'a') as log:
+    log.write(f"{os.getpid()}\n")
+if os.environ.get('FAKE_WORKER_BOOT') == 'fail':
+    sys.stderr.write('Could not open input file: vendor/autoload.php\n')
+    sys.exit(1)
+print('PHP Warning:  Module "xdebug" is already loaded')
+print('1')
+print('"deprecated"')
+print('[]')
+print(json.dumps({'ready': True}), flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    args = request['args']
+    if args[0] == 'crash':
+        sys.exit(255)
+    if args[0] in ('hang', 'make:hang'):
+        time.sleep(30)
+    if args[0] == 'route:list':
+        output = json.dumps([{'method': 'GET|HEAD', 'uri': 'warm', 'name': '', 'action': 'Closure'}])
+        if os.environ.get('FAKE_WORKER_ROUTES') == 'truncated':
+            output = output[:20]
+    else:
+        output = ' '.join(['warm'] + args)
+    print(json.dumps({'id': request['id'], 'exit_code': 0, 'output': output}), flush=True)
+'''
+
+
+@pytest.fixture
+def boots(tmp_path, monkeypatch):
+    """Put a `php` running FAKE_WORKER on PATH; returns the pids of booted workers"""
+    if os.name == 'nt':
+        pytest.skip("the fake php shim needs a POSIX shell")
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    (bin_dir / 'fake_worker.py').write_text(FAKE_WORKER)
+    shim = bin_dir / 'php'
+    shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{bin_dir / "fake_worker.py"}" "$@"\n')
+    shim.chmod(0o755)
+    monkeypatch.setenv('PATH', str(bin_dir) + os.pathsep + os.environ.get('PATH', ''))
+    log = tmp_path / 'boots.log'
+    log.write_text('')
+    monkeypatch.setenv('FAKE_WORKER_LOG', str(log))
+    monkeypatch.delenv('FAKE_WORKER_BOOT', raising=False)
+    monkeypatch.delenv('FAKE_WORKER_ROUTES', raising=False)
+    script = tmp_path / 'artisan_worker.php'
+    script.write_text('<?php')
+    monkeypatch.setattr('laravel_toolkit.warm.WARM_WORKER_SCRIPT', str(script))
+    return lambda: log.read_text().split()
+
+
+@pytest.fixture
+def pool():
+    pool = WarmWorkerPool()
+    yield pool
+    pool.stop_all()
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = tmp_path / 'project'
+    (project / 'config').mkdir(parents=True)
+    return str(project)
+
+
+def test_eligible():
+    assert WarmWorkerPool.eligible(['php', 'artisan', 'make:model', 'Post'])
+    assert WarmWorkerPool.eligible(['php', 'artisan', 'route:list', '--json'])
+    assert not WarmWorkerPool.eligible(['php', 'artisan', 'migrate'])
+    assert not WarmWorkerPool.eligible(['composer', 'make:model'])
+
+
+def test_calls_reuse_one_booted_worker(boots, pool, project):
+    assert pool.call(project, ['make:model', 'Post']) == (0, 'warm make:model Post --no-interaction')
+    assert pool.call(project, ['make:model', 'Tag', '-n']) == (0, 'warm make:model Tag -n')
+    assert len(boots()) == 1
+    assert len(pool.latencies['warm']) == 2
+
+
+def test_worker_restarts_when_config_changes(boots, pool, project):
+    pool.call(project, ['make:model', 'Post'])
+    with open(os.path.join(project, 'config', 'app.php'), 'w') as f:
+        f.write('<?php return [];')
+    pool.call(project, ['make:model', 'Post'])
+    assert len(boots()) == 2
+
+
+def test_route_changes_restart_the_worker_before_route_list_only(boots, pool, project):
+    os.makedirs(os.path.join(project, 'routes'))
+    pool.call(project, ['route:list', '--json'])
+    with open(os.path.join(project, 'routes', 'web.php'), 'w') as f:
+        f.write('<?php')
+    pool.call(project, ['make:model', 'Post'])
+    assert len(boots()) == 1
+    pool.call(project, ['route:list', '--json'])
+    pool.call(project, ['route:list', '--json'])
+    assert len(boots()) == 2
+
+
+def test_crashed_worker_is_replaced(boots, pool, project):
+    with pytest.raises(WorkerUnavailable, match='exited'):
+        pool.call(project, ['crash'])
+    assert pool.call(project, ['make:model', 'Post'])[0] == 0
+    assert len(boots()) == 2
+
+
+def test_unresponsive_worker_times_out(boots, pool, project, monkeypatch):
+    monkeypatch.setattr('laravel_toolkit.warm.WARM_CALL_TIMEOUT', 0.5)
+    with pytest.raises(WorkerUnavailable, match='timed out'):
+        pool.call(project, ['hang'])
+    assert not pool.worker(project).alive
+
+
+def test_stop_ends_a_waiting_call(boots, pool, project):
+    worker = pool.worker(project)
+    worker.call(['make:model', 'Post'])
+    errors = []
+
+    def call():
+        try:
+            worker.call(['hang'])
+        except WorkerUnavailable as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    time.sleep(0.2)
+    worker.stop()
+    thread.join(5)
+    assert not thread.is_alive() and len(errors) == 1
+    assert worker.call(['make:model', 'Post'])[0] == 0
+    assert len(boots()) == 2
+
+
+def test_failed_boot_reports_stderr(boots, pool, project, monkeypatch):
+    monkeypatch.setenv('FAKE_WORKER_BOOT', 'fail')
+    with pytest.raises(WorkerUnavailable, match='vendor/autoload.php'):
+        pool.call(project, ['make:model', 'Post'])
+
+
+def test_missing_php_is_unavailable(boots, pool, project, monkeypatch):
+    monkeypatch.setenv('PATH', '')
+    with pytest.raises(WorkerUnavailable, match='did not start'):
+        pool.call(project, ['make:model', 'Post'])
+
+
+def test_missing_script_is_unavailable(boots, pool, project, monkeypatch):
+    monkeypatch.setattr('laravel_toolkit.warm.WARM_WORKER_SCRIPT', os.path.join(project, 'missing.php'))
+    with pytest.raises(WorkerUnavailable, match='missing'):
+        pool.call(project, ['make:model', 'Post'])
+    assert boots() == []
+
+
+def test_least_recently_used_worker_is_stopped(boots, project, tmp_path):
+    pool = WarmWorkerPool(max_workers=1)
+    other = tmp_path / 'other'
+    other.mkdir()
+    try:
+        pool.call(project, ['make:model', 'Post'])
+        first = pool.worker(project)
+        pool.call(str(other), ['make:model', 'Post'])
+        assert not first.alive and list(pool.workers) == [str(other)]
+    finally:
+        pool.stop_all()
+
+
+def run_job(pool, project, cmd_list):
+    job = JobManager(warm_pool=pool).submit(project, cmd_list)
+    deadline = time.monotonic() + 10
+    while job.status != 'exited':
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+    return job
+
+
+def test_job_runs_on_the_warm_worker(boots, pool, project):
+    job = run_job(pool, project, ['php', 'artisan', 'make:model', 'Post'])
+    assert job.warm and job.returncode == 0
+    assert ''.join(job.output) == "warm make:model Post --no-interaction\n"
+
+
+def test_job_falls_back_to_a_cold_run(boots, pool, project, monkeypatch):
+    monkeypatch.setattr('laravel_toolkit.warm.WARM_WORKER_SCRIPT', os.path.join(project, 'missing.php'))
+    job = run_job(pool, project, ['php', 'artisan', 'make:model', 'Post'])
+    assert not job.warm and job.returncode == 0
+    output = ''.join(job.output)
+    assert output.startswith("[warm worker unavailable, running normally:")
+    assert output.endswith("cold make:model Post\n")
+    assert len(pool.latencies['cold']) == 1
+
+
+def test_stopping_a_warm_job_leaves_the_job_lock_free(boots, pool, project, monkeypatch):
+    manager = JobManager(warm_pool=pool)
+    stop = pool.stop
+    locked = []
+
+    def stop_worker(project_path):
+        locked.append(manager._lock.locked())
+        stop(project_path)
+
+    monkeypatch.setattr(pool, 'stop', stop_worker)
+    job = manager.submit(project, ['php', 'artisan', 'make:hang'])
+    deadline = time.monotonic() + 10
+    while not job.warm:
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+    manager.stop(job.id)
+    assert job.wait(10)
+    assert job.error == 'stopped' and job.returncode is None
+    assert locked == [False]
+
+
+def test_fetch_routes_warm_then_cold(boots, pool, project, monkeypatch):
+    assert [route['uri'] for route in fetch_routes(project, warm_pool=pool)] == ['warm']
+    monkeypatch.setattr('laravel_toolkit.warm.WARM_WORKER_SCRIPT', os.path.join(project, 'missing.php'))
+    assert [route['uri'] for route in fetch_routes(project, warm_pool=pool)] == ['cold']
+
+
+def test_fetch_routes_runs_cold_when_warm_output_is_unparsable(boots, pool, project, monkeypatch):
+    monkeypatch.setenv('FAKE_WORKER_ROUTES', 'truncated')
+    batches = []
+    routes = fetch_routes(project, on_batch=batches.append, warm_pool=pool)
+    assert [route['uri'] for route in routes] == ['cold']
+    assert batches == [routes]
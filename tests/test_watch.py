@@ -0,0 +1,152 @@
+import os
+import shutil
+import sys
+import threading
+import time
+
+import pytest
+
+from laravel_toolkit.jobs import JobManager
+from laravel_toolkit.watch import (
+    InotifyBackend, PollingBackend, ProjectWatcher, WatchRunner, compile_pattern, format_rules, parse_rules,
+    rule_command,
+)
+
+
+def test_parse_and_format_rules():
+    text = "# comment\nconfig/** -> config:clear\n\n/routes/ -> @refresh-routes\n"
+    rules = parse_rules(text)
+    assert rules == [{'pattern': 'config/**', 'run': 'config:clear'},
+                     {'pattern': 'routes', 'run': '@refresh-routes'}]
+    assert parse_rules(format_rules(rules)) == rules
+    with pytest.raises(ValueError, match='Line 2'):
+        parse_rules("config/** -> config:clear\nroutes/**")
+
+
+def test_rule_command():
+    assert rule_command('config:clear') == ['php', 'artisan', 'config:clear']
+    assert rule_command('composer dump-autoload -o') == ['composer', 'dump-autoload', '-o']
+
+
+@pytest.mark.parametrize('pattern, matches, misses, watches', [
+    ('config/**', ['config/app.php', 'config/a/b.php'], ['configx/app.php', 'app/config.php'], [('config', True)]),
+    ('.env', ['.env'], ['.env.example', 'a/.env'], [('', False), ('.env', True)]),
+    ('resources/views/*.blade.php', ['resources/views/home.blade.php'],
+     ['resources/views/layouts/app.blade.php', 'resources/views/home.php'], [('resources/views', False)]),
+    ('app/**/*.php', ['app/User.php', 'app/Models/User.php'], ['app/User.js'], [('app', True)]),
+    ('database/seed?rs/*', ['database/seeders/A.php'], ['database/seeders/x/A.php'], [('database', True)]),
+])
+def test_compile_pattern(pattern, matches, misses, watches):
+    regex, directories = compile_pattern(pattern)
+    assert [path for path in matches if regex.match(path)] == matches
+    assert [path for path in misses if regex.match(path)] == []
+    assert directories == watches
+
+
+def backends():
+    yield pytest.param(lambda: PollingBackend(interval=0.05), id='polling')
+    yield pytest.param(InotifyBackend, id='inotify', marks=pytest.mark.skipif(
+        not sys.platform.startswith('linux'), reason="inotify is Linux only"))
+
+
+@pytest.fixture(params=list(backends()))
+def watch(request, tmp_path):
+    """Start a ProjectWatcher over tmp_path/project; returns (project, watcher, triggers, fired)"""
+    project = tmp_path / 'project'
+    for directory in ('config', 'routes', os.path.join('vendor', 'x')):
+        (project / directory).mkdir(parents=True)
+    triggers = []
+    fired = threading.Event()
+
+    def on_trigger(project, rule, paths):
+        triggers.append((rule['run'], paths))
+        fired.set()
+
+    watcher = ProjectWatcher(on_trigger, debounce=0.2, backend=request.param()).start()
+    watcher.set_rules(str(project), parse_rules(
+        "config/** -> config:clear\n.env -> config:clear\nroutes/** -> @refresh-routes"))
+    time.sleep(0.2)  # Let the watcher thread apply the rules
+    yield project, watcher, triggers, fired
+    watcher.stop()
+
+
+def write(path, text='x'):
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def settle(triggers, fired):
+    """Triggers fired by the last changes, once they have all been handled"""
+    assert fired.wait(5), "no rule fired"
+    time.sleep(0.8)
+    result = sorted(triggers)
+    triggers.clear()
+    fired.clear()
+    return result
+
+
+def test_a_burst_fires_each_action_once(watch):
+    project, _, triggers, fired = watch
+    write(project / 'config' / 'app.php')
+    write(project / '.env')
+    write(project / 'config' / 'app.php', 'y')
+    write(project / 'README.md')
+    assert settle(triggers, fired) == [('config:clear', ['.env', 'config/app.php'])]
+
+
+def test_new_directories_are_watched(watch):
+    project, _, triggers, fired = watch
+    (project / 'routes' / 'api').mkdir()
+    time.sleep(0.3)
+    write(project / 'routes' / 'api' / 'v1.php')
+    fired_rules = settle(triggers, fired)
+    assert {run for run, _ in fired_rules} == {'@refresh-routes'}
+    assert 'routes/api/v1.php' in sum((paths for _, paths in fired_rules), [])
+
+
+def test_deleted_directories_are_watched_again(watch):
+    project, _, triggers, fired = watch
+    write(project / 'config' / 'app.php')
+    settle(triggers, fired)
+    shutil.rmtree(project / 'config')
+    assert settle(triggers, fired) == [('config:clear', ['config/app.php'])]
+    (project / 'config').mkdir()
+    time.sleep(0.3)
+    write(project / 'config' / 'cache.php')
+    assert settle(triggers, fired) == [('config:clear', ['config/cache.php'])]
+
+
+def test_directories_created_later_are_watched(watch):
+    project, watcher, triggers, fired = watch
+    watcher.set_rules(str(project), parse_rules("lang/en/** -> view:clear"))
+    time.sleep(0.2)
+    (project / 'lang' / 'en' / 'auth').mkdir(parents=True)
+    write(project / 'lang' / 'en' / 'auth' / 'messages.php')
+    fired_rules = settle(triggers, fired)
+    assert {run for run, _ in fired_rules} == {'view:clear'}
+    assert 'lang/en/auth/messages.php' in sum((paths for _, paths in fired_rules), [])
+
+
+def test_vendor_is_never_watched(watch):
+    project, watcher, triggers, fired = watch
+    watcher.set_rules(str(project), parse_rules("**/*.php -> dump"))
+    time.sleep(0.2)
+    write(project / 'vendor' / 'x' / 'a.php')
+    write(project / 'config' / 'app.php')
+    assert settle(triggers, fired) == [('dump', ['config/app.php'])]
+
+
+def test_runner_reruns_instead_of_running_twice(fake_php, make_project):
+    fake_php(lines=30, rate=100)
+    project = make_project()
+    started = []
+    manager = JobManager(on_status=lambda job: job.status == 'running' and job.process and started.append(job))
+    runner = WatchRunner(manager)
+    for _ in range(3):
+        runner.run(project, 'config:clear')
+    deadline = time.monotonic() + 10
+    while runner._active:
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+    assert len({job.id for job in started}) == 2
+    assert manager.jobs == {}
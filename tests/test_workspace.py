@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from laravel_toolkit.workspace import WorkspaceIndex, read_project
+
+LOCK = {'packages': [{'name': 'laravel/framework', 'version': 'v11.2.0'}]}
+
+
+def make_laravel(path, name=None, php='^8.2', lock=LOCK):
+    os.makedirs(path)
+    with open(os.path.join(path, 'artisan'), 'w') as f:
+        f.write('#!/usr/bin/env php')
+    with open(os.path.join(path, 'composer.json'), 'w') as f:
+        json.dump({'name': name, 'require': {'php': php, 'laravel/framework': '^11.0'}}, f)
+    if lock is not None:
+        with open(os.path.join(path, 'composer.lock'), 'w') as f:
+            json.dump(lock, f)
+    return path
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / 'code'
+    make_laravel(str(root / 'shop'), name='acme/shop')
+    make_laravel(str(root / 'clients' / 'blog'), lock=None)
+    # Never scanned: dependencies, hidden directories and projects inside projects
+    make_laravel(str(root / 'shop' / 'vendor' / 'laravel' / 'app'))
+    make_laravel(str(root / 'node_modules' / 'fake'))
+    make_laravel(str(root / '.trash' / 'old'))
+    make_laravel(str(root / 'shop' / 'packages' / 'nested'))
+    (root / 'notes').mkdir()
+    return str(root)
+
+
+@pytest.fixture
+def index_file(tmp_path):
+    return str(tmp_path / 'workspace_index.json')
+
+
+def paths(projects, root):
+    return [os.path.relpath(project['path'], root) for project in projects]
+
+
+def test_read_project(workspace):
+    info = read_project(os.path.join(workspace, 'shop'))
+    assert (info['name'], info['laravel_version'], info['laravel_constraint'], info['php_constraint']) == (
+        'acme/shop', '11.2.0', '^11.0', '^8.2')
+    info = read_project(os.path.join(workspace, 'clients', 'blog'))
+    assert (info['name'], info['laravel_version']) == ('blog', None)
+
+
+def test_scan_finds_projects(workspace, index_file):
+    found = []
+    projects = WorkspaceIndex(index_file).scan([workspace], on_project=found.append)
+    assert paths(projects, workspace) == [os.path.join('clients', 'blog'), 'shop']
+    assert sorted(paths(found, workspace)) == paths(projects, workspace)
+
+
+def test_rescan_only_lists_changed_directories(workspace, index_file):
+    index = WorkspaceIndex(index_file)
+    index.scan([workspace])
+    assert index.last_scan['reused'] == 0
+    directories = index.last_scan['listed']
+    index = WorkspaceIndex(index_file)
+    index.scan([workspace])
+    assert (index.last_scan['listed'], index.last_scan['reused']) == (0, directories)
+    make_laravel(os.path.join(workspace, 'clients', 'api'))
+    projects = index.scan([workspace])
+    assert os.path.join('clients', 'api') in paths(projects, workspace)
+    # clients/ changed and clients/api is new; nothing else is listed again
+    assert index.last_scan['listed'] == 2
+
+
+def test_rescan_rereads_changed_composer_files(workspace, index_file):
+    index = WorkspaceIndex(index_file)
+    index.scan([workspace])
+    lock = os.path.join(workspace, 'shop', 'composer.lock')
+    with open(lock, 'w') as f:
+        json.dump({'packages': [{'name': 'laravel/framework', 'version': 'v11.3.0'}]}, f)
+    stat = os.stat(lock)
+    os.utime(lock, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    shop = next(project for project in index.scan([workspace]) if project['name'] == 'acme/shop')
+    assert shop['laravel_version'] == '11.3.0'
+    assert index.last_scan['listed'] == 0
+
+
+def test_removed_projects_leave_the_index(workspace, index_file, tmp_path):
+    other = make_laravel(str(tmp_path / 'other' / 'tool'))
+    index = WorkspaceIndex(index_file)
+    index.scan([workspace])
+    index.scan([os.path.dirname(other)])
+    shutil.rmtree(os.path.join(workspace, 'shop'))
+    assert paths(index.scan([workspace]), workspace) == [os.path.join('clients', 'blog')]
+    # Projects under other roots are kept
+    assert len(WorkspaceIndex(index_file).projects()) == 2
+    assert index.roots == sorted([workspace, os.path.dirname(other)])
+
+
+def test_max_depth(workspace, index_file):
+    projects = WorkspaceIndex(index_file, max_depth=1).scan([workspace])
+    assert paths(projects, workspace) == ['shop']
+
+
+def test_missing_root_and_corrupt_index(tmp_path, index_file):
+    with open(index_file, 'w') as f:
+        f.write('{not json')
+    index = WorkspaceIndex(index_file)
+    assert index.scan([str(tmp_path / 'missing')]) == []